@@ -0,0 +1,188 @@
+"""Motor de conquistas: aplica o delta de cada evento aos contadores do usuário.
+
+Chamado pelo outbox (handler `achievements`) na transação de entrega. Para
+cada contador indexado pelo tipo do evento, o valor novo é calculado a
+partir do anterior e do evento, sem reler o histórico (sequências consultam
+só os dias já registrados); as regras cujo limite foi cruzado viram linhas em
+`user_achievements`. Os contadores começam a
+contar a partir da implantação (não há backfill do histórico).
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.domain.achievements import RULE_INDEX, RULES, Counter, Rule
+from app.domain.events import DomainEvent
+from app.infrastructure.database import Database
+
+# Dias lidos por consulta ao medir uma sequência
+STREAK_WINDOW_DAYS = 62
+
+
+class AchievementsService:
+    def __init__(self, db: Database, index: Dict[str, List[Tuple[Counter, List[Rule]]]] = None):
+        self.db = db
+        self.index = RULE_INDEX if index is None else index
+
+    def handle(self, cursor, event: DomainEvent) -> List[str]:
+        """Atualiza os contadores afetados pelo evento; retorna os códigos desbloqueados"""
+        unlocked = []
+        for counter, rules in self.index.get(event.event_type, ()):
+            change = self._apply(cursor, counter, event)
+            if change is None:
+                continue
+            before, after = change
+            for rule in rules:
+                if rule.threshold > after:
+                    break
+                if before < rule.threshold and self._unlock(cursor, event, rule):
+                    unlocked.append(rule.code)
+        return unlocked
+
+    def _apply(self, cursor, counter: Counter, event: DomainEvent) -> Optional[Tuple[float, float]]:
+        """(valor anterior, valor novo) do contador; None se o evento não o altera"""
+        if counter.kind == "streak":
+            return self._apply_streak(cursor, counter, event)
+
+        if counter.kind == "distinct":
+            member = counter.value(event)
+            if member is None:
+                return None
+        elif counter.once_per is not None:
+            member = counter.once_per(event)
+        else:
+            member = None
+        if member is not None:
+            cursor.execute("""
+                INSERT INTO achievement_members (user_id, counter, member)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (user_id, counter, member) DO NOTHING
+            """, (event.user_id, counter.name, str(member)))
+            if cursor.rowcount == 0:
+                return None
+
+        delta = float(counter.value(event)) if counter.kind == "sum" else 1.0
+        if not delta:
+            return None
+        cursor.execute("""
+            INSERT INTO achievement_counters (user_id, counter, value, updated_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (user_id, counter) DO UPDATE SET
+                value = achievement_counters.value + EXCLUDED.value,
+                updated_at = EXCLUDED.updated_at
+        """, (event.user_id, counter.name, delta, datetime.utcnow()))
+        cursor.execute("""
+            SELECT value FROM achievement_counters WHERE user_id = %s AND counter = %s
+        """, (event.user_id, counter.name))
+        after = float(cursor.fetchone()['value'])
+        return after - delta, after
+
+    def _apply_streak(self, cursor, counter: Counter, event: DomainEvent) -> Optional[Tuple[float, float]]:
+        """Dias com evento ficam em `achievement_members`; a sequência é a corrida de
+        dias consecutivos que contém o dia do evento, então eventos atrasados ou
+        vindos do offline também preenchem buracos e emendam sequências."""
+        day = counter.value(event)
+        cursor.execute("""
+            SELECT value, last_day FROM achievement_counters
+            WHERE user_id = %s AND counter = %s
+            FOR UPDATE
+        """, (event.user_id, counter.name))
+        row = cursor.fetchone()
+        value = float(row['value']) if row else 0.0
+        last_day = row['last_day'] if row else None
+        if isinstance(last_day, str):
+            last_day = date.fromisoformat(last_day[:10])
+        if last_day is not None and value:
+            self._seed_streak_days(cursor, event.user_id, counter.name, last_day, int(value))
+
+        cursor.execute("""
+            INSERT INTO achievement_members (user_id, counter, member)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (user_id, counter, member) DO NOTHING
+        """, (event.user_id, counter.name, day.isoformat()))
+        if cursor.rowcount == 0:
+            # Dia já contado
+            return None
+
+        earlier = self._streak_run(cursor, event.user_id, counter.name, day, -1)
+        later = self._streak_run(cursor, event.user_id, counter.name, day, 1)
+        after = float(earlier + 1 + later)
+        if last_day is None or day + timedelta(days=later) >= last_day:
+            # A corrida chega ao dia mais recente: é a sequência atual
+            value, last_day = after, max(last_day or day, day)
+        cursor.execute("""
+            INSERT INTO achievement_counters (user_id, counter, value, last_day, updated_at)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (user_id, counter) DO UPDATE SET
+                value = EXCLUDED.value, last_day = EXCLUDED.last_day, updated_at = EXCLUDED.updated_at
+        """, (event.user_id, counter.name, value, last_day, datetime.utcnow()))
+        # Regras cruzadas pela corrida emendada; as já desbloqueadas continuam
+        return float(max(earlier, later)), after
+
+    def _seed_streak_days(self, cursor, user_id: int, counter: str, last_day: date, length: int):
+        """Contadores anteriores aos dias em `achievement_members`: registra a sequência atual"""
+        cursor.execute("""
+            SELECT 1 FROM achievement_members WHERE user_id = %s AND counter = %s AND member = %s
+        """, (user_id, counter, last_day.isoformat()))
+        if cursor.fetchone() is not None:
+            return
+        for offset in range(length):
+            cursor.execute("""
+                INSERT INTO achievement_members (user_id, counter, member)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (user_id, counter, member) DO NOTHING
+            """, (user_id, counter, (last_day - timedelta(days=offset)).isoformat()))
+
+    def _streak_run(self, cursor, user_id: int, counter: str, day: date, step: int) -> int:
+        """Dias consecutivos registrados a partir do vizinho de `day` na direção `step`"""
+        run = 0
+        while True:
+            # Uma janela de dias por consulta (datas ISO ordenam como texto)
+            first = day + timedelta(days=step * (run + 1))
+            last = day + timedelta(days=step * (run + STREAK_WINDOW_DAYS))
+            low, high = sorted((first, last))
+            cursor.execute("""
+                SELECT member FROM achievement_members
+                WHERE user_id = %s AND counter = %s AND member BETWEEN %s AND %s
+            """, (user_id, counter, low.isoformat(), high.isoformat()))
+            days = {row['member'] for row in cursor.fetchall()}
+            for _ in range(STREAK_WINDOW_DAYS):
+                if (day + timedelta(days=step * (run + 1))).isoformat() not in days:
+                    return run
+                run += 1
+
+    def _unlock(self, cursor, event: DomainEvent, rule: Rule) -> bool:
+        cursor.execute("""
+            INSERT INTO user_achievements (user_id, code, unlocked_at)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (user_id, code) DO NOTHING
+        """, (event.user_id, rule.code, datetime.utcnow()))
+        return cursor.rowcount == 1
+
+    def count_unlocked(self, cursor, user_id: int) -> int:
+        cursor.execute("SELECT COUNT(*) FROM user_achievements WHERE user_id = %s", (user_id,))
+        return cursor.fetchone()['count']
+
+    def get_achievements(self, user_id: int) -> List[Dict]:
+        """Todas as conquistas, com progresso e data de desbloqueio do usuário"""
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            cursor.execute("""
+                SELECT code, unlocked_at FROM user_achievements WHERE user_id = %s
+            """, (user_id,))
+            unlocked = {row['code']: row['unlocked_at'] for row in cursor.fetchall()}
+            cursor.execute("""
+                SELECT counter, value FROM achievement_counters WHERE user_id = %s
+            """, (user_id,))
+            values = {row['counter']: float(row['value']) for row in cursor.fetchall()}
+
+        return [
+            {
+                "code": rule.code,
+                "title": rule.title,
+                "description": rule.description,
+                "progress": min(values.get(rule.counter, 0.0), rule.threshold),
+                "threshold": rule.threshold,
+                "unlocked": rule.code in unlocked,
+                "unlocked_at": unlocked.get(rule.code),
+            }
+            for rule in RULES
+        ]
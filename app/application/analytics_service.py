@@ -0,0 +1,262 @@
+"""Análises de força vetorizadas (NumPy) sobre o histórico de exercícios.
+
+O histórico do usuário (banco + arquivo frio) é carregado uma vez em arrays
+colunares e todas as métricas saem de operações vetorizadas:
+
+- 1RM estimado: Epley `w * (1 + r/30)` e Brzycki `w * 36 / (37 - r)`
+  (com r = 1 o 1RM é a própria carga)
+- tonelagem semanal (séries concluídas x repetições x carga) e média móvel
+  de 4 semanas
+- PRs: melhor carga, melhor volume por sessão e melhor carga por faixa de
+  repetições
+
+O resultado fica em cache por usuário e é invalidado pelos eventos de
+progresso/conclusão do pub/sub; o TTL cobre eventos de outros workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.application.schemas.analytics import (
+    ExerciseAnalytics, RepRangePR, StrengthAnalytics, WeeklyVolume,
+)
+from app.core.config import settings
+from app.infrastructure.cold_storage import ColdStorageError, ColdStore
+from app.infrastructure.database import Database, db
+from app.infrastructure.pubsub import pubsub
+
+# (rótulo, mínimo, máximo) de repetições
+REP_RANGES = (("1-3", 1, 3), ("4-6", 4, 6), ("7-10", 7, 10), ("11-15", 11, 15), ("16+", 16, 10_000))
+EPOCH = date(1970, 1, 1)
+INVALIDATING_EVENTS = {"exercise_progress", "session_completed"}
+
+
+def epley(weight: np.ndarray, reps: np.ndarray) -> np.ndarray:
+    return np.where(reps <= 1, weight, weight * (1 + reps / 30.0))
+
+
+def brzycki(weight: np.ndarray, reps: np.ndarray) -> np.ndarray:
+    # Fórmula indefinida a partir de 37 repetições
+    safe = np.clip(reps, 1, 36)
+    return np.where(reps <= 1, weight, weight * 36.0 / (37.0 - safe))
+
+
+def week_index(days: np.ndarray) -> np.ndarray:
+    """Semana ISO (segunda-feira) como inteiro; 1970-01-01 foi uma quinta"""
+    return (days + 3) // 7
+
+
+def week_start(index: int) -> date:
+    return EPOCH + timedelta(days=int(index) * 7 - 3)
+
+
+def rolling_weekly(weeks: np.ndarray, tonnage: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Tonelagem por semana contínua (semanas vazias = 0) e média móvel de 4 semanas"""
+    if weeks.size == 0:
+        empty = np.zeros(0)
+        return empty.astype(np.int64), empty, empty
+    first = weeks.min()
+    totals = np.bincount(weeks - first, weights=tonnage)
+    cumulative = np.concatenate(([0.0], np.cumsum(totals)))
+    window = np.minimum(np.arange(1, totals.size + 1), 4)
+    rolling = (cumulative[1:] - cumulative[np.arange(totals.size) + 1 - window]) / window
+    return np.arange(first, first + totals.size), totals, rolling
+
+
+class StrengthAnalyticsService:
+    def __init__(self, database: Database, store: ColdStore = None, cache_size: int = 1024,
+                 ttl_seconds: float = None):
+        self.db = database
+        self.store = store or ColdStore(settings.COLD_STORAGE_DIR)
+        self.cache_size = cache_size
+        self.ttl = settings.ANALYTICS_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._cache: "OrderedDict[int, Tuple[float, StrengthAnalytics]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_event(self, user_id: int, event: str, data: Dict):
+        if event in INVALIDATING_EVENTS:
+            self.invalidate(user_id)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def get(self, user_id: int) -> StrengthAnalytics:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and now - cached[0] < self.ttl:
+                self._cache.move_to_end(user_id)
+                return cached[1]
+
+        result = self.compute(user_id)
+        with self._lock:
+            self._cache[user_id] = (now, result)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def warm(self, user_ids: List[int]) -> int:
+        """Recalcula as entradas ausentes ou na segunda metade do TTL; retorna quantas"""
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                user_id for user_id in user_ids
+                if user_id not in self._cache or now - self._cache[user_id][0] >= self.ttl / 2
+            ]
+        for user_id in stale:
+            result = self.compute(user_id)
+            with self._lock:
+                self._cache[user_id] = (time.monotonic(), result)
+                self._cache.move_to_end(user_id)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return len(stale)
+
+    def load_history(self, user_id: int) -> Dict[str, np.ndarray]:
+        """Séries concluídas do usuário como arrays colunares (banco + arquivo frio)"""
+        ids: List[int] = []
+        names: List[str] = []
+        session_ids: List[int] = []
+        started: List[datetime] = []
+        sets: List[int] = []
+        reps: List[int] = []
+        weights: List[float] = []
+        completed: List[bool] = []
+
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            cursor.execute("""
+                SELECT we.id, we.exercise_name, we.session_id, ws.started_at, we.completed_sets, we.reps, we.weight,
+                       we.is_completed
+                FROM workout_exercises we
+                JOIN workout_sessions ws ON ws.id = we.session_id
+                WHERE ws.user_id = %s AND we.completed_sets > 0
+            """, (user_id,))
+            for row in cursor.fetchall():
+                ids.append(row['id'])
+                names.append(row['exercise_name'])
+                session_ids.append(row['session_id'])
+                started.append(row['started_at'])
+                sets.append(row['completed_sets'])
+                reps.append(row['reps'])
+                weights.append(float(row['weight'] or 0))
+                completed.append(bool(row['is_completed']))
+            cursor.execute("SELECT path FROM cold_archive_manifest WHERE user_id = %s", (user_id,))
+            cold_paths = [row['path'] for row in cursor.fetchall()]
+
+        hot_sessions = set(session_ids)
+        for path in cold_paths:
+            try:
+                cold = self.store.open(path)
+            except ColdStorageError:
+                continue
+            with cold:
+                # Projeção: só as colunas usadas pelas métricas são descomprimidas
+                for row in cold.scan("exercises", ("id", "exercise_name", "session_id", "session_started_at",
+                                                   "completed_sets", "reps", "weight", "is_completed")):
+                    if not row['completed_sets'] or row['session_id'] in hot_sessions:
+                        continue
+                    ids.append(row['id'])
+                    names.append(row['exercise_name'])
+                    session_ids.append(row['session_id'])
+                    started.append(row['session_started_at'])
+                    sets.append(row['completed_sets'])
+                    reps.append(row['reps'])
+                    weights.append(row['weight'] or 0.0)
+                    completed.append(bool(row['is_completed']))
+
+        return {
+            "id": np.array(ids, dtype=np.int64),
+            "exercise": np.array(names, dtype=object),
+            "session_id": np.array(session_ids, dtype=np.int64),
+            "started_at": np.array(started, dtype="datetime64[us]"),
+            "sets": np.array(sets, dtype=np.int64),
+            "reps": np.array(reps, dtype=np.int64),
+            "weight": np.array(weights, dtype=np.float64),
+            "completed": np.array(completed, dtype=bool),
+        }
+
+    def compute(self, user_id: int) -> StrengthAnalytics:
+        history = self.load_history(user_id)
+        tonnage = history["sets"] * history["reps"] * history["weight"]
+        days = history["started_at"].astype("datetime64[D]").astype(np.int64)
+        weeks = week_index(days)
+
+        exercises: List[ExerciseAnalytics] = []
+        if history["exercise"].size:
+            names, inverse = np.unique(history["exercise"].astype(str), return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            boundaries = np.flatnonzero(np.diff(inverse[order])) + 1
+            for index, group in zip(range(names.size), np.split(order, boundaries)):
+                exercises.append(self._exercise(
+                    str(names[index]),
+                    history["session_id"][group], history["started_at"][group], weeks[group],
+                    history["reps"][group], history["weight"][group], tonnage[group],
+                ))
+        exercises.sort(key=lambda item: item.best_e1rm_epley, reverse=True)
+
+        week_ids, totals, rolling = rolling_weekly(weeks, tonnage)
+        return StrengthAnalytics(
+            user_id=user_id,
+            generated_at=datetime.utcnow(),
+            total_sets=int(history["sets"].sum()),
+            weekly_tonnage=self._weekly(week_ids, totals, rolling),
+            exercises=exercises,
+        )
+
+    def _exercise(self, name: str, session_ids: np.ndarray, started_at: np.ndarray, weeks: np.ndarray,
+                  reps: np.ndarray, weight: np.ndarray, tonnage: np.ndarray) -> ExerciseAnalytics:
+        e1rm_epley = epley(weight, reps)
+        e1rm_brzycki = brzycki(weight, reps)
+
+        # Volume por sessão (um exercício pode aparecer mais de uma vez na mesma sessão)
+        sessions, session_inverse = np.unique(session_ids, return_inverse=True)
+        session_volume = np.bincount(session_inverse, weights=tonnage)
+        best_session = int(np.argmax(session_volume))
+        best_volume_date = started_at[session_inverse == best_session].max()
+
+        latest = int(np.argmax(started_at))
+        rep_range_prs = []
+        for label, low, high in REP_RANGES:
+            mask = (reps >= low) & (reps <= high)
+            if not mask.any():
+                continue
+            candidates = np.flatnonzero(mask)
+            best = candidates[np.argmax(weight[candidates])]
+            rep_range_prs.append(RepRangePR(
+                rep_range=label,
+                weight=round(float(weight[best]), 2),
+                reps=int(reps[best]),
+                date=started_at[best].astype(datetime),
+            ))
+
+        week_ids, totals, rolling = rolling_weekly(weeks, tonnage)
+        return ExerciseAnalytics(
+            exercise_name=name,
+            sessions=int(sessions.size),
+            best_e1rm_epley=round(float(e1rm_epley.max()), 2),
+            best_e1rm_brzycki=round(float(e1rm_brzycki.max()), 2),
+            current_e1rm=round(float(e1rm_epley[latest]), 2),
+            best_weight=round(float(weight.max()), 2),
+            best_volume=round(float(session_volume[best_session]), 2),
+            best_volume_date=best_volume_date.astype(datetime),
+            rep_range_prs=rep_range_prs,
+            weekly=self._weekly(week_ids, totals, rolling),
+        )
+
+    @staticmethod
+    def _weekly(week_ids: np.ndarray, totals: np.ndarray, rolling: np.ndarray) -> List[WeeklyVolume]:
+        return [
+            WeeklyVolume(week_start=week_start(w), tonnage=round(float(t), 2), rolling_4w=round(float(r), 2))
+            for w, t, r in zip(week_ids, totals, rolling)
+        ]
+
+
+# Instância global; invalidada pelos eventos de progresso e conclusão
+strength_analytics = StrengthAnalyticsService(db)
+pubsub.add_listener(strength_analytics.on_event)
@@ -1,26 +1,24 @@
 from typing import Optional
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
+from app.core import security
 from app.domain.entities import User, GenderEnum
 from app.domain.repositories import UserRepository
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class AuthService:
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+        return security.verify_password(plain_password, hashed_password)
 
     def get_password_hash(self, password: str) -> str:
-        return pwd_context.hash(password)
+        return security.get_password_hash(password)
 
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         to_encode = data.copy()
@@ -51,9 +49,15 @@ class AuthService:
     async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         user = await self.user_repository.get_by_email(email)
         if not user:
+            security.dummy_verify()
             return None
-        if not self.verify_password(password, user.hashed_password):
+        valid, new_hash = security.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            # Hash com parâmetros desatualizados: refeito com a política atual
+            user.hashed_password = new_hash
+            user = await self.user_repository.update(user)
         return user
 
     async def get_current_user(self, token: str) -> Optional[User]:
@@ -13,7 +13,7 @@ class DashboardService:
         """Buscar todos os dados do dashboard"""
         today = datetime.utcnow()
         
-        with self.db.get_cursor() as cursor:
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
             # Dados semanais
             week_start = today - timedelta(days=today.weekday())
             week_end = week_start + timedelta(days=6)
@@ -70,9 +70,10 @@ class DashboardService:
                 SELECT we.*, ws.started_at 
                 FROM workout_exercises we
                 JOIN workout_sessions ws ON we.session_id = ws.id
-                WHERE ws.user_id = %s AND ws.started_at >= %s AND we.is_completed = TRUE
+                WHERE ws.user_id = %s AND ws.started_at >= %s AND we.session_started_at >= %s
+                  AND we.is_completed = TRUE
                 ORDER BY ws.started_at
-            """, (user_id, load_start_date))
+            """, (user_id, load_start_date, load_start_date))
             exercises = cursor.fetchall()
             
             load_evolution_data = []
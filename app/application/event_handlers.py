@@ -0,0 +1,61 @@
+"""Handlers dos eventos de domínio entregues pelo outbox.
+
+Cada handler recebe o cursor da transação de entrega (a mesma que registra
+o handler em `processed_events`) e o evento. Efeitos fora do banco devem
+ser seguros para repetição: a entrega é pelo menos uma vez.
+"""
+from datetime import datetime
+
+from app.application.achievements_service import AchievementsService
+from app.domain.events import ExerciseCompleted, SessionCompleted
+from app.infrastructure.database import db
+from app.infrastructure.outbox import OutboxRelay
+
+
+def update_user_progress(cursor, event: SessionCompleted):
+    """Soma o treino concluído e o XP ao progresso do usuário"""
+    cursor.execute("""
+        SELECT * FROM user_progress
+        WHERE user_id = %s
+        ORDER BY date DESC
+        LIMIT 1
+        FOR UPDATE
+    """, (event.user_id,))
+    progress = cursor.fetchone()
+
+    if not progress:
+        cursor.execute("""
+            INSERT INTO user_progress (user_id, date, total_workouts, total_exercises, total_xp, current_streak, longest_streak, level)
+            VALUES (%s, %s, 1, %s, %s, 1, 1, 1)
+        """, (event.user_id, datetime.utcnow(), event.exercise_count, event.xp_earned))
+        return
+
+    total_workouts = progress['total_workouts'] + 1
+    current_streak = progress['current_streak'] + 1
+    cursor.execute("""
+        UPDATE user_progress
+        SET total_workouts = %s, total_exercises = %s, total_xp = %s, current_streak = %s,
+            longest_streak = %s, level = %s, date = %s
+        WHERE id = %s
+    """, (
+        total_workouts,
+        progress['total_exercises'] + event.exercise_count,
+        progress['total_xp'] + event.xp_earned,
+        current_streak,
+        max(progress['longest_streak'], current_streak),
+        (total_workouts // 5) + 1,
+        datetime.utcnow(),
+        progress['id'],
+    ))
+
+
+def register_handlers(relay: OutboxRelay):
+    achievements = AchievementsService(relay.db)
+    relay.register(SessionCompleted.event_type, "update_user_progress", update_user_progress)
+    relay.register(SessionCompleted.event_type, "achievements", achievements.handle)
+    relay.register(ExerciseCompleted.event_type, "achievements", achievements.handle)
+
+
+# Instância global do relay
+outbox_relay = OutboxRelay(db)
+register_handlers(outbox_relay)
@@ -5,6 +5,15 @@ class GifService:
     def __init__(self):
         self.api_key = settings.GIPHY_API_KEY
         self.base_url = settings.GIPHY_BASE_URL
+        self._trending_cache: List[Dict] = []
+
+    async def load_catalog(self):
+        """Carrega o catálogo de GIFs em tendência (chamado no startup da aplicação)"""
+        self._trending_cache = self._get_mock_trending_gifs(10)
+
+    @property
+    def catalog_loaded(self) -> bool:
+        return bool(self._trending_cache)
 
     async def search_exercise_gifs(self, exercise_name: str, limit: int = 5) -> List[Dict]:
         """Busca GIFs relacionados a um exercício específico"""
@@ -13,6 +22,8 @@ class GifService:
 
     async def get_trending_workout_gifs(self, limit: int = 10) -> List[Dict]:
         """Busca GIFs em tendência relacionados a treinos"""
+        if limit <= len(self._trending_cache):
+            return self._trending_cache[:limit]
         # Por enquanto, sempre retorna GIFs mockados
         return self._get_mock_trending_gifs(limit)
 
@@ -0,0 +1,266 @@
+"""Histórico de sessões em duas camadas: banco (quente) e arquivos frios.
+
+`archive` move sessões com mais de `COLD_ARCHIVE_AFTER_DAYS` dias (meses
+inteiros) do banco para um arquivo colunar por usuário e mês, registrando o
+arquivo e seus totais em `cold_archive_manifest`. As leituras de histórico e
+exportação juntam as duas camadas; totais vitalícios somam o manifesto sem
+abrir arquivo nenhum.
+
+O arquivo é gravado antes da transação que apaga as linhas do banco. Se a
+transação falhar, a mesma sessão pode existir nas duas camadas até a próxima
+execução; a leitura deduplica pelo id, preferindo o banco.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.infrastructure.cold_storage import (
+    ColdStorageError, ColdStore, EXERCISE_SCHEMA, SESSION_SCHEMA, normalize_row,
+)
+from app.infrastructure.database import Database
+from app.infrastructure.partitioning import add_months, month_start
+
+logger = logging.getLogger(__name__)
+
+SESSION_COLUMNS = ", ".join(name for name, _ in SESSION_SCHEMA)
+EXERCISE_COLUMNS = ", ".join(name for name, _ in EXERCISE_SCHEMA)
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class HistoryService:
+    def __init__(self, db: Database, store: ColdStore = None):
+        self.db = db
+        self.store = store or ColdStore(settings.COLD_STORAGE_DIR)
+
+    # Arquivamento
+
+    def archivable_months(self, older_than_days: int = None, limit: int = None) -> List[Tuple[int, date]]:
+        """(usuário, mês) com sessões inteiramente anteriores ao corte"""
+        older_than_days = settings.COLD_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        cutoff = month_start(datetime.utcnow().date() - timedelta(days=older_than_days))
+        if self.db.dialect == "postgresql":
+            month_expr = "date_trunc('month', started_at)"
+        else:
+            month_expr = "strftime('%%Y-%%m-01', started_at)"
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT DISTINCT user_id, {month_expr} AS month
+                FROM workout_sessions
+                WHERE started_at < %s
+                ORDER BY user_id, month
+                {"LIMIT %s" if limit else ""}
+            """, (datetime.combine(cutoff, datetime.min.time()),) + ((limit,) if limit else ()))
+            return [(row['user_id'], _as_date(row['month'])) for row in cursor.fetchall()]
+
+    def archive_month(self, user_id: int, month: date) -> int:
+        """Move um mês de um usuário para o arquivo frio; retorna sessões movidas"""
+        lower = datetime.combine(month, datetime.min.time())
+        upper = datetime.combine(add_months(month, 1), datetime.min.time())
+
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {SESSION_COLUMNS} FROM workout_sessions
+                WHERE user_id = %s AND started_at >= %s AND started_at < %s
+                ORDER BY started_at
+                FOR UPDATE
+            """, (user_id, lower, upper))
+            sessions = [normalize_row(row) for row in cursor.fetchall()]
+            if not sessions:
+                return 0
+            cursor.execute(f"""
+                SELECT {', '.join('we.' + name for name, _ in EXERCISE_SCHEMA)}
+                FROM workout_exercises we
+                JOIN workout_sessions ws ON ws.id = we.session_id
+                WHERE ws.user_id = %s AND ws.started_at >= %s AND ws.started_at < %s
+                  AND we.session_started_at >= %s AND we.session_started_at < %s
+                ORDER BY we.id
+            """, (user_id, lower, upper, lower, upper))
+            exercises = [normalize_row(row) for row in cursor.fetchall()]
+
+            # Mês já arquivado antes (sessões offline chegando atrasadas): mescla
+            cursor.execute("""
+                SELECT path FROM cold_archive_manifest WHERE user_id = %s AND month = %s
+            """, (user_id, month))
+            existing = cursor.fetchone()
+            if existing:
+                try:
+                    with self.store.open(existing['path']) as cold:
+                        previous = cold.read_all()
+                except ColdStorageError:
+                    logger.error("Arquivo frio registrado e ilegível: %s", existing['path'])
+                    raise
+                moved = {row['id'] for row in sessions}
+                sessions = [r for r in previous['sessions'] if r['id'] not in moved] + sessions
+                moved_exercises = {row['id'] for row in exercises}
+                exercises = [r for r in previous['exercises'] if r['id'] not in moved_exercises] + exercises
+
+            path, size = self.store.write(user_id, month, sessions, exercises)
+            cursor.execute("""
+                INSERT INTO cold_archive_manifest
+                    (user_id, month, path, sessions_count, completed_sessions, exercises_count,
+                     xp_total, duration_total, size_bytes, archived_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (user_id, month) DO UPDATE SET
+                    path = EXCLUDED.path,
+                    sessions_count = EXCLUDED.sessions_count,
+                    completed_sessions = EXCLUDED.completed_sessions,
+                    exercises_count = EXCLUDED.exercises_count,
+                    xp_total = EXCLUDED.xp_total,
+                    duration_total = EXCLUDED.duration_total,
+                    size_bytes = EXCLUDED.size_bytes,
+                    archived_at = EXCLUDED.archived_at
+            """, (
+                user_id, month, path, len(sessions),
+                sum(1 for s in sessions if s['is_completed']),
+                len(exercises),
+                sum(s['xp_earned'] or 0 for s in sessions),
+                sum(s['duration'] or 0 for s in sessions),
+                size, datetime.utcnow(),
+            ))
+
+            moved_ids = [row['id'] for row in sessions if lower <= row['started_at'] < upper]
+            for start in range(0, len(moved_ids), 500):
+                chunk = moved_ids[start:start + 500]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                # Sai da sincronização antes do DELETE: sem dono em sync_changes o
+                # trigger não grava tombstone (o cliente mantém o histórico arquivado)
+                cursor.execute(f"""
+                    DELETE FROM sync_changes
+                    WHERE table_name = 'workout_exercises' AND row_id IN (
+                        SELECT id FROM workout_exercises
+                        WHERE session_id IN ({placeholders})
+                          AND session_started_at >= %s AND session_started_at < %s
+                    )
+                """, (*chunk, lower, upper))
+                cursor.execute(f"""
+                    DELETE FROM sync_changes
+                    WHERE table_name = 'workout_sessions' AND row_id IN ({placeholders})
+                """, chunk)
+                cursor.execute(f"""
+                    DELETE FROM workout_exercises
+                    WHERE session_id IN ({placeholders}) AND session_started_at >= %s AND session_started_at < %s
+                """, (*chunk, lower, upper))
+                cursor.execute(f"""
+                    DELETE FROM workout_sessions
+                    WHERE id IN ({placeholders}) AND started_at >= %s AND started_at < %s
+                """, (*chunk, lower, upper))
+        return len(moved_ids)
+
+    def archive(self, older_than_days: int = None, limit: int = None) -> Dict[str, int]:
+        moved = months = 0
+        for user_id, month in self.archivable_months(older_than_days, limit):
+            moved += self.archive_month(user_id, month)
+            months += 1
+        return {"months": months, "sessions": moved}
+
+    # Leitura
+
+    def _manifest(self, user_id: int, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            cursor.execute("""
+                SELECT month, path FROM cold_archive_manifest
+                WHERE user_id = %s AND month >= %s AND month < %s
+                ORDER BY month
+            """, (user_id, month_start(start) if start else date(1970, 1, 1), end or date(9999, 1, 1)))
+            return cursor.fetchall()
+
+    def _cold_sessions(self, user_id: int, start: Optional[datetime], end: Optional[datetime]) -> Iterator[Dict]:
+        for entry in self._manifest(user_id, start.date() if start else None, end.date() + timedelta(days=1) if end else None):
+            with self.store.open(entry['path']) as cold:
+                sessions = list(cold.scan("sessions", where=("started_at", start, end)))
+                if not sessions:
+                    continue
+                ids = {s['id'] for s in sessions}
+                by_session: Dict[int, List[Dict]] = {}
+                for exercise in cold.scan("exercises"):
+                    if exercise['session_id'] in ids:
+                        by_session.setdefault(exercise['session_id'], []).append(exercise)
+            for session in sessions:
+                yield dict(session, user_id=user_id, archived=True, exercises=by_session.get(session['id'], []))
+
+    def _hot_sessions(self, user_id: int, start: Optional[datetime], end: Optional[datetime]) -> List[Dict]:
+        start = start or datetime(1970, 1, 1)
+        end = end or datetime(9999, 1, 1)
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            cursor.execute(f"""
+                SELECT {SESSION_COLUMNS} FROM workout_sessions
+                WHERE user_id = %s AND started_at >= %s AND started_at < %s
+                ORDER BY started_at
+            """, (user_id, start, end))
+            sessions = [normalize_row(row) for row in cursor.fetchall()]
+            if not sessions:
+                return []
+            cursor.execute(f"""
+                SELECT {', '.join('we.' + name for name, _ in EXERCISE_SCHEMA)}
+                FROM workout_exercises we
+                JOIN workout_sessions ws ON ws.id = we.session_id
+                WHERE ws.user_id = %s AND ws.started_at >= %s AND ws.started_at < %s
+                  AND we.session_started_at >= %s AND we.session_started_at < %s
+                ORDER BY we.id
+            """, (user_id, start, end, start, end))
+            by_session: Dict[int, List[Dict]] = {}
+            for row in cursor.fetchall():
+                by_session.setdefault(row['session_id'], []).append(normalize_row(row))
+        return [dict(s, user_id=user_id, archived=False, exercises=by_session.get(s['id'], [])) for s in sessions]
+
+    def get_history(self, user_id: int, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Sessões (com exercícios) do período, das duas camadas, por data"""
+        hot = self._hot_sessions(user_id, start, end)
+        hot_ids = {s['id'] for s in hot}
+        cold = [s for s in self._cold_sessions(user_id, start, end) if s['id'] not in hot_ids]
+        return sorted(cold + hot, key=lambda s: s['started_at'])
+
+    def iter_export(self, user_id: int) -> Iterator[Dict[str, Any]]:
+        """Todo o histórico, mês a mês, sem carregar tudo em memória"""
+        months = {_as_date(entry['month']) for entry in self._manifest(user_id)}
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            # ORDER BY/LIMIT em vez de MIN/MAX: usa o índice e mantém o tipo da coluna no SQLite
+            bounds = []
+            for order in ("ASC", "DESC"):
+                cursor.execute(f"""
+                    SELECT started_at FROM workout_sessions WHERE user_id = %s
+                    ORDER BY started_at {order} LIMIT 1
+                """, (user_id,))
+                row = cursor.fetchone()
+                if row:
+                    bounds.append(row['started_at'])
+        if bounds:
+            month, last = month_start(bounds[0].date()), month_start(bounds[1].date())
+            while month <= last:
+                months.add(month)
+                month = add_months(month, 1)
+
+        for month in sorted(months):
+            lower = datetime.combine(month, datetime.min.time())
+            upper = datetime.combine(add_months(month, 1), datetime.min.time())
+            yield from self.get_history(user_id, lower, upper)
+
+    def lifetime_totals(self, user_id: int) -> Dict[str, int]:
+        """Totais vitalícios: banco + manifesto (sem abrir arquivos)"""
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            cursor.execute("""
+                SELECT COUNT(*) AS sessions,
+                       COALESCE(SUM(CASE WHEN is_completed THEN 1 ELSE 0 END), 0) AS completed_sessions,
+                       COALESCE(SUM(xp_earned), 0) AS xp,
+                       COALESCE(SUM(duration), 0) AS duration
+                FROM workout_sessions WHERE user_id = %s
+            """, (user_id,))
+            hot = cursor.fetchone()
+            cursor.execute("""
+                SELECT COALESCE(SUM(sessions_count), 0) AS sessions,
+                       COALESCE(SUM(completed_sessions), 0) AS completed_sessions,
+                       COALESCE(SUM(xp_total), 0) AS xp,
+                       COALESCE(SUM(duration_total), 0) AS duration
+                FROM cold_archive_manifest WHERE user_id = %s
+            """, (user_id,))
+            cold = cursor.fetchone()
+        return {key: int(hot[key]) + int(cold[key]) for key in ("sessions", "completed_sessions", "xp", "duration")}
@@ -0,0 +1,169 @@
+"""Tarefas periódicas registradas no agendador da aplicação.
+
+Tarefas de cluster (executadas uma vez, pelo líder): encerrar sessões
+abandonadas, reconciliar os rollups dos usuários ativos no dia, manter as
+partições mensais, arquivar o histórico frio e limpar o outbox, as chaves
+de idempotência vencidas, os tombstones da sincronização e o histórico do
+próprio agendador. Tarefas locais (em cada worker): limpar o cache de
+consultas, checar as réplicas e aquecer o cache das análises de força.
+
+`SCHEDULER_DISABLED_JOBS` desliga tarefas pelo nome.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from app.application.analytics_service import strength_analytics
+from app.application.event_handlers import outbox_relay
+from app.application.history_service import HistoryService
+from app.application.muscle_volume_service import MuscleVolumeService
+from app.application.records_service import PersonalRecordsService
+from app.application.sync_service import SyncService
+from app.core.config import settings
+from app.infrastructure import partitioning
+from app.infrastructure.database import Database, db
+from app.infrastructure.idempotency import idempotency_store
+from app.infrastructure.scheduler import CronTrigger, IntervalTrigger, Scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def _as_datetime(value):
+    # Agregados (MAX) voltam como texto no SQLite
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def reap_abandoned_sessions(database: Database = db, idle_hours: int = None) -> Dict[str, int]:
+    """Encerra sessões não concluídas e paradas há mais de `idle_hours`.
+
+    Sessões sem nenhuma série feita são apagadas; as demais recebem
+    `completed_at` na última atividade e continuam com `is_completed = FALSE`
+    (sem XP).
+    """
+    idle_hours = settings.SESSION_ABANDON_AFTER_HOURS if idle_hours is None else idle_hours
+    cutoff = datetime.utcnow() - timedelta(hours=idle_hours)
+    with database.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT ws.id, ws.started_at,
+                   MAX(we.updated_at) AS last_activity,
+                   COALESCE(SUM(we.completed_sets), 0) AS completed_sets
+            FROM workout_sessions ws
+            LEFT JOIN workout_exercises we ON we.session_id = ws.id
+            WHERE ws.is_completed = FALSE AND ws.completed_at IS NULL AND ws.started_at < %s
+            GROUP BY ws.id, ws.started_at
+        """, (cutoff,))
+        sessions = []
+        for row in cursor.fetchall():
+            row = dict(row, last_activity=_as_datetime(row['last_activity']))
+            if row['last_activity'] is None or row['last_activity'] < cutoff:
+                sessions.append(row)
+
+        empty = [row['id'] for row in sessions if not row['completed_sets']]
+        if empty:
+            placeholders = ", ".join(["%s"] * len(empty))
+            cursor.execute(f"DELETE FROM workout_exercises WHERE session_id IN ({placeholders})", empty)
+            cursor.execute(f"DELETE FROM workout_sessions WHERE id IN ({placeholders})", empty)
+
+        now = datetime.utcnow()
+        closed = []
+        for row in sessions:
+            if not row['completed_sets']:
+                continue
+            ended_at = row['last_activity'] or row['started_at']
+            closed.append((
+                ended_at, int((ended_at - row['started_at']).total_seconds() / 60), now, row['id'],
+            ))
+        if closed:
+            cursor.executemany("""
+                UPDATE workout_sessions
+                SET completed_at = %s, duration = %s, updated_at = %s
+                WHERE id = %s AND is_completed = FALSE
+            """, closed)
+    return {"deleted": len(empty), "closed": len(closed)}
+
+
+def _active_users(database: Database, since: datetime, limit: int = None) -> List[int]:
+    with database.get_cursor(readonly=True) as cursor:
+        cursor.execute(f"""
+            SELECT user_id, MAX(started_at) AS last_started
+            FROM workout_sessions
+            WHERE started_at >= %s
+            GROUP BY user_id
+            ORDER BY last_started DESC
+            {"LIMIT %s" if limit else ""}
+        """, (since,) + ((limit,) if limit else ()))
+        return [row['user_id'] for row in cursor.fetchall()]
+
+
+def reconcile_rollups(database: Database = db) -> Dict[str, int]:
+    """Recalcula recordes e volume muscular dos usuários que treinaram nas últimas 24 h"""
+    user_ids = _active_users(database, datetime.utcnow() - timedelta(days=1))
+    records = PersonalRecordsService(database)
+    volume = MuscleVolumeService(database)
+    for user_id in user_ids:
+        records.rebuild(user_id)
+        volume.rebuild(user_id)
+    return {"users": len(user_ids)}
+
+
+def maintain_partitions(database: Database = db) -> Dict[str, int]:
+    """Cria as partições dos próximos meses e arquiva as antigas (Postgres particionado)"""
+    if database.dialect != "postgresql" or not settings.DATABASE_PARTITIONING:
+        return {"archived": 0}
+    with database.get_cursor() as cursor:
+        # Mesmo lock do init_tables e do script de particionamento
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('cirqulofit.init_tables'))")
+        if not partitioning.is_partitioned(cursor, "workout_sessions"):
+            return {"archived": 0}
+        partitioning.ensure_partitions(cursor)
+        return {"archived": len(partitioning.archive_partitions(cursor))}
+
+
+def archive_cold_history(database: Database = db) -> Dict[str, int]:
+    return HistoryService(database).archive(limit=settings.SCHEDULER_COLD_ARCHIVE_LIMIT)
+
+
+def prune_scheduler_runs(database: Database = db) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=settings.SCHEDULER_HISTORY_DAYS)
+    with database.get_cursor() as cursor:
+        cursor.execute("DELETE FROM scheduler_runs WHERE started_at < %s", (cutoff,))
+        return cursor.rowcount
+
+
+def warm_strength_analytics(database: Database = db) -> int:
+    """Aquece o cache local das análises para os usuários mais ativos da última semana"""
+    user_ids = _active_users(database, datetime.utcnow() - timedelta(days=7), settings.SCHEDULER_WARM_USERS)
+    return strength_analytics.warm(user_ids)
+
+
+def register_jobs(scheduler: Scheduler, database: Database = db):
+    jobs = [
+        ("reap_abandoned_sessions", lambda: reap_abandoned_sessions(database), IntervalTrigger(900, jitter=60), True),
+        ("reconcile_rollups", lambda: reconcile_rollups(database), CronTrigger("15 3 * * *", jitter=300), True),
+        ("maintain_partitions", lambda: maintain_partitions(database), CronTrigger("0 2 * * *", jitter=300), True),
+        ("prune_scheduler_runs", lambda: prune_scheduler_runs(database), CronTrigger("30 4 * * 0"), True),
+        ("prune_outbox", outbox_relay.prune, CronTrigger("45 4 * * *", jitter=300), True),
+        ("prune_idempotency_keys", idempotency_store.prune, CronTrigger("50 4 * * *", jitter=300), True),
+        ("prune_sync_tombstones", lambda: SyncService(database).prune_tombstones(),
+         CronTrigger("55 4 * * *", jitter=300), True),
+        ("prune_query_cache", database.query_cache.prune, IntervalTrigger(60, jitter=5), False),
+    ]
+    if settings.ANALYTICS_CACHE_TTL_SECONDS > 0 and settings.SCHEDULER_WARM_USERS > 0:
+        jobs.append(("warm_strength_analytics", lambda: warm_strength_analytics(database),
+                     IntervalTrigger(settings.ANALYTICS_CACHE_TTL_SECONDS, jitter=30), False))
+    if settings.SCHEDULER_COLD_ARCHIVE:
+        jobs.append(("archive_cold_history", lambda: archive_cold_history(database),
+                     CronTrigger("0 4 * * *", jitter=300), True))
+    if database.replicas:
+        jobs.append(("check_replicas", database.check_replicas, IntervalTrigger(30, jitter=5), False))
+
+    for name, func, trigger, leader_only in jobs:
+        if name in settings.SCHEDULER_DISABLED_JOBS:
+            logger.info("Tarefa %s desativada por SCHEDULER_DISABLED_JOBS", name)
+            continue
+        scheduler.add_job(name, func, trigger, leader_only=leader_only)
+
+
+# Instância global do agendador
+scheduler = Scheduler(db)
+register_jobs(scheduler)
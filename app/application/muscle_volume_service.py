@@ -0,0 +1,157 @@
+"""Volume semanal por grupo muscular (séries, repetições e tonelagem).
+
+Mantido de forma incremental em `muscle_volume_weekly`, uma linha por
+(usuário, semana ISO, grupo): cada mudança de progresso soma a diferença
+entre a contribuição nova e a anterior do exercício (só exercícios
+concluídos contam). O heatmap lê apenas essas linhas, sem varrer o
+histórico; as semanas já movidas para o arquivo frio continuam na tabela.
+`rebuild` recalcula as semanas ainda presentes no banco.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.domain.muscle_groups import MUSCLE_GROUPS, OTHER, resolve_muscle_group
+from app.infrastructure.database import Database
+
+UPSERT_WEEK = """
+    INSERT INTO muscle_volume_weekly (user_id, week_start, muscle_group, sets, reps, tonnage, exercises, updated_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (user_id, week_start, muscle_group) DO UPDATE SET
+        sets = muscle_volume_weekly.sets + EXCLUDED.sets,
+        reps = muscle_volume_weekly.reps + EXCLUDED.reps,
+        tonnage = muscle_volume_weekly.tonnage + EXCLUDED.tonnage,
+        exercises = muscle_volume_weekly.exercises + EXCLUDED.exercises,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def iso_week_start(value) -> date:
+    """Segunda-feira da semana ISO"""
+    if isinstance(value, datetime):
+        value = value.date()
+    return value - timedelta(days=value.weekday())
+
+
+def contribution(completed_sets: int, is_completed: bool, reps: int, weight) -> Tuple[int, int, float, int]:
+    """(séries, repetições, tonelagem, exercícios) que o exercício soma à semana"""
+    if not is_completed:
+        return 0, 0, 0.0, 0
+    total_reps = completed_sets * reps
+    return completed_sets, total_reps, total_reps * float(weight or 0), 1
+
+
+class MuscleVolumeService:
+    def __init__(self, db: Database):
+        self.db = db
+
+    def apply_change(self, cursor, user_id: int, exercise: Dict, previous_sets: int, was_completed: bool) -> bool:
+        """Soma ao rollup a diferença causada por uma mudança de progresso, na transação do chamador"""
+        before = contribution(previous_sets, was_completed, exercise['reps'], exercise['weight'])
+        after = contribution(exercise['completed_sets'], exercise['is_completed'], exercise['reps'], exercise['weight'])
+        delta = tuple(new - old for new, old in zip(after, before))
+        if not any(delta):
+            return False
+
+        started_at = exercise.get('session_started_at') or exercise.get('created_at') or datetime.utcnow()
+        group = resolve_muscle_group(exercise['exercise_name'], exercise.get('muscle_group'))
+        cursor.execute(UPSERT_WEEK, (
+            user_id, iso_week_start(started_at), group, *delta, datetime.utcnow(),
+        ))
+        return True
+
+    def get_heatmap(self, user_id: int, weeks: int = 12, today: Optional[date] = None) -> Dict:
+        """Matriz grupo x semana das últimas `weeks` semanas, lida só dos rollups"""
+        current = iso_week_start(today or datetime.utcnow().date())
+        week_starts = [current - timedelta(weeks=offset) for offset in range(weeks - 1, -1, -1)]
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            cursor.execute("""
+                SELECT week_start, muscle_group, sets, reps, tonnage
+                FROM muscle_volume_weekly
+                WHERE user_id = %s AND week_start >= %s
+            """, (user_id, week_starts[0]))
+            rows = cursor.fetchall()
+            # Último treino de cada grupo, inclusive fora da janela
+            cursor.execute("""
+                SELECT muscle_group, MAX(week_start) AS last_week
+                FROM muscle_volume_weekly
+                WHERE user_id = %s AND sets > 0
+                GROUP BY muscle_group
+            """, (user_id,))
+            last_trained = {row['muscle_group']: row['last_week'] for row in cursor.fetchall()}
+
+        index = {week: position for position, week in enumerate(week_starts)}
+        groups = list(MUSCLE_GROUPS)
+        if any(row['muscle_group'] == OTHER for row in rows):
+            groups.append(OTHER)
+        cells = {group: {"sets": [0] * weeks, "reps": [0] * weeks, "tonnage": [0.0] * weeks} for group in groups}
+        for row in rows:
+            week = row['week_start']
+            if isinstance(week, str):
+                week = date.fromisoformat(week)
+            position = index.get(week)
+            if position is None or row['muscle_group'] not in cells:
+                continue
+            cell = cells[row['muscle_group']]
+            cell["sets"][position] += row['sets']
+            cell["reps"][position] += row['reps']
+            cell["tonnage"][position] += float(row['tonnage'])
+
+        result = []
+        for group in groups:
+            last_week = last_trained.get(group)
+            if isinstance(last_week, str):
+                last_week = date.fromisoformat(last_week[:10])
+            result.append({
+                "muscle_group": group,
+                "sets": cells[group]["sets"],
+                "reps": cells[group]["reps"],
+                "tonnage": [round(value, 2) for value in cells[group]["tonnage"]],
+                "total_sets": sum(cells[group]["sets"]),
+                "last_trained_week": last_week,
+            })
+        neglected = sorted(
+            (item for item in result if item["muscle_group"] != OTHER and item["total_sets"] == 0),
+            key=lambda item: (item["last_trained_week"] is not None, item["last_trained_week"] or date.min)
+        )
+        return {
+            "weeks": week_starts,
+            "groups": result,
+            "neglected": [item["muscle_group"] for item in neglected],
+        }
+
+    def rebuild(self, user_id: int) -> int:
+        """Recalcula as semanas com exercícios no banco; semanas só no arquivo frio são mantidas"""
+        with self.db.get_cursor(user_id=user_id) as cursor:
+            cursor.execute("""
+                SELECT we.exercise_name, we.muscle_group, we.session_started_at, we.created_at,
+                       we.completed_sets, we.reps, we.weight
+                FROM workout_exercises we
+                JOIN workout_sessions ws ON we.session_id = ws.id
+                WHERE ws.user_id = %s AND we.is_completed = TRUE
+            """, (user_id,))
+            totals: Dict[Tuple[date, str], List] = defaultdict(lambda: [0, 0, 0.0, 0])
+            oldest: Optional[date] = None
+            for row in cursor.fetchall():
+                week = iso_week_start(row['session_started_at'] or row['created_at'])
+                group = resolve_muscle_group(row['exercise_name'], row['muscle_group'])
+                for position, value in enumerate(contribution(row['completed_sets'], True, row['reps'], row['weight'])):
+                    totals[(week, group)][position] += value
+                oldest = week if oldest is None or week < oldest else oldest
+
+            if oldest is None:
+                return 0
+            cursor.execute("DELETE FROM muscle_volume_weekly WHERE user_id = %s AND week_start >= %s",
+                           (user_id, oldest))
+            now = datetime.utcnow()
+            cursor.executemany("""
+                INSERT INTO muscle_volume_weekly (user_id, week_start, muscle_group, sets, reps, tonnage, exercises, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, [(user_id, week, group, *values, now) for (week, group), values in totals.items()])
+            return len(totals)
+
+    def rebuild_all(self) -> int:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("SELECT id FROM users ORDER BY id")
+            user_ids = [row['id'] for row in cursor.fetchall()]
+        return sum(self.rebuild(user_id) for user_id in user_ids)
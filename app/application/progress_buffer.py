@@ -0,0 +1,189 @@
+"""Buffer write-behind para o progresso por série dos exercícios.
+
+O PATCH de progresso é chamado a cada série. No modo write-behind
+(`PROGRESS_WRITE_BEHIND=true`) a atualização é aplicada a um estado em
+memória por exercício e confirmada na hora; atualizações repetidas do mesmo
+exercício são coalescidas e gravadas em lote a cada
+`PROGRESS_FLUSH_INTERVAL_MS` com um único `UPDATE ... FROM (VALUES ...)`.
+
+Durabilidade: flush síncrono quando o buffer atinge
+`PROGRESS_BUFFER_MAX_PENDING`, ao completar a sessão e no shutdown. O UPDATE
+só sobrescreve linhas com `updated_at` mais antigo, então um flush atrasado
+não regride o progresso.
+
+O buffer é por processo: o flush ao completar só enxerga o progresso do
+próprio worker. Por isso o write-behind exige um único worker
+(`WEB_CONCURRENCY=1`; `serve.py` recusa subir com mais).
+"""
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2.extras
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.infrastructure.database import Database, db
+
+logger = logging.getLogger(__name__)
+
+EXERCISE_COLUMNS = (
+    "id, session_id, session_started_at, exercise_name, muscle_group, sets, reps, weight, "
+    "completed_sets, is_completed, created_at, updated_at"
+)
+
+
+class ProgressBuffer:
+    def __init__(self, database: Database, flush_interval_ms: int = None, max_pending: int = None,
+                 cache_size: int = 10_000):
+        self.db = database
+        self.flush_interval = (flush_interval_ms or settings.PROGRESS_FLUSH_INTERVAL_MS) / 1000
+        self.max_pending = max_pending or settings.PROGRESS_BUFFER_MAX_PENDING
+        self.cache_size = cache_size
+        # exercise_id -> linha do exercício + user_id do dono (LRU)
+        self._exercises: "OrderedDict[int, Dict]" = OrderedDict()
+        # exercise_id -> (completed_sets, is_completed, updated_at) ainda não gravado
+        self._pending: Dict[int, Tuple[int, bool, datetime]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _load_exercise(self, exercise_id: int, user_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._exercises.get(exercise_id)
+            if row is not None:
+                self._exercises.move_to_end(exercise_id)
+                return row if row["user_id"] == user_id else None
+
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join('we.' + c.strip() for c in EXERCISE_COLUMNS.split(','))}, ws.user_id
+                FROM workout_exercises we
+                JOIN workout_sessions ws ON we.session_id = ws.id
+                WHERE we.id = %s AND ws.user_id = %s
+            """, (exercise_id, user_id))
+            row = cursor.fetchone()
+        if not row:
+            return None
+
+        row = dict(row)
+        with self._lock:
+            self._exercises[exercise_id] = row
+            if len(self._exercises) > self.cache_size:
+                # Entradas com estado pendente nunca são descartadas
+                for stale in [k for k in self._exercises if k not in self._pending]:
+                    if len(self._exercises) <= self.cache_size:
+                        break
+                    del self._exercises[stale]
+        return row
+
+    def apply(self, exercise_id: int, user_id: int, completed_sets: int) -> Optional[Dict]:
+        """Aplica o progresso em memória e retorna a linha atualizada (None se não for do usuário)"""
+        row = self._load_exercise(exercise_id, user_id)
+        if row is None:
+            return None
+
+        updated_at = datetime.utcnow()
+        is_completed = completed_sets >= row["sets"]
+        with self._lock:
+            previous_sets, was_completed = row["completed_sets"], row["is_completed"]
+            just_completed = is_completed and not was_completed
+            row.update(completed_sets=completed_sets, is_completed=is_completed, updated_at=updated_at)
+            self._pending[exercise_id] = (completed_sets, is_completed, updated_at)
+            snapshot = dict(row, just_completed=just_completed,
+                            previous_sets=previous_sets, was_completed=was_completed)
+            full = len(self._pending) >= self.max_pending
+
+        if full:
+            self.flush()
+        return snapshot
+
+    def overlay(self, rows: List[Dict]) -> List[Dict]:
+        """Aplica o estado pendente sobre linhas lidas do banco"""
+        with self._lock:
+            if not self._pending:
+                return rows
+            result = []
+            for row in rows:
+                pending = self._pending.get(row["id"])
+                if pending:
+                    row = dict(row)
+                    row["completed_sets"], row["is_completed"], row["updated_at"] = pending
+                result.append(row)
+            return result
+
+    def flush(self, session_id: Optional[int] = None) -> int:
+        """Grava o estado pendente (de todas as sessões ou de uma) em um único UPDATE"""
+        with self._flush_lock:
+            with self._lock:
+                if session_id is None:
+                    batch = self._pending
+                    self._pending = {}
+                else:
+                    batch = {
+                        exercise_id: state for exercise_id, state in self._pending.items()
+                        if self._exercises.get(exercise_id, {}).get("session_id") == session_id
+                    }
+                    for exercise_id in batch:
+                        del self._pending[exercise_id]
+            if not batch:
+                return 0
+
+            try:
+                self._write(batch)
+            except Exception:
+                with self._lock:
+                    # Devolve ao buffer o que não foi sobrescrito por atualização mais nova
+                    for exercise_id, state in batch.items():
+                        self._pending.setdefault(exercise_id, state)
+                raise
+            return len(batch)
+
+    def _write(self, batch: Dict[int, Tuple[int, bool, datetime]]):
+        values = [(exercise_id, *state) for exercise_id, state in batch.items()]
+        with self.db.get_cursor() as cursor:
+            if self.db.dialect == "postgresql":
+                psycopg2.extras.execute_values(cursor, """
+                    UPDATE workout_exercises AS we
+                    SET completed_sets = v.completed_sets, is_completed = v.is_completed, updated_at = v.updated_at
+                    FROM (VALUES %s) AS v(id, completed_sets, is_completed, updated_at)
+                    WHERE we.id = v.id AND (we.updated_at IS NULL OR we.updated_at <= v.updated_at)
+                """, values, template="(%s::integer, %s::integer, %s::boolean, %s::timestamp)")
+            else:
+                cursor.executemany("""
+                    UPDATE workout_exercises
+                    SET completed_sets = %s, is_completed = %s, updated_at = %s
+                    WHERE id = %s AND (updated_at IS NULL OR updated_at <= %s)
+                """, [(sets, completed, at, exercise_id, at) for exercise_id, sets, completed, at in values])
+
+    def forget_session(self, session_id: int):
+        """Remove do cache os exercícios de uma sessão encerrada (já gravados)"""
+        with self._lock:
+            for exercise_id in [k for k, row in self._exercises.items()
+                                if row["session_id"] == session_id and k not in self._pending]:
+                del self._exercises[exercise_id]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception as e:
+                logger.warning("Falha no flush do progresso (%s); nova tentativa no próximo ciclo", e)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await run_in_threadpool(self.flush)
+
+
+# Instância global do buffer
+progress_buffer = ProgressBuffer(db)
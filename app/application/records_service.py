@@ -0,0 +1,129 @@
+"""Índice de recordes pessoais por (usuário, exercício, faixa de repetições).
+
+Mantido de forma incremental: quando um exercício passa a concluído, um único
+upsert compara carga e volume com o recorde da faixa e só grava se houver
+melhora. A checagem de "novo PR" vira a leitura de uma linha, sem varrer o
+histórico. `rebuild` recalcula o índice a partir do histórico completo
+(banco + arquivo frio) para corrigir divergências ou popular bancos antigos.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.application.analytics_service import REP_RANGES, StrengthAnalyticsService
+from app.infrastructure.database import Database
+
+
+def rep_bucket(reps: int) -> str:
+    for label, low, high in REP_RANGES:
+        if low <= reps <= high:
+            return label
+    return REP_RANGES[0][0]
+
+
+UPSERT_RECORD = """
+    INSERT INTO personal_records
+        (user_id, exercise_name, rep_bucket, best_weight, best_weight_reps, best_weight_at,
+         best_volume, best_volume_at, exercise_id, updated_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (user_id, exercise_name, rep_bucket) DO UPDATE SET
+        best_weight_reps = CASE WHEN EXCLUDED.best_weight > personal_records.best_weight
+                                THEN EXCLUDED.best_weight_reps ELSE personal_records.best_weight_reps END,
+        best_weight_at = CASE WHEN EXCLUDED.best_weight > personal_records.best_weight
+                              THEN EXCLUDED.best_weight_at ELSE personal_records.best_weight_at END,
+        best_weight = GREATEST(personal_records.best_weight, EXCLUDED.best_weight),
+        best_volume_at = CASE WHEN EXCLUDED.best_volume > personal_records.best_volume
+                              THEN EXCLUDED.best_volume_at ELSE personal_records.best_volume_at END,
+        best_volume = GREATEST(personal_records.best_volume, EXCLUDED.best_volume),
+        exercise_id = EXCLUDED.exercise_id,
+        updated_at = EXCLUDED.updated_at
+    WHERE EXCLUDED.best_weight > personal_records.best_weight
+       OR EXCLUDED.best_volume > personal_records.best_volume
+    RETURNING id
+"""
+
+
+class PersonalRecordsService:
+    def __init__(self, db: Database):
+        self.db = db
+
+    def record(self, cursor, user_id: int, exercise: Dict, achieved_at: Optional[datetime] = None) -> bool:
+        """Registra um exercício concluído na transação do chamador; True se bateu um recorde anterior"""
+        weight = float(exercise['weight'] or 0)
+        volume = exercise['completed_sets'] * exercise['reps'] * weight
+        bucket = rep_bucket(exercise['reps'])
+        achieved_at = achieved_at or datetime.utcnow()
+
+        cursor.execute("""
+            SELECT id FROM personal_records
+            WHERE user_id = %s AND exercise_name = %s AND rep_bucket = %s
+        """, (user_id, exercise['exercise_name'], bucket))
+        had_record = cursor.fetchone() is not None
+
+        cursor.execute(UPSERT_RECORD, (
+            user_id, exercise['exercise_name'], bucket, weight, exercise['reps'], achieved_at,
+            volume, achieved_at, exercise['id'], achieved_at,
+        ))
+        improved = cursor.fetchone() is not None
+        # O primeiro registro de um exercício não é "novo PR": não havia o que bater
+        return had_record and improved
+
+    def get_records(self, user_id: int, exercise_name: Optional[str] = None) -> List[Dict]:
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            if exercise_name:
+                cursor.execute("""
+                    SELECT * FROM personal_records WHERE user_id = %s AND exercise_name = %s
+                    ORDER BY exercise_name, rep_bucket
+                """, (user_id, exercise_name))
+            else:
+                cursor.execute("""
+                    SELECT * FROM personal_records WHERE user_id = %s
+                    ORDER BY exercise_name, rep_bucket
+                """, (user_id,))
+            return cursor.fetchall()
+
+    def rebuild(self, user_id: int) -> int:
+        """Recalcula os recordes do usuário a partir do histórico completo"""
+        history = StrengthAnalyticsService(self.db).load_history(user_id)
+        mask = history["completed"]
+        names = history["exercise"][mask].astype(str)
+        reps = history["reps"][mask]
+        weight = history["weight"][mask]
+        volume = history["sets"][mask] * reps * weight
+        started_at = history["started_at"][mask]
+        exercise_ids = history["id"][mask]
+        buckets = np.array([rep_bucket(int(r)) for r in reps], dtype=object).astype(str)
+
+        rows = []
+        if names.size:
+            keys = np.char.add(np.char.add(names, "\x1f"), buckets)
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            for index in range(unique_keys.size):
+                group = np.flatnonzero(inverse == index)
+                best_weight = group[np.argmax(weight[group])]
+                best_volume = group[np.argmax(volume[group])]
+                name, bucket = str(unique_keys[index]).split("\x1f")
+                rows.append((
+                    user_id, name, bucket,
+                    float(weight[best_weight]), int(reps[best_weight]), started_at[best_weight].astype(datetime),
+                    float(volume[best_volume]), started_at[best_volume].astype(datetime),
+                    int(exercise_ids[best_weight]), datetime.utcnow(),
+                ))
+
+        with self.db.get_cursor(user_id=user_id) as cursor:
+            cursor.execute("DELETE FROM personal_records WHERE user_id = %s", (user_id,))
+            if rows:
+                cursor.executemany("""
+                    INSERT INTO personal_records
+                        (user_id, exercise_name, rep_bucket, best_weight, best_weight_reps, best_weight_at,
+                         best_volume, best_volume_at, exercise_id, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, rows)
+        return len(rows)
+
+    def rebuild_all(self) -> int:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("SELECT id FROM users ORDER BY id")
+            user_ids = [row['id'] for row in cursor.fetchall()]
+        return sum(self.rebuild(user_id) for user_id in user_ids)
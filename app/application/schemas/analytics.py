@@ -0,0 +1,64 @@
+from datetime import date, datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+class RepRangePR(BaseModel):
+    rep_range: str
+    weight: float
+    reps: int
+    date: datetime
+
+class WeeklyVolume(BaseModel):
+    week_start: date
+    tonnage: float
+    rolling_4w: float
+
+class ExerciseAnalytics(BaseModel):
+    exercise_name: str
+    sessions: int
+    best_e1rm_epley: float
+    best_e1rm_brzycki: float
+    current_e1rm: float
+    best_weight: float
+    best_volume: float
+    best_volume_date: Optional[datetime] = None
+    rep_range_prs: List[RepRangePR]
+    weekly: List[WeeklyVolume]
+
+class StrengthAnalytics(BaseModel):
+    user_id: int
+    generated_at: datetime
+    total_sets: int
+    weekly_tonnage: List[WeeklyVolume]
+    exercises: List[ExerciseAnalytics]
+
+class PersonalRecord(BaseModel):
+    exercise_name: str
+    rep_bucket: str
+    best_weight: float
+    best_weight_reps: Optional[int] = None
+    best_weight_at: Optional[datetime] = None
+    best_volume: float
+    best_volume_at: Optional[datetime] = None
+
+class MuscleGroupVolume(BaseModel):
+    muscle_group: str
+    sets: List[int]
+    reps: List[int]
+    tonnage: List[float]
+    total_sets: int
+    last_trained_week: Optional[date] = None
+
+class MuscleHeatmap(BaseModel):
+    weeks: List[date]
+    groups: List[MuscleGroupVolume]
+    neglected: List[str]
+
+class Achievement(BaseModel):
+    code: str
+    title: str
+    description: str
+    progress: float
+    threshold: float
+    unlocked: bool
+    unlocked_at: Optional[datetime] = None
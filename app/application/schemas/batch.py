@@ -0,0 +1,18 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    path: str  # caminho com query string, ex.: /api/workouts/analytics/muscles?weeks=8
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+class BatchItemResult(BaseModel):
+    id: Optional[str] = None
+    path: str
+    status: int
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+class HistoryExercise(BaseModel):
+    id: int
+    exercise_name: str
+    muscle_group: Optional[str] = None
+    sets: int
+    reps: int
+    weight: float = 0.0
+    completed_sets: int = 0
+    is_completed: bool = False
+
+class HistorySession(BaseModel):
+    id: int
+    workout_id: Optional[int] = None
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    duration: Optional[int] = None
+    xp_earned: int = 0
+    is_completed: bool = False
+    archived: bool = False
+    exercises: List[HistoryExercise] = []
+
+class LifetimeTotals(BaseModel):
+    sessions: int
+    completed_sessions: int
+    xp: int
+    duration: int
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 class WorkoutSessionBase(BaseModel):
@@ -27,6 +27,7 @@ class WorkoutExerciseBase(BaseModel):
     sets: int
     reps: int
     weight: float = 0.0
+    muscle_group: Optional[str] = None
 
 class WorkoutExerciseCreate(WorkoutExerciseBase):
     session_id: int
@@ -38,9 +39,40 @@ class WorkoutExerciseResponse(WorkoutExerciseBase):
     is_completed: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    new_pr: bool = False
 
     class Config:
         from_attributes = True
 
 class ExerciseProgressUpdate(BaseModel):
     completed_sets: int
+
+# Upload em lote de sessões gravadas offline (ids gerados pelo cliente)
+
+class ExerciseUpload(WorkoutExerciseBase):
+    client_id: str
+    completed_sets: int = 0
+    completed_at: Optional[datetime] = None
+
+class SessionUpload(BaseModel):
+    client_id: str
+    workout_id: int
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    exercises: List[ExerciseUpload] = []
+
+class SessionBatchUpload(BaseModel):
+    sessions: List[SessionUpload]
+
+class ExerciseUploadResponse(WorkoutExerciseResponse):
+    client_id: str
+
+class SessionUploadResult(BaseModel):
+    client_id: str
+    status: str  # created | duplicate | conflict | error
+    session: Optional[WorkoutSessionResponse] = None
+    exercises: List[ExerciseUploadResponse] = []
+    error: Optional[str] = None
+
+class SessionBatchResponse(BaseModel):
+    results: List[SessionUploadResult]
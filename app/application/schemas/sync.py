@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+from app.application.schemas.workout import WorkoutResponse
+from app.application.schemas.session import WorkoutSessionResponse, WorkoutExerciseResponse
+
+class SyncDashboard(BaseModel):
+    id: int
+    weekly_goal: int
+    total_sessions: int
+    completion_rate: float
+    streak_days: int
+    updated_at: Optional[datetime] = None
+
+class SyncTombstone(BaseModel):
+    table: str
+    id: int
+
+class SyncChanges(BaseModel):
+    cursor: str
+    has_more: bool
+    reset: bool
+    workouts: List[WorkoutResponse]
+    sessions: List[WorkoutSessionResponse]
+    exercises: List[WorkoutExerciseResponse]
+    dashboard: List[SyncDashboard]
+    deleted: List[SyncTombstone]
@@ -0,0 +1,131 @@
+"""Sincronização incremental: o que mudou para o usuário desde o cursor.
+
+O cursor é opaco para o cliente (codifica o último `change_seq` entregue).
+Sem cursor, ou com `reset`, a resposta é um snapshot completo paginado, sem
+tombstones; o cliente descarta o que tinha e aplica as páginas. Com cursor,
+vêm só as linhas criadas ou alteradas depois dele e os ids apagados.
+
+As linhas são lidas depois de `sync_changes`: uma mudança que chegue entre
+as duas leituras pode vir antes do tempo e se repetir na próxima página,
+nunca se perder. O cliente aplica tudo como upsert por id.
+"""
+import base64
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.infrastructure.change_tracking import TABLES
+from app.infrastructure.database import Database
+
+# Chave da resposta e colunas devolvidas de cada tabela rastreada
+_ROWS = {
+    "workouts": ("workouts", """
+        SELECT id, user_id, name, description, category, level, duration, exercises_count, xp_reward,
+               is_active, created_at, updated_at
+        FROM workouts WHERE user_id = %s AND id IN ({ids})
+    """),
+    "workout_sessions": ("sessions", """
+        SELECT id, user_id, workout_id, started_at, completed_at, duration, xp_earned, is_completed,
+               created_at, updated_at
+        FROM workout_sessions WHERE user_id = %s AND id IN ({ids})
+    """),
+    "workout_exercises": ("exercises", """
+        SELECT we.id, we.session_id, we.exercise_name, we.muscle_group, we.sets, we.reps, we.weight,
+               we.completed_sets, we.is_completed, we.created_at, we.updated_at
+        FROM workout_exercises we JOIN workout_sessions ws ON ws.id = we.session_id
+        WHERE ws.user_id = %s AND we.id IN ({ids})
+    """),
+    "dashboard_data": ("dashboard", """
+        SELECT id, weekly_goal, total_sessions, completion_rate, streak_days, updated_at
+        FROM dashboard_data WHERE user_id = %s AND id IN ({ids})
+    """),
+}
+
+
+class SyncService:
+    def __init__(self, db: Database):
+        self.db = db
+
+    @staticmethod
+    def encode_cursor(user_id: int, seq: int) -> str:
+        return base64.urlsafe_b64encode(f"v1:{user_id}:{seq}".encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, user_id: int) -> int:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            version, owner, seq = raw.split(":")
+            if version != "v1" or int(owner) != user_id or int(seq) < 0:
+                raise ValueError
+            return int(seq)
+        except ValueError:
+            raise ValueError("Cursor inválido")
+
+    def get_changes(self, user_id: int, cursor: Optional[str] = None, limit: int = None) -> Dict:
+        """Uma página de mudanças desde o cursor, em ordem de `change_seq`"""
+        limit = limit or settings.SYNC_PAGE_SIZE
+        since = self.decode_cursor(cursor, user_id) if cursor else 0
+
+        with self.db.get_cursor(readonly=True, user_id=user_id) as db_cursor:
+            db_cursor.execute("""
+                SELECT seq, pruned_seq FROM sync_sequences WHERE user_id = %s
+            """, (user_id,))
+            state = db_cursor.fetchone()
+            # Tombstones do intervalo já limpos (ou cursor de outro banco): recomeça do zero
+            reset = since > 0 and (state is None or since < state['pruned_seq'] or since > state['seq'])
+            if reset:
+                since = 0
+
+            db_cursor.execute("""
+                SELECT table_name, row_id, change_seq, deleted FROM sync_changes
+                WHERE user_id = %s AND change_seq > %s
+                ORDER BY change_seq
+                LIMIT %s
+            """, (user_id, since, limit + 1))
+            changes = db_cursor.fetchall()
+            has_more = len(changes) > limit
+            changes = changes[:limit]
+
+            result = {key: [] for key, _ in _ROWS.values()}
+            deleted = []
+            pending = defaultdict(list)
+            for change in changes:
+                if not change['deleted']:
+                    pending[change['table_name']].append(change['row_id'])
+                elif since:
+                    deleted.append({"table": change['table_name'], "id": change['row_id']})
+
+            for table in TABLES:
+                row_ids = pending.get(table)
+                if not row_ids:
+                    continue
+                key, query = _ROWS[table]
+                db_cursor.execute(
+                    query.format(ids=", ".join(["%s"] * len(row_ids))), (user_id, *row_ids)
+                )
+                position = {row_id: index for index, row_id in enumerate(row_ids)}
+                result[key] = sorted(db_cursor.fetchall(), key=lambda row: position[row['id']])
+
+        result.update(
+            deleted=deleted,
+            reset=reset,
+            has_more=has_more,
+            cursor=self.encode_cursor(user_id, changes[-1]['change_seq'] if changes else since),
+        )
+        return result
+
+    def prune_tombstones(self, days: int = None) -> Dict[str, int]:
+        """Apaga tombstones antigos; cursores anteriores a eles passam a receber `reset`"""
+        days = settings.SYNC_TOMBSTONE_RETENTION_DAYS if days is None else days
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE sync_sequences SET pruned_seq = (
+                    SELECT MAX(change_seq) FROM sync_changes c
+                    WHERE c.user_id = sync_sequences.user_id AND c.deleted = TRUE AND c.changed_at < %s
+                )
+                WHERE user_id IN (SELECT user_id FROM sync_changes WHERE deleted = TRUE AND changed_at < %s)
+            """, (cutoff, cutoff))
+            cursor.execute("DELETE FROM sync_changes WHERE deleted = TRUE AND changed_at < %s", (cutoff,))
+            return {"tombstones": cursor.rowcount}
@@ -5,6 +5,9 @@ from app.application.schemas.workout import (
     WorkoutCreate, WorkoutSessionCreate, WorkoutExerciseCreate,
     UserProgressCreate, WeeklyProgressResponse, WorkoutStatsResponse
 )
+from app.application.achievements_service import AchievementsService
+from app.application.event_handlers import outbox_relay
+from app.domain.events import SessionCompleted
 from app.infrastructure.database import Database
 
 class WorkoutService:
@@ -13,7 +16,7 @@ class WorkoutService:
 
     def create_workout(self, user_id: int, workout_data: WorkoutCreate) -> Workout:
         """Criar um novo treino"""
-        with self.db.get_cursor() as cursor:
+        with self.db.get_cursor(user_id=user_id) as cursor:
             cursor.execute("""
                 INSERT INTO workouts (user_id, name, description, category, level, duration, exercises_count, xp_reward)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
@@ -40,7 +43,7 @@ class WorkoutService:
 
     def get_user_workouts(self, user_id: int, level: Optional[int] = None) -> List[Workout]:
         """Buscar treinos do usuário"""
-        with self.db.get_cursor() as cursor:
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
             if level:
                 cursor.execute("""
                     SELECT * FROM workouts 
@@ -74,7 +77,7 @@ class WorkoutService:
 
     def start_workout_session(self, user_id: int, session_data: WorkoutSessionCreate) -> WorkoutSession:
         """Iniciar uma sessão de treino"""
-        with self.db.get_cursor() as cursor:
+        with self.db.get_cursor(user_id=user_id) as cursor:
             started_at = session_data.started_at or datetime.utcnow()
             cursor.execute("""
                 INSERT INTO workout_sessions (user_id, workout_id, started_at, duration, xp_earned, is_completed)
@@ -98,7 +101,7 @@ class WorkoutService:
 
     def complete_workout_session(self, session_id: int, user_id: int) -> WorkoutSession:
         """Completar uma sessão de treino"""
-        with self.db.get_cursor() as cursor:
+        with self.db.get_cursor(user_id=user_id) as cursor:
             completed_at = datetime.utcnow()
             
             # Buscar sessão atual
@@ -117,6 +120,11 @@ class WorkoutService:
             # Calcular XP (base + duração)
             xp_earned = 10 + (duration * 2) + 50  # 10 base + 2 por minuto + 50 por completar
             
+            cursor.execute("""
+                SELECT COUNT(*) FROM workout_exercises WHERE session_id = %s AND session_started_at = %s
+            """, (session_id, session['started_at']))
+            exercise_count = cursor.fetchone()['count']
+
             # Atualizar sessão
             cursor.execute("""
                 UPDATE workout_sessions 
@@ -124,8 +132,13 @@ class WorkoutService:
                 WHERE id = %s
             """, (completed_at, duration, xp_earned, session_id))
             
-            # Atualizar progresso do usuário
-            self._update_user_progress(user_id, xp_earned)
+            # Progresso do usuário é atualizado pelo handler do evento, fora da requisição
+            # (uma vez por sessão)
+            if not session['is_completed']:
+                outbox_relay.publish(cursor, SessionCompleted(
+                    user_id, session_id, session['workout_id'], session['started_at'], completed_at,
+                    duration, xp_earned, exercise_count
+                ))
             
             return WorkoutSession(
                 id=session_id,
@@ -142,11 +155,11 @@ class WorkoutService:
         """Adicionar exercício à sessão"""
         with self.db.get_cursor() as cursor:
             cursor.execute("""
-                INSERT INTO workout_exercises (session_id, exercise_name, sets, reps, weight, completed_sets, is_completed)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                INSERT INTO workout_exercises (session_id, session_started_at, exercise_name, sets, reps, weight, completed_sets, is_completed)
+                VALUES (%s, (SELECT started_at FROM workout_sessions WHERE id = %s), %s, %s, %s, %s, %s, %s)
                 RETURNING id
             """, (
-                session_id, exercise_data.exercise_name, exercise_data.sets, exercise_data.reps,
+                session_id, session_id, exercise_data.exercise_name, exercise_data.sets, exercise_data.reps,
                 exercise_data.weight, exercise_data.completed_sets, exercise_data.is_completed
             ))
             result = cursor.fetchone()
@@ -196,13 +209,13 @@ class WorkoutService:
 
     def get_user_progress(self, user_id: int) -> UserProgress:
         """Buscar progresso do usuário"""
-        with self.db.get_cursor() as cursor:
+        with self.db.get_cursor(user_id=user_id) as cursor:
             cursor.execute("""
                 SELECT * FROM user_progress 
                 WHERE user_id = %s 
                 ORDER BY date DESC 
                 LIMIT 1
-            """, (user_id,))
+            """, (user_id,), cache=True)
             result = cursor.fetchone()
             
             if not result:
@@ -232,7 +245,7 @@ class WorkoutService:
         week_start = today - timedelta(days=today.weekday())
         week_end = week_start + timedelta(days=6)
         
-        with self.db.get_cursor() as cursor:
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
             # Buscar sessões da semana
             cursor.execute("""
                 SELECT * FROM workout_sessions 
@@ -272,6 +285,9 @@ class WorkoutService:
         
         # Calcular progresso do nível (cada nível = 5 treinos)
         level_progress = (progress.total_workouts % 5) / 5 * 100
+
+        with self.db.get_cursor(readonly=True, user_id=user_id) as cursor:
+            achievements_unlocked = AchievementsService(self.db).count_unlocked(cursor, user_id)
         
         return WorkoutStatsResponse(
             total_workouts=progress.total_workouts,
@@ -281,40 +297,5 @@ class WorkoutService:
             longest_streak=progress.longest_streak,
             level=progress.level,
             level_progress=level_progress,
-            achievements_unlocked=0
+            achievements_unlocked=achievements_unlocked
         )
-    
-    def _update_user_progress(self, user_id: int, xp_earned: int):
-        """Atualizar progresso do usuário"""
-        with self.db.get_cursor() as cursor:
-            # Buscar progresso atual
-            cursor.execute("""
-                SELECT * FROM user_progress 
-                WHERE user_id = %s 
-                ORDER BY date DESC 
-                LIMIT 1
-            """, (user_id,))
-            progress = cursor.fetchone()
-            
-            if not progress:
-                # Criar progresso inicial
-                cursor.execute("""
-                    INSERT INTO user_progress (user_id, date, total_workouts, total_exercises, total_xp, current_streak, longest_streak, level)
-                    VALUES (%s, %s, 1, 0, %s, 1, 1, 1)
-                """, (user_id, datetime.utcnow(), xp_earned))
-            else:
-                # Atualizar progresso
-                new_total_workouts = progress['total_workouts'] + 1
-                new_total_xp = progress['total_xp'] + xp_earned
-                new_current_streak = progress['current_streak'] + 1
-                new_longest_streak = max(progress['longest_streak'], new_current_streak)
-                new_level = (new_total_workouts // 5) + 1
-                
-                cursor.execute("""
-                    UPDATE user_progress 
-                    SET total_workouts = %s, total_xp = %s, current_streak = %s, 
-                        longest_streak = %s, level = %s, date = %s
-                    WHERE id = %s
-                """, (new_total_workouts, new_total_xp, new_current_streak, 
-                      new_longest_streak, new_level, datetime.utcnow(), progress['id']))
-
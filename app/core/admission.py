@@ -0,0 +1,135 @@
+"""Controle de admissão (load shedding) por prioridade de rota.
+
+Sinais de sobrecarga:
+- requisições em andamento no worker
+- atraso do event loop (medido por uma tarefa que dorme em intervalos fixos)
+- threads esperando conexão no pool do banco
+
+Quando algum sinal passa do limite, rotas de baixa prioridade (GIFs,
+estatísticas) recebem 503 com Retry-After imediatamente. Rotas normais só
+são recusadas acima do dobro do limite; rotas críticas (escritas de sessão,
+autenticação, health) são sempre admitidas.
+"""
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class AdmissionController:
+    def __init__(self, pool_stats: Optional[Callable[[], Dict[str, int]]] = None):
+        self.pool_stats = pool_stats or (lambda: {"waiting": 0})
+        self.in_flight = 0
+        self.loop_lag_ms = 0.0
+        self.shed: Counter = Counter()
+        self._monitor: Optional[asyncio.Task] = None
+
+    def priority(self, path: str, method: str) -> str:
+        if any(path.startswith(prefix) for prefix in settings.ADMISSION_CRITICAL_PREFIXES):
+            return CRITICAL
+        if method not in READ_METHODS and any(
+            path.startswith(prefix) for prefix in settings.ADMISSION_CRITICAL_WRITE_PREFIXES
+        ):
+            return CRITICAL
+        if any(path.startswith(prefix) for prefix in settings.ADMISSION_LOW_PRIORITY_PREFIXES):
+            return LOW
+        return NORMAL
+
+    def load(self) -> Dict[str, float]:
+        """Razão entre cada sinal e seu limite (> 1 = sobrecarregado)"""
+        return {
+            "in_flight": self.in_flight / settings.ADMISSION_MAX_IN_FLIGHT,
+            "loop_lag": self.loop_lag_ms / settings.ADMISSION_MAX_LOOP_LAG_MS,
+            "pool_waiters": self.pool_stats().get("waiting", 0) / settings.ADMISSION_MAX_POOL_WAITERS,
+        }
+
+    def admit(self, priority: str) -> bool:
+        if priority == CRITICAL or not settings.ADMISSION_ENABLED:
+            return True
+        worst = max(self.load().values())
+        limit = 1.0 if priority == LOW else 2.0
+        if worst > limit:
+            self.shed[priority] += 1
+            return False
+        return True
+
+    def snapshot(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "loop_lag_ms": round(self.loop_lag_ms, 1),
+            "pool": self.pool_stats(),
+            "shed": dict(self.shed),
+        }
+
+    async def _measure_loop_lag(self, interval: float = 0.1):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, (time.perf_counter() - started - interval) * 1000)
+            # Média móvel exponencial para não reagir a um único pico
+            self.loop_lag_ms = 0.7 * self.loop_lag_ms + 0.3 * lag
+
+    def start(self):
+        if self._monitor is None:
+            self._monitor = asyncio.get_running_loop().create_task(self._measure_loop_lag())
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI que aplica o AdmissionController às requisições HTTP"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.controller.priority(scope["path"], scope["method"])
+        if not self.controller.admit(priority):
+            body = json.dumps({"detail": "Servidor sobrecarregado, tente novamente"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        self.controller.in_flight += 1
+        counted = True
+
+        async def send_wrapper(message):
+            nonlocal counted
+            if message["type"] == "http.response.start" and counted:
+                headers = dict(message.get("headers", []))
+                if headers.get(b"content-type", b"").startswith(b"text/event-stream"):
+                    # Streams longos (SSE) não contam como carga em andamento
+                    self.controller.in_flight -= 1
+                    counted = False
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if counted:
+                self.controller.in_flight -= 1
@@ -5,9 +5,28 @@ load_dotenv()
 
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "postgresql://cirqulofit_user:cirqulofit_password@db:5432/cirqulofit")
+    # Réplicas de leitura (URLs separadas por vírgula) e pool de conexões
+    DATABASE_REPLICA_URLS: list = [u for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u]
+    DATABASE_POOL_MIN_SIZE: int = int(os.getenv("DATABASE_POOL_MIN_SIZE", "1"))
+    DATABASE_POOL_MAX_SIZE: int = int(os.getenv("DATABASE_POOL_MAX_SIZE", "10"))
+    DATABASE_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DATABASE_POOL_TIMEOUT_SECONDS", "10"))
+    # Orçamento de conexões do servidor (max_connections do Postgres) e a parte
+    # reservada a superusuário, migrações e outros clientes; o serve.py dimensiona os workers por ele
+    DATABASE_MAX_CONNECTIONS: int = int(os.getenv("DATABASE_MAX_CONNECTIONS", "100"))
+    DATABASE_RESERVED_CONNECTIONS: int = int(os.getenv("DATABASE_RESERVED_CONNECTIONS", "10"))
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    REPLICA_RETRY_SECONDS: float = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+
+    # Política de hash de senhas (calibrar com python -m scripts.calibrate_password_hash)
+    PASSWORD_HASH_SCHEME: str = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")  # bcrypt | argon2
+    PASSWORD_BCRYPT_ROUNDS: int = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+    PASSWORD_ARGON2_TIME_COST: int = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+    PASSWORD_ARGON2_MEMORY_KIB: int = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", "65536"))
+    PASSWORD_ARGON2_PARALLELISM: int = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "1"))
     
     # GIPHY API para GIFs de exercícios
     GIPHY_API_KEY: str = os.getenv("GIPHY_API_KEY", "your-giphy-api-key")
@@ -16,6 +35,112 @@ class Settings:
     # CORS Configuration
     ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000").split(",")
     
+    # Startup: espera máxima pelo banco antes de subir sem ele (retry em segundo plano)
+    STARTUP_DB_WAIT_SECONDS: float = float(os.getenv("STARTUP_DB_WAIT_SECONDS", "5"))
+    STARTUP_RETRY_INITIAL_SECONDS: float = float(os.getenv("STARTUP_RETRY_INITIAL_SECONDS", "0.5"))
+    STARTUP_RETRY_MAX_SECONDS: float = float(os.getenv("STARTUP_RETRY_MAX_SECONDS", "30"))
+
+    # Controle de admissão: limites a partir dos quais rotas de baixa prioridade recebem 503
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+    ADMISSION_MAX_LOOP_LAG_MS: float = float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "50"))
+    ADMISSION_MAX_POOL_WAITERS: int = int(os.getenv("ADMISSION_MAX_POOL_WAITERS", "5"))
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+    ADMISSION_CRITICAL_PREFIXES: list = os.getenv(
+        "ADMISSION_CRITICAL_PREFIXES", "/health,/api/auth"
+    ).split(",")
+    # Críticas só para escritas (POST/PUT/PATCH/DELETE); leituras são normais
+    ADMISSION_CRITICAL_WRITE_PREFIXES: list = os.getenv(
+        "ADMISSION_CRITICAL_WRITE_PREFIXES", "/api/workouts/sessions"
+    ).split(",")
+    ADMISSION_LOW_PRIORITY_PREFIXES: list = os.getenv(
+        "ADMISSION_LOW_PRIORITY_PREFIXES", "/api/gifs,/api/workouts/stats,/api/workouts/progress"
+    ).split(",")
+    READINESS_TIMEOUT_SECONDS: float = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+
+    # Particionamento mensal de sessões/exercícios (apenas Postgres)
+    DATABASE_PARTITIONING: bool = os.getenv("DATABASE_PARTITIONING", "false").lower() == "true"
+    PARTITION_PREMAKE_MONTHS: int = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+    PARTITION_ARCHIVE_AFTER_MONTHS: int = int(os.getenv("PARTITION_ARCHIVE_AFTER_MONTHS", "24"))
+    PARTITION_ARCHIVE_SCHEMA: str = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")
+
+    # Camada fria do histórico (arquivos colunares por usuário/mês)
+    COLD_STORAGE_DIR: str = os.getenv("COLD_STORAGE_DIR", "./cold_storage")
+    COLD_ARCHIVE_AFTER_DAYS: int = int(os.getenv("COLD_ARCHIVE_AFTER_DAYS", "365"))
+
+    # Cache das análises de força por usuário
+    ANALYTICS_CACHE_TTL_SECONDS: float = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+
+    # Cache de resultados de consultas marcadas com cache=True (por processo)
+    QUERY_CACHE_ENABLED: bool = os.getenv("QUERY_CACHE_ENABLED", "false").lower() == "true"
+    QUERY_CACHE_MAX_ENTRIES: int = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "5000"))
+    QUERY_CACHE_MAX_ROWS: int = int(os.getenv("QUERY_CACHE_MAX_ROWS", "500"))
+    QUERY_CACHE_TTL_SECONDS: float = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "30"))
+
+    # Tempo máximo por consulta (statement_timeout) por prefixo de rota, em ms; "" desliga
+    QUERY_BUDGETS: dict = {
+        prefix.strip(): int(ms)
+        for prefix, ms in (
+            item.split("=", 1) for item in os.getenv(
+                "QUERY_BUDGETS",
+                "/api/auth=200,/api/users=500,/api/workouts/analytics=2000,/api/workouts/history=5000,"
+                "/api/workouts/dashboard=1000,/api/workouts/stats=1000,/api/workouts=1000"
+            ).split(",") if "=" in item
+        )
+    }
+
+    # Progresso por série em modo write-behind (ack imediato, gravação em lote)
+    PROGRESS_WRITE_BEHIND: bool = os.getenv("PROGRESS_WRITE_BEHIND", "false").lower() == "true"
+    PROGRESS_FLUSH_INTERVAL_MS: int = int(os.getenv("PROGRESS_FLUSH_INTERVAL_MS", "200"))
+    PROGRESS_BUFFER_MAX_PENDING: int = int(os.getenv("PROGRESS_BUFFER_MAX_PENDING", "1000"))
+
+    # Agendador de tarefas em processo (um líder por cluster via advisory lock no Postgres)
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_MAX_CONCURRENCY: int = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "2"))
+    SCHEDULER_LEADER_LOCK_KEY: int = int(os.getenv("SCHEDULER_LEADER_LOCK_KEY", "727001"))
+    SCHEDULER_LEADER_RETRY_SECONDS: float = float(os.getenv("SCHEDULER_LEADER_RETRY_SECONDS", "15"))
+    SCHEDULER_HISTORY_DAYS: int = int(os.getenv("SCHEDULER_HISTORY_DAYS", "30"))
+    SCHEDULER_DISABLED_JOBS: list = [
+        name.strip() for name in os.getenv("SCHEDULER_DISABLED_JOBS", "").split(",") if name.strip()
+    ]
+    SESSION_ABANDON_AFTER_HOURS: int = int(os.getenv("SESSION_ABANDON_AFTER_HOURS", "24"))
+    SCHEDULER_COLD_ARCHIVE: bool = os.getenv("SCHEDULER_COLD_ARCHIVE", "false").lower() == "true"
+    SCHEDULER_COLD_ARCHIVE_LIMIT: int = int(os.getenv("SCHEDULER_COLD_ARCHIVE_LIMIT", "1000"))
+    SCHEDULER_WARM_USERS: int = int(os.getenv("SCHEDULER_WARM_USERS", "100"))
+
+    # Outbox de eventos de domínio (efeitos colaterais fora da requisição)
+    OUTBOX_POLL_INTERVAL_MS: int = int(os.getenv("OUTBOX_POLL_INTERVAL_MS", "500"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    OUTBOX_RETENTION_DAYS: int = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+
+    # Upload em lote de sessões gravadas offline
+    SESSION_UPLOAD_MAX_SESSIONS: int = int(os.getenv("SESSION_UPLOAD_MAX_SESSIONS", "50"))
+    SESSION_UPLOAD_MAX_EXERCISES: int = int(os.getenv("SESSION_UPLOAD_MAX_EXERCISES", "100"))
+    IDEMPOTENCY_KEY_TTL_HOURS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "720"))
+
+    # Sincronização incremental (mudanças desde o cursor)
+    SYNC_PAGE_SIZE: int = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90"))
+
+    # Lote de leituras (POST /api/batch)
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+
+    # Eventos por usuário (SSE)
+    EVENTS_QUEUE_SIZE: int = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    # Fan-out entre workers (LISTEN/NOTIFY do Postgres)
+    EVENTS_CHANNEL: str = os.getenv("EVENTS_CHANNEL", "cirqulofit_events")
+    EVENTS_BRIDGE_RETRY_SECONDS: float = float(os.getenv("EVENTS_BRIDGE_RETRY_SECONDS", "5"))
+
+    # Servidor de produção (serve.py)
+    HOST: str = os.getenv("HOST", "0.0.0.0")
+    PORT: int = int(os.getenv("PORT", "8000"))
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))  # 0 = CPUs do contêiner, até WEB_CONCURRENCY_MAX
+    WEB_CONCURRENCY_MAX: int = int(os.getenv("WEB_CONCURRENCY_MAX", "8"))
+    KEEP_ALIVE_SECONDS: int = int(os.getenv("KEEP_ALIVE_SECONDS", "75"))
+    
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
 
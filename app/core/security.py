@@ -0,0 +1,75 @@
+"""Política de hash de senhas.
+
+Um único `CryptContext` para a aplicação, com o esquema e o custo vindos de
+`Settings` (`PASSWORD_HASH_SCHEME`, `PASSWORD_BCRYPT_ROUNDS`,
+`PASSWORD_ARGON2_*`). Os parâmetros são calibrados por
+`python -m scripts.calibrate_password_hash` para uma latência alvo no
+hardware de produção.
+
+Hashes gravados com outro esquema ou outro custo continuam válidos, mas
+`needs_update` os marca como desatualizados: o login bem-sucedido refaz o
+hash com a política atual (`verify_and_update`). O argon2 depende do pacote
+opcional `argon2-cffi`.
+"""
+from typing import Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+SCHEMES = ("bcrypt", "argon2")
+
+
+def policy(scheme: str = None, **overrides) -> Dict:
+    """Parâmetros da política (os de `Settings`, com `overrides` por cima)"""
+    params = {
+        "scheme": scheme or settings.PASSWORD_HASH_SCHEME,
+        "bcrypt_rounds": settings.PASSWORD_BCRYPT_ROUNDS,
+        "argon2_time_cost": settings.PASSWORD_ARGON2_TIME_COST,
+        "argon2_memory_cost": settings.PASSWORD_ARGON2_MEMORY_KIB,
+        "argon2_parallelism": settings.PASSWORD_ARGON2_PARALLELISM,
+    }
+    params.update({key: value for key, value in overrides.items() if value is not None})
+    if params["scheme"] not in SCHEMES:
+        raise ValueError(f"Esquema de hash desconhecido: {params['scheme']}")
+    return params
+
+
+def build_context(scheme: str = None, **overrides) -> CryptContext:
+    """CryptContext da política: o esquema escolhido gera os hashes, o outro só verifica"""
+    params = policy(scheme, **overrides)
+    rounds = params["bcrypt_rounds"]
+    schemes = [params["scheme"]] + [other for other in SCHEMES if other != params["scheme"]]
+    return CryptContext(
+        schemes=schemes,
+        default=params["scheme"],
+        deprecated=schemes[1:],
+        # min = max = custo atual: hashes com custo maior ou menor também são refeitos
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+        argon2__time_cost=params["argon2_time_cost"],
+        argon2__memory_cost=params["argon2_memory_cost"],
+        argon2__parallelism=params["argon2_parallelism"],
+    )
+
+
+pwd_context = build_context()
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(senha confere, novo hash se o gravado usa parâmetros desatualizados)"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def dummy_verify():
+    """Mesmo custo de uma verificação, para e-mail inexistente não responder mais rápido"""
+    pwd_context.dummy_verify()
@@ -0,0 +1,92 @@
+"""Conquistas declarativas, compiladas em contadores incrementais.
+
+Cada `Counter` diz de qual evento de domínio ele se alimenta e como o evento
+o altera:
+
+- `count`: soma 1 por evento;
+- `sum`: soma um valor do evento (`once_per` evita contar duas vezes a mesma
+  entidade, ex.: um exercício desmarcado e concluído de novo);
+- `distinct`: conta valores distintos já vistos (ex.: grupos musculares);
+  `value` None não conta;
+- `streak`: dias consecutivos com evento, zerando quando um dia falha.
+
+Cada `Rule` desbloqueia uma conquista quando o contador atinge o limite.
+`RULE_INDEX` agrupa contadores e regras por tipo de evento, então um evento
+só toca os contadores e as regras que dependem dele.
+"""
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.domain.events import DomainEvent, ExerciseCompleted, SessionCompleted
+from app.domain.muscle_groups import OTHER
+
+
+class Counter:
+    KINDS = ("count", "sum", "distinct", "streak")
+
+    def __init__(self, name: str, event_type: str, kind: str,
+                 value: Optional[Callable[[DomainEvent], Any]] = None,
+                 once_per: Optional[Callable[[DomainEvent], Any]] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Tipo de contador inválido: {kind}")
+        if kind != "count" and value is None:
+            raise ValueError(f"Contador {name} precisa de `value`")
+        self.name = name
+        self.event_type = event_type
+        self.kind = kind
+        self.value = value
+        self.once_per = once_per
+
+
+class Rule:
+    def __init__(self, code: str, title: str, description: str, counter: str, threshold: float):
+        self.code = code
+        self.title = title
+        self.description = description
+        self.counter = counter
+        self.threshold = threshold
+
+
+COUNTERS = (
+    Counter("sessions", SessionCompleted.event_type, "count"),
+    Counter("streak_days", SessionCompleted.event_type, "streak", value=lambda e: e.completed_at.date()),
+    Counter("tonnage_kg", ExerciseCompleted.event_type, "sum",
+            value=lambda e: e.completed_sets * e.reps * e.weight, once_per=lambda e: e.exercise_id),
+    # Exercício não reconhecido (`outros`) não é um grupo muscular
+    Counter("muscle_groups", ExerciseCompleted.event_type, "distinct",
+            value=lambda e: e.muscle_group if e.muscle_group != OTHER else None),
+)
+
+RULES = (
+    Rule("first_workout", "Primeiro treino", "Conclua sua primeira sessão de treino", "sessions", 1),
+    Rule("sessions_10", "Dez sessões", "Conclua 10 sessões de treino", "sessions", 10),
+    Rule("sessions_100", "Cem sessões", "Conclua 100 sessões de treino", "sessions", 100),
+    Rule("streak_7", "Semana completa", "Treine 7 dias seguidos", "streak_days", 7),
+    Rule("tonnage_1000", "Uma tonelada", "Levante 1.000 kg no total", "tonnage_kg", 1_000),
+    Rule("tonnage_10000", "Dez toneladas", "Levante 10.000 kg no total", "tonnage_kg", 10_000),
+    Rule("tonnage_100000", "Cem toneladas", "Levante 100.000 kg no total", "tonnage_kg", 100_000),
+    Rule("muscle_groups_5", "Corpo inteiro", "Treine 5 grupos musculares diferentes", "muscle_groups", 5),
+)
+
+
+def build_index(counters=COUNTERS, rules=RULES) -> Dict[str, List[Tuple[Counter, List[Rule]]]]:
+    """event_type -> [(contador, regras do contador em ordem de limite)]"""
+    by_counter: Dict[str, List[Rule]] = defaultdict(list)
+    names = {counter.name for counter in counters}
+    for rule in rules:
+        if rule.counter not in names:
+            raise ValueError(f"Regra {rule.code} usa contador desconhecido: {rule.counter}")
+        by_counter[rule.counter].append(rule)
+
+    index: Dict[str, List[Tuple[Counter, List[Rule]]]] = defaultdict(list)
+    for counter in counters:
+        # Contadores sem regras não precisam ser mantidos
+        if by_counter[counter.name]:
+            index[counter.event_type].append(
+                (counter, sorted(by_counter[counter.name], key=lambda rule: rule.threshold))
+            )
+    return dict(index)
+
+
+RULE_INDEX = build_index()
+RULES_BY_CODE = {rule.code: rule for rule in RULES}
@@ -0,0 +1,76 @@
+"""Eventos de domínio publicados pelo outbox transacional.
+
+Cada evento é gravado em `outbox_events` na mesma transação da mudança que
+o originou e entregue depois aos handlers registrados no relay. O payload é
+JSON com os campos listados em `fields`; datas viajam em ISO 8601.
+"""
+import json
+from datetime import datetime
+from typing import Dict, Optional, Type
+
+
+class DomainEvent:
+    event_type = ""
+    fields = ()
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+
+    def to_json(self) -> str:
+        payload = {}
+        for field in self.fields:
+            value = getattr(self, field)
+            payload[field] = value.isoformat() if isinstance(value, datetime) else value
+        return json.dumps(payload)
+
+    @classmethod
+    def from_json(cls, user_id: int, payload: str) -> "DomainEvent":
+        return cls(user_id, **json.loads(payload))
+
+
+class SessionCompleted(DomainEvent):
+    """Sessão de treino concluída (XP já calculado e gravado na sessão)"""
+    event_type = "session_completed"
+    fields = ("session_id", "workout_id", "started_at", "completed_at", "duration", "xp_earned", "exercise_count")
+
+    def __init__(self, user_id: int, session_id: int, workout_id: Optional[int], started_at,
+                 completed_at, duration: int, xp_earned: int, exercise_count: int = 0):
+        super().__init__(user_id)
+        self.session_id = session_id
+        self.workout_id = workout_id
+        self.started_at = datetime.fromisoformat(started_at) if isinstance(started_at, str) else started_at
+        self.completed_at = datetime.fromisoformat(completed_at) if isinstance(completed_at, str) else completed_at
+        self.duration = duration
+        self.xp_earned = xp_earned
+        self.exercise_count = exercise_count
+
+
+class ExerciseCompleted(DomainEvent):
+    """Exercício concluído (todas as séries feitas) dentro de uma sessão"""
+    event_type = "exercise_completed"
+    fields = ("exercise_id", "session_id", "exercise_name", "muscle_group", "completed_sets", "reps", "weight",
+              "completed_at")
+
+    def __init__(self, user_id: int, exercise_id: int, session_id: int, exercise_name: str, muscle_group: str,
+                 completed_sets: int, reps: int, weight, completed_at):
+        super().__init__(user_id)
+        self.exercise_id = exercise_id
+        self.session_id = session_id
+        self.exercise_name = exercise_name
+        self.muscle_group = muscle_group
+        self.completed_sets = completed_sets
+        self.reps = reps
+        self.weight = float(weight or 0)
+        self.completed_at = datetime.fromisoformat(completed_at) if isinstance(completed_at, str) else completed_at
+
+
+EVENT_TYPES: Dict[str, Type[DomainEvent]] = {
+    cls.event_type: cls for cls in (SessionCompleted, ExerciseCompleted)
+}
+
+
+def deserialize(event_type: str, user_id: int, payload: str) -> DomainEvent:
+    cls = EVENT_TYPES.get(event_type)
+    if cls is None:
+        raise ValueError(f"Tipo de evento desconhecido: {event_type}")
+    return cls.from_json(user_id, payload)
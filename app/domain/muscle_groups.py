@@ -0,0 +1,56 @@
+"""Catálogo de grupos musculares e mapeamento exercício -> grupo.
+
+Usado quando o exercício é registrado sem `muscle_group`: o nome é
+normalizado (minúsculas, sem acentos) e comparado com palavras-chave. A
+primeira regra que casa vence, então padrões mais específicos vêm antes.
+"""
+import unicodedata
+from typing import Optional
+
+MUSCLE_GROUPS = (
+    "peito", "costas", "ombros", "biceps", "triceps", "antebracos",
+    "quadriceps", "posteriores", "gluteos", "panturrilhas", "abdomen",
+)
+
+OTHER = "outros"
+
+# (palavra-chave, grupo) em ordem de prioridade
+_KEYWORDS = (
+    ("triceps", "triceps"), ("frances", "triceps"), ("mergulho", "triceps"), ("dip", "triceps"),
+    ("pushdown", "triceps"), ("skull", "triceps"),
+    ("stiff", "posteriores"), ("flexora", "posteriores"), ("terra romeno", "posteriores"),
+    ("leg curl", "posteriores"), ("posterior", "posteriores"), ("hamstring", "posteriores"),
+    ("rosca punho", "antebracos"), ("antebraco", "antebracos"), ("wrist", "antebracos"),
+    ("rosca", "biceps"), ("biceps", "biceps"), ("curl", "biceps"),
+    ("panturrilha", "panturrilhas"), ("gemeos", "panturrilhas"), ("calf", "panturrilhas"),
+    ("gluteo", "gluteos"), ("hip thrust", "gluteos"), ("elevacao pelvica", "gluteos"), ("abducao", "gluteos"),
+    ("agachamento", "quadriceps"), ("squat", "quadriceps"), ("leg press", "quadriceps"),
+    ("extensora", "quadriceps"), ("afundo", "quadriceps"), ("lunge", "quadriceps"), ("hack", "quadriceps"),
+    ("levantamento terra", "costas"), ("deadlift", "costas"), ("remada", "costas"), ("puxada", "costas"),
+    ("barra fixa", "costas"), ("pull", "costas"), ("row", "costas"), ("pulldown", "costas"),
+    ("supino", "peito"), ("crucifixo", "peito"), ("peck", "peito"), ("flexao", "peito"),
+    ("bench", "peito"), ("fly", "peito"), ("push up", "peito"), ("peito", "peito"),
+    ("desenvolvimento", "ombros"), ("elevacao lateral", "ombros"), ("elevacao frontal", "ombros"),
+    ("ombro", "ombros"), ("shoulder", "ombros"), ("militar", "ombros"), ("overhead", "ombros"),
+    ("abdominal", "abdomen"), ("prancha", "abdomen"), ("plank", "abdomen"), ("crunch", "abdomen"),
+    ("abdomen", "abdomen"),
+)
+
+
+def normalize(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(text.replace("-", " ").split())
+
+
+def resolve_muscle_group(exercise_name: str, muscle_group: Optional[str] = None) -> str:
+    """Grupo informado (se for do catálogo) ou inferido pelo nome; `outros` se nada casar"""
+    if muscle_group:
+        group = normalize(muscle_group)
+        if group in MUSCLE_GROUPS:
+            return group
+    name = normalize(exercise_name or "")
+    for keyword, group in _KEYWORDS:
+        if keyword in name:
+            return group
+    return OTHER
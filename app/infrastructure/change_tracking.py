@@ -0,0 +1,165 @@
+"""Registro de mudanças por usuário para a sincronização incremental.
+
+Triggers em `workouts`, `workout_sessions`, `workout_exercises` e
+`dashboard_data` gravam cada INSERT/UPDATE/DELETE em `sync_changes`: uma
+linha por registro, com o `change_seq` da última mudança e `deleted` para as
+exclusões (tombstones). O `change_seq` vem de um contador por usuário em
+`sync_sequences`; a trava da linha do contador vai até o commit, então as
+mudanças de um usuário são confirmadas na ordem da sequência e um cliente
+que já leu até N nunca perde uma mudança com número menor.
+
+Exercícios não têm `user_id`: o dono vem da sessão. Na exclusão o dono é
+lido da própria linha em `sync_changes`. Partições desanexadas para o
+arquivo frio não disparam triggers e saem da sincronização sem tombstone; o
+arquivamento de meses (`HistoryService.archive_month`) apaga as linhas de
+`sync_changes` antes do DELETE, e sem dono o trigger não registra nada.
+"""
+from datetime import datetime
+
+# Tabelas rastreadas, na ordem em que o cliente deve aplicá-las (pais antes dos filhos)
+TABLES = ("workouts", "workout_sessions", "workout_exercises", "dashboard_data")
+
+_PG_FUNCTION = """
+    CREATE OR REPLACE FUNCTION sync_track_change() RETURNS trigger AS $$
+    DECLARE
+        v_table TEXT := TG_ARGV[0];
+        v_row INTEGER;
+        v_owner INTEGER;
+        v_seq BIGINT;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            v_row := OLD.id;
+            SELECT user_id INTO v_owner FROM sync_changes WHERE table_name = v_table AND row_id = OLD.id;
+        ELSIF v_table = 'workout_exercises' THEN
+            v_row := NEW.id;
+            SELECT user_id INTO v_owner FROM workout_sessions
+            WHERE id = NEW.session_id AND started_at = NEW.session_started_at;
+            IF v_owner IS NULL THEN
+                SELECT user_id INTO v_owner FROM workout_sessions WHERE id = NEW.session_id;
+            END IF;
+        ELSE
+            v_row := NEW.id;
+            v_owner := NEW.user_id;
+        END IF;
+        IF v_owner IS NULL THEN
+            RETURN NULL;
+        END IF;
+
+        INSERT INTO sync_sequences (user_id, seq, pruned_seq) VALUES (v_owner, 1, 0)
+        ON CONFLICT (user_id) DO UPDATE SET seq = sync_sequences.seq + 1
+        RETURNING seq INTO v_seq;
+        INSERT INTO sync_changes (user_id, table_name, row_id, change_seq, deleted, changed_at)
+        VALUES (v_owner, v_table, v_row, v_seq, TG_OP = 'DELETE', now())
+        ON CONFLICT (table_name, row_id) DO UPDATE SET
+            user_id = EXCLUDED.user_id, change_seq = EXCLUDED.change_seq,
+            deleted = EXCLUDED.deleted, changed_at = EXCLUDED.changed_at;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+_SQLITE_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS sync_{table}_{op} AFTER {event} ON {table}
+    WHEN {owner} IS NOT NULL
+    BEGIN
+        INSERT INTO sync_sequences (user_id, seq, pruned_seq) VALUES ({owner}, 1, 0)
+        ON CONFLICT (user_id) DO UPDATE SET seq = seq + 1;
+        INSERT INTO sync_changes (user_id, table_name, row_id, change_seq, deleted, changed_at)
+        VALUES ({owner}, '{table}', {row}.id, (SELECT seq FROM sync_sequences WHERE user_id = {owner}),
+                {deleted}, CURRENT_TIMESTAMP)
+        ON CONFLICT (table_name, row_id) DO UPDATE SET
+            user_id = excluded.user_id, change_seq = excluded.change_seq,
+            deleted = excluded.deleted, changed_at = excluded.changed_at;
+    END
+"""
+
+# Linhas existentes antes dos triggers entram numa sequência inicial por usuário
+_BACKFILL = """
+    INSERT INTO sync_changes (user_id, table_name, row_id, change_seq, deleted, changed_at)
+    SELECT user_id, table_name, row_id,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY table_rank, row_id), FALSE, %s
+    FROM (
+        SELECT user_id, 'workouts' AS table_name, id AS row_id, 1 AS table_rank
+        FROM workouts WHERE user_id IS NOT NULL
+        UNION ALL
+        SELECT user_id, 'workout_sessions', id, 2 FROM workout_sessions WHERE user_id IS NOT NULL
+        UNION ALL
+        SELECT ws.user_id, 'workout_exercises', we.id, 3
+        FROM workout_exercises we JOIN workout_sessions ws ON ws.id = we.session_id
+        WHERE ws.user_id IS NOT NULL
+        UNION ALL
+        SELECT user_id, 'dashboard_data', id, 4 FROM dashboard_data WHERE user_id IS NOT NULL
+    ) existing
+"""
+
+
+def _sqlite_owner(table: str, row: str) -> str:
+    if row == "OLD":
+        return f"(SELECT user_id FROM sync_changes WHERE table_name = '{table}' AND row_id = OLD.id)"
+    if table == "workout_exercises":
+        return "(SELECT user_id FROM workout_sessions WHERE id = NEW.session_id)"
+    return "NEW.user_id"
+
+
+def create_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_sequences (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id),
+            seq BIGINT NOT NULL DEFAULT 0,
+            pruned_seq BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_changes (
+            id BIGSERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            table_name VARCHAR(50) NOT NULL,
+            row_id INTEGER NOT NULL,
+            change_seq BIGINT NOT NULL,
+            deleted BOOLEAN NOT NULL DEFAULT FALSE,
+            changed_at TIMESTAMP NOT NULL,
+            UNIQUE (table_name, row_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sync_changes_user_seq ON sync_changes (user_id, change_seq)
+    """)
+
+
+def install(cursor, dialect: str):
+    """Cria as tabelas e os triggers; na primeira vez, registra as linhas que já existem.
+
+    Chamado no init_tables, na mesma transação: no Postgres o CREATE TRIGGER
+    bloqueia as escritas concorrentes até o commit, então nenhuma mudança
+    escapa entre os triggers e o backfill.
+    """
+    create_tables(cursor)
+    if dialect == "postgresql":
+        cursor.execute(_PG_FUNCTION)
+        for table in TABLES:
+            # A migração para tabelas particionadas troca as tabelas: o trigger volta na próxima subida
+            cursor.execute("""
+                SELECT 1 FROM pg_trigger WHERE tgrelid = %s::regclass AND tgname = 'sync_track_change'
+            """, (table,))
+            if cursor.fetchone() is not None:
+                continue
+            cursor.execute(f"""
+                CREATE TRIGGER sync_track_change AFTER INSERT OR UPDATE OR DELETE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION sync_track_change('{table}')
+            """)
+    else:
+        for table in TABLES:
+            for op, event, row in (("ins", "INSERT", "NEW"), ("upd", "UPDATE", "NEW"), ("del", "DELETE", "OLD")):
+                cursor.execute(_SQLITE_TRIGGER.format(
+                    table=table, op=op, event=event, row=row,
+                    owner=_sqlite_owner(table, row), deleted="TRUE" if row == "OLD" else "FALSE",
+                ))
+
+    cursor.execute("SELECT 1 FROM sync_sequences LIMIT 1")
+    if cursor.fetchone() is None:
+        cursor.execute(_BACKFILL, (datetime.utcnow(),))
+        cursor.execute("""
+            INSERT INTO sync_sequences (user_id, seq, pruned_seq)
+            SELECT user_id, MAX(change_seq), 0 FROM sync_changes GROUP BY user_id
+        """)
+
@@ -0,0 +1,221 @@
+"""Arquivo frio do histórico: um arquivo colunar comprimido por usuário e mês.
+
+Formato (`<COLD_STORAGE_DIR>/<user_id>/<AAAA-MM>.cfc`):
+
+    MAGIC (8 bytes) | tamanho do header (uint32) | header JSON | blocos
+
+O header descreve, por tabela (`sessions`, `exercises`), o número de linhas
+e o offset/tamanho de cada coluna. Cada coluna é um bloco zlib independente
+com um array tipado:
+
+    i8    inteiros int64 (nulo = INT64_MIN)
+    ts    timestamps em microssegundos desde a epoch, int64 (nulo = INT64_MIN)
+    f8    float64 (nulo = NaN)
+    bool  um byte por linha (0, 1; 2 = nulo)
+    str   dicionário JSON + códigos int32 (nomes de exercício se repetem muito)
+
+A leitura usa mmap e descomprime só as colunas pedidas (projeção), então
+uma varredura por `started_at` não toca nos demais blocos.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"CFCOL01\n"
+INT_NULL = -(2 ** 63)
+EPOCH = datetime(1970, 1, 1)
+
+SESSION_SCHEMA: Tuple[Tuple[str, str], ...] = (
+    ("id", "i8"), ("workout_id", "i8"), ("started_at", "ts"), ("completed_at", "ts"),
+    ("duration", "i8"), ("xp_earned", "i8"), ("is_completed", "bool"),
+    ("created_at", "ts"), ("updated_at", "ts"),
+)
+EXERCISE_SCHEMA: Tuple[Tuple[str, str], ...] = (
+    ("id", "i8"), ("session_id", "i8"), ("session_started_at", "ts"), ("exercise_name", "str"),
+    ("muscle_group", "str"), ("sets", "i8"), ("reps", "i8"), ("weight", "f8"), ("completed_sets", "i8"),
+    ("is_completed", "bool"), ("created_at", "ts"), ("updated_at", "ts"),
+)
+SCHEMAS = {"sessions": SESSION_SCHEMA, "exercises": EXERCISE_SCHEMA}
+
+
+class ColdStorageError(Exception):
+    """Arquivo frio ausente ou corrompido"""
+
+
+def _to_micros(value) -> int:
+    if value is None:
+        return INT_NULL
+    delta = value - EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(value: int) -> Optional[datetime]:
+    return None if value == INT_NULL else EPOCH + timedelta(microseconds=value)
+
+
+def _encode(kind: str, values: Sequence[Any]) -> bytes:
+    if kind == "i8":
+        return array("q", (INT_NULL if v is None else int(v) for v in values)).tobytes()
+    if kind == "ts":
+        return array("q", (_to_micros(v) for v in values)).tobytes()
+    if kind == "f8":
+        return array("d", (math.nan if v is None else float(v) for v in values)).tobytes()
+    if kind == "bool":
+        return bytes(2 if v is None else int(bool(v)) for v in values)
+    if kind == "str":
+        dictionary: Dict[str, int] = {}
+        codes = array("i", (-1 if v is None else dictionary.setdefault(v, len(dictionary)) for v in values))
+        words = json.dumps(list(dictionary), ensure_ascii=False).encode()
+        return struct.pack("<I", len(words)) + words + codes.tobytes()
+    raise ColdStorageError(f"Tipo de coluna desconhecido: {kind}")
+
+
+def _decode(kind: str, raw: bytes, swap: bool) -> List[Any]:
+    def typed(code: str, data: bytes) -> array:
+        values = array(code)
+        values.frombytes(data)
+        if swap:
+            values.byteswap()
+        return values
+
+    if kind == "i8":
+        return [None if v == INT_NULL else v for v in typed("q", raw)]
+    if kind == "ts":
+        return [_from_micros(v) for v in typed("q", raw)]
+    if kind == "f8":
+        return [None if math.isnan(v) else v for v in typed("d", raw)]
+    if kind == "bool":
+        return [None if v == 2 else bool(v) for v in raw]
+    if kind == "str":
+        (size,) = struct.unpack_from("<I", raw)
+        words = json.loads(raw[4:4 + size].decode())
+        return [None if c < 0 else words[c] for c in typed("i", raw[4 + size:])]
+    raise ColdStorageError(f"Tipo de coluna desconhecido: {kind}")
+
+
+def write_file(path: str, tables: Dict[str, List[Dict[str, Any]]]) -> int:
+    """Grava as tabelas em `path` de forma atômica; retorna o tamanho em bytes"""
+    header: Dict[str, Any] = {"version": 1, "byteorder": sys.byteorder, "tables": {}}
+    blocks: List[bytes] = []
+    offset = 0
+    for table, schema in SCHEMAS.items():
+        rows = tables.get(table, [])
+        columns = {}
+        for name, kind in schema:
+            block = zlib.compress(_encode(kind, [row.get(name) for row in rows]), 6)
+            columns[name] = {"type": kind, "offset": offset, "length": len(block)}
+            blocks.append(block)
+            offset += len(block)
+        header["tables"][table] = {"rows": len(rows), "columns": columns}
+
+    encoded = json.dumps(header).encode()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(encoded)))
+        f.write(encoded)
+        for block in blocks:
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(MAGIC) + 4 + len(encoded) + offset
+
+
+class ColdFile:
+    """Leitura preguiçosa de um arquivo frio via mmap"""
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            self._file = open(path, "rb")
+        except FileNotFoundError:
+            raise ColdStorageError(f"Arquivo frio ausente: {path}")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ColdStorageError(f"Arquivo frio inválido: {path}")
+        (size,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._map[start:start + size].decode())
+        self._data_start = start + size
+        self._swap = self.header.get("byteorder", sys.byteorder) != sys.byteorder
+
+    def rows(self, table: str) -> int:
+        return self.header["tables"][table]["rows"]
+
+    def column(self, table: str, name: str) -> List[Any]:
+        meta = self.header["tables"][table]["columns"].get(name)
+        if meta is None:
+            # Coluna criada depois do arquivo (ex.: `muscle_group`): nula em todas as linhas
+            return [None] * self.rows(table)
+        start = self._data_start + meta["offset"]
+        raw = zlib.decompress(self._map[start:start + meta["length"]])
+        return _decode(meta["type"], raw, self._swap)
+
+    def scan(self, table: str, columns: Optional[Iterable[str]] = None,
+             where: Optional[Tuple[str, Any, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Linhas com as colunas pedidas; `where=(coluna, mínimo, máximo)` filtra antes de ler o resto"""
+        names = list(columns) if columns else [name for name, _ in SCHEMAS[table]]
+        indexes: Iterable[int] = range(self.rows(table))
+        if where is not None:
+            column, low, high = where
+            values = self.column(table, column)
+            indexes = [
+                i for i, value in enumerate(values)
+                if value is not None and (low is None or value >= low) and (high is None or value < high)
+            ]
+            if not indexes:
+                return
+        data = {name: self.column(table, name) for name in names}
+        for i in indexes:
+            yield {name: data[name][i] for name in names}
+
+    def read_all(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {table: list(self.scan(table)) for table in SCHEMAS}
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColdStore:
+    """Diretório dos arquivos frios, um por usuário e mês"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def relative_path(self, user_id: int, month: date) -> str:
+        return os.path.join(str(user_id), f"{month.year:04d}-{month.month:02d}.cfc")
+
+    def absolute_path(self, relative_path: str) -> str:
+        return os.path.join(self.root, relative_path)
+
+    def write(self, user_id: int, month: date, sessions: List[Dict[str, Any]],
+              exercises: List[Dict[str, Any]]) -> Tuple[str, int]:
+        relative = self.relative_path(user_id, month)
+        size = write_file(self.absolute_path(relative), {"sessions": sessions, "exercises": exercises})
+        return relative, size
+
+    def open(self, relative_path: str) -> ColdFile:
+        return ColdFile(self.absolute_path(relative_path))
+
+
+def normalize_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    # DECIMAL do Postgres e strings do SQLite viram tipos do formato
+    return {k: float(v) if isinstance(v, Decimal) else v for k, v in row.items()}
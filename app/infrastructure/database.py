@@ -1,13 +1,32 @@
+import itertools
+import logging
+import sqlite3
+import threading
+import time
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
 from urllib.parse import urlparse
 from app.core.config import settings
+from app.infrastructure import change_tracking, partitioning
+from app.infrastructure.query_cache import CachingCursor, QueryCache
+from app.infrastructure.query_budget import QueryBudget, current_budget
+from app.infrastructure.request_scope import RequestScope, current_scope, handoff_scope
 
-class Database:
-    def __init__(self):
+logger = logging.getLogger(__name__)
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão do pool ficou livre dentro do tempo limite"""
+
+class PostgresBackend:
+    """Pool de conexões psycopg2 a partir de uma URL postgresql://"""
+    dialect = "postgresql"
+
+    def __init__(self, url: str, min_size: int = None, max_size: int = None, timeout: float = None):
         # Parse da DATABASE_URL para extrair parâmetros de conexão
-        parsed_url = urlparse(settings.DATABASE_URL)
+        parsed_url = urlparse(url)
         self.connection_params = {
             'host': parsed_url.hostname,
             'port': parsed_url.port or 5432,
@@ -15,17 +34,240 @@ class Database:
             'user': parsed_url.username,
             'password': parsed_url.password
         }
+        self.min_size = min_size if min_size is not None else settings.DATABASE_POOL_MIN_SIZE
+        self.max_size = max_size if max_size is not None else settings.DATABASE_POOL_MAX_SIZE
+        self.timeout = timeout if timeout is not None else settings.DATABASE_POOL_TIMEOUT_SECONDS
+        self._pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # ThreadedConnectionPool falha quando esgotado; o semáforo faz as threads esperarem
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._stats_lock = threading.Lock()
+        self.in_use = 0
+        self.waiting = 0
+
+    def _get_pool(self) -> psycopg2.pool.ThreadedConnectionPool:
+        # Criado sob demanda: importar o módulo não abre conexões
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(
+                        self.min_size, self.max_size, **self.connection_params
+                    )
+        return self._pool
+
+    def connect(self, dedicated: bool = False):
+        with self._stats_lock:
+            self.waiting += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        finally:
+            with self._stats_lock:
+                self.waiting -= 1
+        if not acquired:
+            raise PoolTimeoutError(f"Pool esgotado após {self.timeout}s")
+
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            if conn.closed:
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._stats_lock:
+            self.in_use += 1
+        return conn
+
+    def cursor(self, conn):
+        return conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+    def apply_budget(self, conn, cursor, budget: QueryBudget):
+        # Vale até o fim da transação corrente
+        cursor.execute("SET LOCAL statement_timeout = %s", (budget.timeout_ms,))
+
+    def clear_budget(self, conn):
+        pass
+
+    def cancel(self, conn):
+        conn.cancel()
+
+    def release(self, conn):
+        try:
+            broken = conn.closed or conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+            self._get_pool().putconn(conn, close=bool(broken))
+        finally:
+            with self._stats_lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": self.max_size, "in_use": self.in_use, "waiting": self.waiting}
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
+def create_backend(url: str):
+    """Escolhe o backend pelo esquema da DATABASE_URL"""
+    scheme = urlparse(url).scheme
+    if scheme.startswith("sqlite"):
+        from app.infrastructure.sqlite import SQLiteBackend
+        return SQLiteBackend(url)
+    if scheme.startswith("postgres"):
+        return PostgresBackend(url)
+    raise ValueError(f"Esquema de DATABASE_URL não suportado: {scheme}")
+
+class Database:
+    """Primário para escritas e réplicas opcionais para leituras.
+
+    `get_cursor(readonly=True)` distribui leituras entre as réplicas em
+    round-robin, pulando réplicas que falharam até passar o intervalo de
+    nova tentativa. Para garantir read-your-writes, leituras de um usuário
+    que escreveu (via `get_cursor(user_id=...)`) nos últimos
+    `READ_YOUR_WRITES_SECONDS` segundos vão para o primário. O controle é
+    por processo: com vários workers, a janela deve cobrir o atraso típico
+    de replicação.
+    """
+
+    def __init__(self, url: str = None, replica_urls: List[str] = None):
+        self.url = url or settings.DATABASE_URL
+        self.backend = create_backend(self.url)
+        if replica_urls is None:
+            replica_urls = settings.DATABASE_REPLICA_URLS
+        # Réplicas só fazem sentido com Postgres no primário
+        self.replicas = [create_backend(u) for u in replica_urls] if self.dialect == "postgresql" else []
+        self._round_robin = itertools.count()
+        self._replica_down_until: Dict[int, float] = {}
+        self._recent_writes: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.query_cache = QueryCache()
+
+    @property
+    def dialect(self) -> str:
+        return self.backend.dialect
+
+    def mark_write(self, user_id: int):
+        """Registra escrita do usuário para fixar suas leituras no primário"""
+        with self._lock:
+            self._recent_writes[user_id] = time.monotonic() + settings.READ_YOUR_WRITES_SECONDS
+            if len(self._recent_writes) > 10_000:
+                now = time.monotonic()
+                self._recent_writes = {k: v for k, v in self._recent_writes.items() if v > now}
+
+    def _sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        until = self._recent_writes.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def _pick_replica(self) -> Optional[int]:
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        start = next(self._round_robin)
+        for offset in range(len(self.replicas)):
+            index = (start + offset) % len(self.replicas)
+            if self._replica_down_until.get(index, 0) <= now:
+                return index
+        return None
+
+    def _mark_replica_down(self, index: int):
+        with self._lock:
+            self._replica_down_until[index] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+    def _checkout(self, readonly: bool, user_id: Optional[int]):
+        """Retorna (backend, conexão), caindo para o primário se a réplica falhar"""
+        if readonly and not self._sticky(user_id):
+            for _ in range(len(self.replicas)):
+                index = self._pick_replica()
+                if index is None:
+                    break
+                replica = self.replicas[index]
+                try:
+                    return replica, replica.connect()
+                except PoolTimeoutError:
+                    # Réplica saudável, só saturada: não marca como fora; lê do primário
+                    # em vez de esperar o timeout do pool de outra réplica
+                    break
+                except psycopg2.OperationalError:
+                    self._mark_replica_down(index)
+        return self.backend, self.backend.connect()
+
+    def check_replicas(self) -> Dict[str, bool]:
+        """Health check ativo das réplicas (SELECT 1)"""
+        status = {}
+        for index, replica in enumerate(self.replicas):
+            healthy = True
+            try:
+                conn = replica.connect()
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                    conn.rollback()
+                finally:
+                    replica.release(conn)
+            except Exception:
+                healthy = False
+            with self._lock:
+                if healthy:
+                    self._replica_down_until.pop(index, None)
+                else:
+                    self._replica_down_until[index] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+            status[replica.connection_params['host'] or f"replica-{index}"] = healthy
+        return status
+
+    def pool_stats(self) -> Dict[str, int]:
+        backends = [self.backend] + self.replicas
+        stats = [b.stats() for b in backends if hasattr(b, "stats")]
+        return {key: sum(s[key] for s in stats) for key in ("size", "in_use", "waiting")}
     
     @contextmanager
-    def get_cursor(self):
-        """Context manager para cursor do banco"""
+    def get_cursor(self, readonly: bool = False, user_id: Optional[int] = None):
+        """Context manager para cursor do banco.
+
+        readonly: a consulta pode ser atendida por uma réplica.
+        user_id: dono dos dados; escritas com user_id fixam as próximas
+        leituras desse usuário no primário e invalidam só as entradas dele
+        no cache de consultas (`cursor.execute(..., cache=True)`).
+        """
+        budget = current_budget()
+        if budget is not None:
+            budget.check()
+        try:
+            scope = current_scope()
+            if scope is not None and (not readonly or scope.conn is not None or not self.replicas):
+                with self._scoped_cursor(scope, readonly, user_id, budget) as cursor:
+                    yield cursor
+                return
+            if scope is None:
+                self._release_idle_scope()
+            with self._cursor(readonly, user_id, budget) as cursor:
+                yield cursor
+        except Exception as e:
+            exceeded = budget.translate(e) if budget is not None else None
+            if exceeded is not None:
+                raise exceeded from e
+            raise
+
+    @contextmanager
+    def _cursor(self, readonly: bool, user_id: Optional[int], budget: Optional[QueryBudget]):
+        """Uma conexão e uma transação por bloco"""
+        backend = None
         conn = None
         cursor = None
         try:
-            conn = psycopg2.connect(**self.connection_params)
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            backend, conn = self._checkout(readonly, user_id)
+            cursor = CachingCursor(backend.cursor(conn), self.query_cache, user_id)
+            if budget is not None:
+                self._attach_budget(backend, conn, budget)
             yield cursor
             conn.commit()
+            if cursor.written:
+                self.query_cache.invalidate(cursor.written, user_id)
+            if not readonly and user_id is not None:
+                self.mark_write(user_id)
         except Exception as e:
             if conn:
                 conn.rollback()
@@ -34,11 +276,167 @@ class Database:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close()
+                if budget is not None:
+                    budget.detach(conn)
+                    backend.clear_budget(conn)
+                backend.release(conn)
+
+    def _attach_budget(self, backend, conn, budget: QueryBudget):
+        """Aplica o statement_timeout da rota e registra a conexão para cancelamento"""
+        raw = backend.cursor(conn)
+        try:
+            backend.apply_budget(conn, raw, budget)
+        finally:
+            raw.close()
+        budget.attach(conn, lambda: backend.cancel(conn))
     
+    @contextmanager
+    def _scoped_cursor(self, scope: RequestScope, readonly: bool, user_id: Optional[int],
+                       budget: Optional[QueryBudget] = None):
+        """Cursor na conexão da requisição; blocos de escrita isolados por SAVEPOINT"""
+        if scope.conn is None:
+            scope.backend, scope.conn = self.backend, self.backend.connect(dedicated=True)
+            if self.dialect == "sqlite":
+                # No SQLite, liberar o savepoint mais externo equivale a um COMMIT
+                scope.conn.execute("BEGIN")
+            if budget is not None:
+                scope.budget = budget
+                self._attach_budget(scope.backend, scope.conn, budget)
+        # O snapshot do SQLite é fixado na primeira leitura, e promovê-lo a escrita falha na
+        # hora (sem busy_timeout) se outra conexão confirmar antes. Enquanto o escopo não
+        # escreveu, cada bloco de escrita recomeça a transação já com o lock (BEGIN IMMEDIATE)
+        # e, se não escrever nada (ex.: a autenticação), o devolve ao sair
+        locked = not readonly and self.dialect == "sqlite" and scope.conn.total_changes == 0
+        if locked:
+            scope.conn.execute("COMMIT")
+            scope.conn.execute("BEGIN IMMEDIATE")
+        raw = scope.backend.cursor(scope.conn)
+        savepoint = None if readonly else scope.next_savepoint()
+        try:
+            if savepoint:
+                raw.execute(f"SAVEPOINT {savepoint}")
+            cursor = CachingCursor(raw, self.query_cache, user_id)
+            try:
+                yield cursor
+                if savepoint:
+                    raw.execute(f"RELEASE SAVEPOINT {savepoint}")
+            except Exception as e:
+                if savepoint:
+                    self._rollback_savepoint(scope, raw, savepoint)
+                elif isinstance(e, (psycopg2.Error, sqlite3.Error)):
+                    # Erro de SQL fora de savepoint invalida a transação inteira
+                    scope.failed = True
+                raise
+            if cursor.written:
+                scope.writes.append((cursor.written, user_id))
+            if not readonly and user_id is not None:
+                scope.writers.add(user_id)
+        finally:
+            raw.close()
+            if locked and scope.conn.total_changes == 0:
+                scope.conn.execute("COMMIT")
+                scope.conn.execute("BEGIN")
+
+    def _rollback_savepoint(self, scope: RequestScope, raw, savepoint: str):
+        try:
+            raw.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            raw.execute(f"RELEASE SAVEPOINT {savepoint}")
+        except Exception:
+            scope.failed = True
+
+    def close_scope(self, scope: RequestScope, commit: bool = True):
+        """Fim da requisição: commit (ou rollback) único e devolução da conexão"""
+        scope.closed = True
+        conn, backend = scope.conn, scope.backend
+        scope.conn = None
+        if conn is None:
+            return
+        if scope.budget is not None:
+            scope.budget.detach(conn)
+            backend.clear_budget(conn)
+        try:
+            if commit and not scope.failed:
+                conn.commit()
+            else:
+                conn.rollback()
+                return
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            backend.release(conn)
+
+        for tables, user_id in scope.writes:
+            self.query_cache.invalidate(tables, user_id)
+        for user_id in scope.writers:
+            self.mark_write(user_id)
+        for callback in scope.after_commit:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Falha em callback pós-commit")
+
+    def _release_idle_scope(self):
+        """Thread do handler: devolve a conexão do escopo se a requisição até ali só leu"""
+        scope = handoff_scope()
+        if scope is None or scope.conn is None:
+            return
+        if scope.writes or scope.writers or scope.after_commit or scope.failed:
+            # Escritas pendentes só podem ser confirmadas no fim da requisição
+            return
+        conn, backend = scope.conn, scope.backend
+        scope.conn = None
+        if scope.budget is not None:
+            scope.budget.detach(conn)
+            backend.clear_budget(conn)
+            scope.budget = None
+        try:
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            backend.release(conn)
+
+    def pin_snapshot(self, user_id: Optional[int] = None) -> bool:
+        """Abre a conexão da requisição no primário com um snapshot único para todas as leituras.
+
+        Precisa vir antes de qualquer consulta do escopo; no Postgres a
+        transação passa a REPEATABLE READ. False fora de unit of work.
+        """
+        scope = current_scope()
+        if scope is None or scope.conn is not None:
+            return False
+        with self._scoped_cursor(scope, True, user_id, current_budget()) as cursor:
+            if self.dialect == "postgresql":
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        return True
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Executa o callback depois do commit da requisição (na hora, fora de unit of work)"""
+        scope = current_scope()
+        if scope is not None and scope.conn is not None:
+            scope.after_commit.append(callback)
+        else:
+            callback()
+
+    def warm_up(self):
+        """Abre as conexões mínimas do pool e valida o primário"""
+        with self.get_cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+    def close(self):
+        for backend in [self.backend] + self.replicas:
+            if hasattr(backend, "close"):
+                backend.close()
+
     def init_tables(self):
         """Criar tabelas se não existirem"""
         with self.get_cursor() as cursor:
+            if self.dialect == "postgresql":
+                # Vários workers sobem juntos: serializa o DDL entre eles
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('cirqulofit.init_tables'))")
+
             # Tabela de usuários
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -77,6 +475,11 @@ class Database:
                 )
             """)
             
+            partitioned = settings.DATABASE_PARTITIONING and self.dialect == "postgresql"
+            if partitioned:
+                # Cria sessões/exercícios já particionados; bancos existentes usam scripts.partition_tables
+                partitioning.create_partitioned_tables(cursor)
+
             # Tabela de sessões de treino
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS workout_sessions (
@@ -135,7 +538,17 @@ class Database:
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            
+
+            # Adicionar colunas de auditoria se a tabela foi criada pela definição antiga
+            cursor.execute("""
+                ALTER TABLE workout_sessions
+                ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            """)
+            cursor.execute("""
+                ALTER TABLE workout_sessions
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            """)
+
             # Tabela de exercícios da sessão
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS workout_exercises (
@@ -151,7 +564,189 @@ class Database:
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            
+
+            cursor.execute("""
+                ALTER TABLE workout_exercises
+                ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            """)
+            cursor.execute("""
+                ALTER TABLE workout_exercises
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            """)
+
+            # Início da sessão copiado no exercício: chave de partição e filtro por período
+            if not self._has_column(cursor, "workout_exercises", "session_started_at"):
+                cursor.execute("""
+                    ALTER TABLE workout_exercises
+                    ADD COLUMN IF NOT EXISTS session_started_at TIMESTAMP
+                """)
+                cursor.execute("""
+                    UPDATE workout_exercises
+                    SET session_started_at = (
+                        SELECT started_at FROM workout_sessions WHERE workout_sessions.id = workout_exercises.session_id
+                    )
+                """)
+
+            # Grupo muscular opcional; sem ele o grupo é inferido pelo nome do exercício
+            if not self._has_column(cursor, "workout_exercises", "muscle_group"):
+                cursor.execute("""
+                    ALTER TABLE workout_exercises
+                    ADD COLUMN IF NOT EXISTS muscle_group VARCHAR(50)
+                """)
+
+            if partitioned:
+                if partitioning.is_partitioned(cursor, "workout_sessions"):
+                    partitioning.ensure_partitions(cursor)
+                else:
+                    logger.warning("DATABASE_PARTITIONING ativo, mas as tabelas não são particionadas; "
+                                   "rode python -m scripts.partition_tables migrate")
+
+            # Manifesto da camada fria: um arquivo colunar por usuário e mês
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cold_archive_manifest (
+                    id SERIAL PRIMARY KEY,
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    month DATE NOT NULL,
+                    path VARCHAR(512) NOT NULL,
+                    sessions_count INTEGER NOT NULL DEFAULT 0,
+                    completed_sessions INTEGER NOT NULL DEFAULT 0,
+                    exercises_count INTEGER NOT NULL DEFAULT 0,
+                    xp_total INTEGER NOT NULL DEFAULT 0,
+                    duration_total INTEGER NOT NULL DEFAULT 0,
+                    size_bytes INTEGER NOT NULL DEFAULT 0,
+                    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (user_id, month)
+                )
+            """)
+
+            # Recordes pessoais por exercício e faixa de repetições
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS personal_records (
+                    id SERIAL PRIMARY KEY,
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    exercise_name VARCHAR(255) NOT NULL,
+                    rep_bucket VARCHAR(10) NOT NULL,
+                    best_weight DECIMAL(6,2) NOT NULL DEFAULT 0,
+                    best_weight_reps INTEGER,
+                    best_weight_at TIMESTAMP,
+                    best_volume DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    best_volume_at TIMESTAMP,
+                    exercise_id INTEGER,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (user_id, exercise_name, rep_bucket)
+                )
+            """)
+
+            # Volume semanal por grupo muscular (rollup incremental)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS muscle_volume_weekly (
+                    id SERIAL PRIMARY KEY,
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    week_start DATE NOT NULL,
+                    muscle_group VARCHAR(50) NOT NULL,
+                    sets INTEGER NOT NULL DEFAULT 0,
+                    reps INTEGER NOT NULL DEFAULT 0,
+                    tonnage DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    exercises INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (user_id, week_start, muscle_group)
+                )
+            """)
+
+            # Histórico do agendador: uma linha por (tarefa, horário agendado) garante execução única
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS scheduler_runs (
+                    id SERIAL PRIMARY KEY,
+                    job_name VARCHAR(100) NOT NULL,
+                    slot TIMESTAMP NOT NULL,
+                    worker VARCHAR(255) NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'running',
+                    started_at TIMESTAMP NOT NULL,
+                    finished_at TIMESTAMP,
+                    duration_ms INTEGER,
+                    result TEXT,
+                    error TEXT,
+                    UNIQUE (job_name, slot)
+                )
+            """)
+
+            # Outbox de eventos de domínio e entregas já feitas por handler
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS outbox_events (
+                    id BIGSERIAL PRIMARY KEY,
+                    event_type VARCHAR(100) NOT NULL,
+                    user_id INTEGER,
+                    payload TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    available_at TIMESTAMP NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    locked_until TIMESTAMP,
+                    processed_at TIMESTAMP,
+                    failed_at TIMESTAMP,
+                    last_error TEXT
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_outbox_events_pending
+                ON outbox_events (available_at) WHERE processed_at IS NULL AND failed_at IS NULL
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS processed_events (
+                    event_id BIGINT NOT NULL,
+                    handler VARCHAR(100) NOT NULL,
+                    processed_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (event_id, handler)
+                )
+            """)
+
+            # Conquistas: contadores incrementais, membros já contados e desbloqueios
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS achievement_counters (
+                    id SERIAL PRIMARY KEY,
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    counter VARCHAR(50) NOT NULL,
+                    value DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    last_day DATE,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (user_id, counter)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS achievement_members (
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    counter VARCHAR(50) NOT NULL,
+                    member VARCHAR(255) NOT NULL,
+                    PRIMARY KEY (user_id, counter, member)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS user_achievements (
+                    id SERIAL PRIMARY KEY,
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    code VARCHAR(50) NOT NULL,
+                    unlocked_at TIMESTAMP NOT NULL,
+                    UNIQUE (user_id, code)
+                )
+            """)
+
+            # Chaves de idempotência (upload offline de sessões) com a resposta gravada
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    id SERIAL PRIMARY KEY,
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    idempotency_key VARCHAR(255) NOT NULL,
+                    request_hash VARCHAR(64) NOT NULL,
+                    status_code INTEGER,
+                    response TEXT,
+                    created_at TIMESTAMP NOT NULL,
+                    expires_at TIMESTAMP NOT NULL,
+                    UNIQUE (user_id, idempotency_key)
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at)
+            """)
+
             # Tabela de dashboard data
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS dashboard_data (
@@ -166,5 +761,18 @@ class Database:
                 )
             """)
 
+            # Registro de mudanças para a sincronização incremental (triggers + backfill)
+            change_tracking.install(cursor, self.dialect)
+
+    def _has_column(self, cursor, table: str, column: str) -> bool:
+        if self.dialect == "postgresql":
+            cursor.execute("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s
+            """, (table, column))
+            return cursor.fetchone() is not None
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row['name'] == column for row in cursor.fetchall())
+
 # Instância global do database
 db = Database()
@@ -0,0 +1,177 @@
+"""Fan-out do pub/sub entre workers via LISTEN/NOTIFY do Postgres.
+
+O `serve.py` sobe um worker por CPU, e cada worker tem o próprio `pubsub`
+em memória: sem a ponte, um cliente SSE conectado ao worker A não veria os
+eventos das requisições atendidas pelo B. A ponte mantém uma conexão
+dedicada (fora do pool) em `LISTEN` no canal `EVENTS_CHANNEL`; cada
+publicação local vira um `pg_notify` nessa conexão, e as notificações dos
+outros workers são entregues aos assinantes e listeners locais (o que também
+invalida os caches por worker, como o de analytics).
+
+O NOTIFY sai depois do commit da requisição (os eventos são publicados com
+`db.after_commit`). Enquanto a conexão estiver caída, eventos de outros
+workers se perdem; os clientes SSE já tratam isso relendo o estado ao
+reconectar. Payloads acima do limite do NOTIFY ficam no worker de origem.
+No SQLite não há ponte: os eventos ficam no processo (um worker).
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, Optional
+
+import psycopg2
+from fastapi.concurrency import run_in_threadpool
+from psycopg2 import sql
+
+from app.core.config import settings
+from app.infrastructure.database import Database, db
+from app.infrastructure.pubsub import PubSub, pubsub
+
+logger = logging.getLogger(__name__)
+
+# Limite do payload do NOTIFY no Postgres (8000 bytes)
+MAX_PAYLOAD_BYTES = 7999
+
+
+class EventBridge:
+    def __init__(self, database: Database, bus: PubSub, channel: str = None):
+        self.db = database
+        self.bus = bus
+        self.channel = channel or settings.EVENTS_CHANNEL
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self.forwarded = 0
+        self.received = 0
+        self._conn = None
+        self._fd: Optional[int] = None
+        # A conexão é usada pelo loop (poll) e por threads que publicam (NOTIFY)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.db.dialect != "postgresql" or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.bus.set_forwarder(self.forward)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        self.bus.set_forwarder(None)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._disconnect()
+
+    # Recebimento
+
+    async def _listen(self):
+        while True:
+            lost = self._loop.create_future()
+            try:
+                await run_in_threadpool(self._connect)
+                self._loop.add_reader(self._fd, self._on_readable, lost)
+                logger.info("Ponte de eventos ouvindo o canal %s", self.channel)
+                await lost
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Ponte de eventos desconectada: %s", e)
+            finally:
+                self._disconnect()
+            await asyncio.sleep(settings.EVENTS_BRIDGE_RETRY_SECONDS)
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.db.backend.connection_params)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+        with self._lock:
+            self._conn, self._fd = conn, conn.fileno()
+
+    def _disconnect(self):
+        with self._lock:
+            conn, fd = self._conn, self._fd
+            self._conn = self._fd = None
+        if fd is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(fd)
+        if conn is not None:
+            try:
+                conn.close()
+            except psycopg2.Error:
+                pass
+
+    def _on_readable(self, lost: asyncio.Future):
+        try:
+            with self._lock:
+                if self._conn is None:
+                    return
+                self._conn.poll()
+        except Exception as e:
+            if self._fd is not None:
+                self._loop.remove_reader(self._fd)
+            if not lost.done():
+                lost.set_exception(e)
+            return
+        self._drain()
+
+    def _drain(self):
+        """Entrega as notificações recebidas (no event loop)"""
+        with self._lock:
+            if self._conn is None:
+                return
+            notifies = list(self._conn.notifies)
+            self._conn.notifies.clear()
+        for notify in notifies:
+            try:
+                message = json.loads(notify.payload)
+            except ValueError:
+                logger.warning("Notificação de evento inválida ignorada")
+                continue
+            if message.get("origin") == self.origin:
+                continue
+            self.received += 1
+            self.bus.publish_local(message["user_id"], message["event"], message.get("data") or {})
+
+    # Envio
+
+    def forward(self, user_id: int, event: str, data: Dict[str, Any]):
+        """Repasse de uma publicação local (chamado pelo pubsub, de qualquer thread)"""
+        payload = json.dumps(
+            {"origin": self.origin, "user_id": user_id, "event": event, "data": data}, default=str
+        )
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            logger.warning("Evento %s grande demais para o NOTIFY; entregue só neste worker", event)
+            return
+        with self._lock:
+            conn = self._conn
+            if conn is None or conn.closed:
+                return
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except psycopg2.Error as e:
+                logger.warning("Falha no NOTIFY do evento %s: %s", event, e)
+                return
+            self.forwarded += 1
+            pending = bool(conn.notifies)
+        if pending and self._loop is not None and not self._loop.is_closed():
+            # Notificações lidas junto com a resposta do NOTIFY não acordam o reader
+            self._loop.call_soon_threadsafe(self._drain)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self._conn is not None,
+            "forwarded": self.forwarded,
+            "received": self.received,
+        }
+
+
+# Instância global
+event_bridge = EventBridge(db, pubsub)
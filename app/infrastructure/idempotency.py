@@ -0,0 +1,57 @@
+"""Chaves de idempotência com a resposta gravada.
+
+A chave é reservada na mesma transação da escrita que ela protege: se a
+transação cair, a reserva some junto e o cliente pode repetir. Uma chave já
+usada devolve a resposta gravada; a mesma chave com outro conteúdo
+(`request_hash` diferente) é conflito. No Postgres, duas requisições
+simultâneas com a mesma chave se serializam no índice único: a segunda
+espera o commit da primeira e lê a resposta dela.
+"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.infrastructure.database import Database, db
+
+
+def request_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, database: Database, ttl_hours: int = None):
+        self.db = database
+        self.ttl_hours = settings.IDEMPOTENCY_KEY_TTL_HOURS if ttl_hours is None else ttl_hours
+
+    def claim(self, cursor, user_id: int, key: str, body_hash: str) -> Optional[Dict]:
+        """Reserva a chave na transação do chamador; None se é nova, senão a linha já gravada"""
+        now = datetime.utcnow()
+        cursor.execute("""
+            INSERT INTO idempotency_keys (user_id, idempotency_key, request_hash, created_at, expires_at)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (user_id, idempotency_key) DO NOTHING
+        """, (user_id, key, body_hash, now, now + timedelta(hours=self.ttl_hours)))
+        if cursor.rowcount == 1:
+            return None
+        cursor.execute("""
+            SELECT request_hash, status_code, response FROM idempotency_keys
+            WHERE user_id = %s AND idempotency_key = %s
+        """, (user_id, key))
+        return cursor.fetchone()
+
+    def store(self, cursor, user_id: int, key: str, status_code: int, response: str):
+        """Grava a resposta da chave reservada, na mesma transação"""
+        cursor.execute("""
+            UPDATE idempotency_keys SET status_code = %s, response = %s
+            WHERE user_id = %s AND idempotency_key = %s
+        """, (status_code, response, user_id, key))
+
+    def prune(self) -> int:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("DELETE FROM idempotency_keys WHERE expires_at < %s", (datetime.utcnow(),))
+            return cursor.rowcount
+
+
+# Instância global das chaves de idempotência
+idempotency_store = IdempotencyStore(db)
@@ -0,0 +1,197 @@
+"""Outbox transacional: eventos de domínio gravados junto com a mudança e entregues depois.
+
+`OutboxRelay.publish(cursor, event)` insere o evento em `outbox_events` na
+transação do chamador; a requisição faz uma escrita e retorna. O relay roda
+em cada worker, acordado pelo commit ou a cada `OUTBOX_POLL_INTERVAL_MS`, e
+reivindica lotes com `FOR UPDATE SKIP LOCKED` + lease (`locked_until`), de
+modo que workers diferentes nunca pegam o mesmo evento ao mesmo tempo.
+
+Entrega pelo menos uma vez: um evento cujo lease expira (worker caiu) volta
+para a fila. Os handlers são idempotentes por construção: cada um roda em
+uma transação que também grava (evento, handler) em `processed_events`, e
+é pulado se essa linha já existe. Falhas voltam com backoff exponencial; após
+`OUTBOX_MAX_ATTEMPTS` tentativas o evento fica marcado com `failed_at`.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.domain.events import DomainEvent, deserialize
+from app.infrastructure.database import Database
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any, DomainEvent], None]
+
+
+class OutboxRelay:
+    def __init__(self, database: Database, batch_size: int = None, poll_interval_ms: int = None,
+                 lease_seconds: int = None, max_attempts: int = None):
+        self.db = database
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.poll_interval = (poll_interval_ms or settings.OUTBOX_POLL_INTERVAL_MS) / 1000
+        self.lease = timedelta(seconds=lease_seconds or settings.OUTBOX_LEASE_SECONDS)
+        self.max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+        # event_type -> [(nome do handler, handler)]
+        self._handlers: Dict[str, List[Tuple[str, Handler]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+
+    def register(self, event_type: str, name: str, handler: Handler):
+        """O nome identifica o handler em `processed_events`; não deve mudar"""
+        handlers = self._handlers.setdefault(event_type, [])
+        if any(existing == name for existing, _ in handlers):
+            raise ValueError(f"Handler já registrado para {event_type}: {name}")
+        handlers.append((name, handler))
+
+    def publish(self, cursor, event: DomainEvent):
+        """Grava o evento na transação do chamador; o relay é acordado após o commit"""
+        cursor.execute("""
+            INSERT INTO outbox_events (event_type, user_id, payload, created_at, available_at)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (event.event_type, event.user_id, event.to_json(), datetime.utcnow(), datetime.utcnow()))
+        self.db.after_commit(self.notify)
+
+    def notify(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    # Entrega
+
+    def _claim(self) -> List[Dict]:
+        now = datetime.utcnow()
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, event_type, user_id, payload, attempts
+                FROM outbox_events
+                WHERE processed_at IS NULL AND failed_at IS NULL AND available_at <= %s
+                  AND (locked_until IS NULL OR locked_until < %s)
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (now, now, self.batch_size))
+            rows = [dict(row) for row in cursor.fetchall()]
+            if rows:
+                placeholders = ", ".join(["%s"] * len(rows))
+                cursor.execute(f"""
+                    UPDATE outbox_events SET locked_until = %s, attempts = attempts + 1
+                    WHERE id IN ({placeholders})
+                """, (now + self.lease, *[row['id'] for row in rows]))
+        return rows
+
+    def _deliver(self, row: Dict):
+        try:
+            event = deserialize(row['event_type'], row['user_id'], row['payload'])
+            for name, handler in self._handlers.get(row['event_type'], ()):
+                with self.db.get_cursor(user_id=event.user_id) as cursor:
+                    cursor.execute("""
+                        INSERT INTO processed_events (event_id, handler, processed_at)
+                        VALUES (%s, %s, %s)
+                        ON CONFLICT (event_id, handler) DO NOTHING
+                    """, (row['id'], name, datetime.utcnow()))
+                    if cursor.rowcount == 0:
+                        # Já entregue a este handler em uma tentativa anterior
+                        continue
+                    handler(cursor, event)
+        except Exception as e:
+            attempts = row['attempts'] + 1
+            failed = attempts >= self.max_attempts
+            retry_at = datetime.utcnow() + timedelta(seconds=min(2 ** attempts, 3600))
+            if failed:
+                self.failed += 1
+                logger.error("Evento %s (%s) descartado após %d tentativas: %s",
+                             row['id'], row['event_type'], attempts, e)
+            else:
+                self.retried += 1
+                logger.warning("Falha ao entregar evento %s (%s), tentativa %d: %s",
+                               row['id'], row['event_type'], attempts, e)
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    UPDATE outbox_events
+                    SET locked_until = NULL, available_at = %s, last_error = %s, failed_at = %s
+                    WHERE id = %s
+                """, (retry_at, f"{e.__class__.__name__}: {e}"[:1000],
+                      datetime.utcnow() if failed else None, row['id']))
+            return
+
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE outbox_events SET processed_at = %s, locked_until = NULL, last_error = NULL
+                WHERE id = %s
+            """, (datetime.utcnow(), row['id']))
+        self.delivered += 1
+
+    def drain(self) -> int:
+        """Entrega um lote; retorna quantos eventos foram reivindicados"""
+        rows = self._claim()
+        for row in rows:
+            self._deliver(row)
+        return len(rows)
+
+    def prune(self, older_than_days: int = None) -> int:
+        """Apaga eventos entregues há mais de `older_than_days` dias"""
+        older_than_days = settings.OUTBOX_RETENTION_DAYS if older_than_days is None else older_than_days
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM processed_events WHERE event_id IN (
+                    SELECT id FROM outbox_events WHERE processed_at < %s
+                )
+            """, (cutoff,))
+            cursor.execute("DELETE FROM outbox_events WHERE processed_at < %s", (cutoff,))
+            return cursor.rowcount
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                break
+            self._wakeup.clear()
+            try:
+                # Lote cheio: provavelmente há mais eventos esperando
+                while await run_in_threadpool(self.drain) >= self.batch_size:
+                    pass
+            except Exception as e:
+                logger.warning("Falha ao drenar o outbox (%s); nova tentativa no próximo ciclo", e)
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Sem cancel(): no 3.11 o wait_for pode engolir o cancelamento se o
+            # wakeup chegar junto, e o loop seguiria rodando no shutdown
+            self._stopping = True
+            self._wakeup.set()
+            task, self._task = self._task, None
+            await task  # termina a drenagem em andamento antes da final
+            self._loop = None
+            try:
+                await run_in_threadpool(self.drain)
+            except Exception as e:
+                logger.warning("Eventos pendentes no outbox ficam para o próximo worker: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
@@ -0,0 +1,220 @@
+"""Particionamento mensal de `workout_sessions` e `workout_exercises` (Postgres).
+
+As duas tabelas são particionadas por RANGE no início da sessão:
+`workout_sessions.started_at` e `workout_exercises.session_started_at` (cópia
+do `started_at` da sessão, gravada no INSERT do exercício). Cada mês vira um
+par de partições `<tabela>_pAAAA_MM`, e a FK composta
+`(session_id, session_started_at) -> (id, started_at)` mantém as duas
+alinhadas. Consultas filtradas por data leem só as partições do período.
+
+Uma partição DEFAULT recebe linhas fora dos meses criados (sessões offline
+antigas, datas futuras); ao criar o mês, as linhas correspondentes são
+movidas para a nova partição. Partições antigas são desanexadas para o
+schema de arquivo (`PARTITION_ARCHIVE_SCHEMA`), onde saem das consultas,
+do autovacuum e da manutenção de índices das tabelas quentes.
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import List, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (tabela, coluna de partição)
+TABLES = (("workout_sessions", "started_at"), ("workout_exercises", "session_started_at"))
+
+_PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def create_partitioned_tables(cursor):
+    """Cria as tabelas já particionadas (no-op se existirem, particionadas ou não)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS workout_sessions (
+            id SERIAL,
+            user_id INTEGER REFERENCES users(id),
+            workout_id INTEGER REFERENCES workouts(id),
+            started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            duration INTEGER,
+            xp_earned INTEGER DEFAULT 0,
+            is_completed BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, started_at)
+        ) PARTITION BY RANGE (started_at)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS workout_exercises (
+            id SERIAL,
+            session_id INTEGER NOT NULL,
+            session_started_at TIMESTAMP NOT NULL,
+            exercise_name VARCHAR(255) NOT NULL,
+            muscle_group VARCHAR(50),
+            sets INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            weight DECIMAL(5,2) DEFAULT 0,
+            completed_sets INTEGER DEFAULT 0,
+            is_completed BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, session_started_at),
+            -- Diferida: mover linhas entre a DEFAULT e um mês novo passa por estados intermediários
+            FOREIGN KEY (session_id, session_started_at)
+                REFERENCES workout_sessions (id, started_at) DEFERRABLE INITIALLY DEFERRED
+        ) PARTITION BY RANGE (session_started_at)
+    """)
+    if not is_partitioned(cursor, "workout_sessions"):
+        return
+    for table, _ in TABLES:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_workout_sessions_user_started
+        ON workout_sessions (user_id, started_at)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_workout_exercises_session
+        ON workout_exercises (session_id, session_started_at)
+    """)
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute("""
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace
+    """, (table,))
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table: str) -> List[Tuple[str, date]]:
+    """Partições mensais anexadas (nome, primeiro dia do mês), em ordem"""
+    cursor.execute("""
+        SELECT child.relname AS name
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = %s AND parent.relnamespace = 'public'::regnamespace
+    """, (table,))
+    partitions = []
+    for row in cursor.fetchall():
+        match = _PARTITION_NAME.search(row['name'])
+        if match:
+            partitions.append((row['name'], date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_month(cursor, month: date):
+    """Cria o par de partições do mês, movendo linhas que estejam na DEFAULT"""
+    lower, upper = month, add_months(month, 1)
+    for table, column in TABLES:
+        name = partition_name(table, month)
+        cursor.execute("SELECT to_regclass(%s) AS oid", (f"public.{name}",))
+        if cursor.fetchone()['oid'] is not None:
+            continue
+        cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(f"""
+            WITH moved AS (
+                DELETE FROM {table}_default WHERE {column} >= %s AND {column} < %s RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """, (lower, upper))
+        if cursor.rowcount:
+            logger.info("%s linhas movidas da partição default para %s", cursor.rowcount, name)
+        cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+                       (lower, upper))
+
+
+def ensure_partitions(cursor, months_ahead: int = None, today: date = None):
+    """Garante as partições do mês corrente e dos próximos `months_ahead` meses"""
+    months_ahead = settings.PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+    current = month_start(today or datetime.utcnow().date())
+    for offset in range(months_ahead + 1):
+        create_month(cursor, add_months(current, offset))
+
+
+def archive_partitions(cursor, older_than_months: int = None, today: date = None) -> List[str]:
+    """Desanexa meses anteriores ao corte e os move para o schema de arquivo"""
+    older_than_months = settings.PARTITION_ARCHIVE_AFTER_MONTHS if older_than_months is None else older_than_months
+    cutoff = add_months(month_start(today or datetime.utcnow().date()), -older_than_months)
+    schema = settings.PARTITION_ARCHIVE_SCHEMA
+    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+
+    archived = []
+    months = [month for _, month in list_partitions(cursor, "workout_sessions") if month < cutoff]
+    for month in months:
+        # Exercícios primeiro: a FK aponta para as sessões
+        for table, _ in reversed(TABLES):
+            name = partition_name(table, month)
+            cursor.execute("SELECT to_regclass(%s) AS oid", (f"public.{name}",))
+            if cursor.fetchone()['oid'] is None:
+                continue
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+            cursor.execute("""
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = %s::regclass AND contype = 'f'
+            """, (f"public.{name}",))
+            for constraint in cursor.fetchall():
+                cursor.execute(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint["conname"]}"')
+            cursor.execute(f"ALTER TABLE {name} SET SCHEMA {schema}")
+            archived.append(f"{schema}.{name}")
+    if archived:
+        logger.info("Partições arquivadas: %s", ", ".join(archived))
+    return archived
+
+
+def migrate_to_partitioned(cursor, months_ahead: int = None):
+    """Converte tabelas comuns existentes em particionadas, copiando os dados"""
+    if is_partitioned(cursor, "workout_sessions"):
+        return False
+
+    for table, _ in TABLES:
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+    create_partitioned_tables(cursor)
+
+    cursor.execute("SELECT MIN(started_at) AS first FROM workout_sessions_legacy")
+    first = cursor.fetchone()['first']
+    current = month_start(datetime.utcnow().date())
+    month = month_start(first.date()) if first else current
+    while month <= current:
+        create_month(cursor, month)
+        month = add_months(month, 1)
+    ensure_partitions(cursor, months_ahead)
+
+    cursor.execute("""
+        INSERT INTO workout_sessions
+            (id, user_id, workout_id, started_at, completed_at, duration, xp_earned, is_completed, created_at, updated_at)
+        SELECT id, user_id, workout_id, started_at, completed_at, duration, xp_earned, is_completed, created_at, updated_at
+        FROM workout_sessions_legacy
+    """)
+    cursor.execute("""
+        INSERT INTO workout_exercises
+            (id, session_id, session_started_at, exercise_name, muscle_group, sets, reps, weight, completed_sets,
+             is_completed, created_at, updated_at)
+        SELECT we.id, we.session_id, ws.started_at, we.exercise_name, we.muscle_group, we.sets, we.reps, we.weight,
+               we.completed_sets, we.is_completed, we.created_at, we.updated_at
+        FROM workout_exercises_legacy we
+        JOIN workout_sessions_legacy ws ON ws.id = we.session_id
+    """)
+    for table, _ in TABLES:
+        cursor.execute(f"""
+            SELECT setval(pg_get_serial_sequence('{table}', 'id'),
+                          COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)
+        """)
+    for table, _ in reversed(TABLES):
+        cursor.execute(f"DROP TABLE {table}_legacy")
+    return True
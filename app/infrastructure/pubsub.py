@@ -0,0 +1,145 @@
+"""Pub/sub em processo para eventos por usuário (SSE e listeners internos).
+
+Cada assinante tem uma fila limitada (`EVENTS_QUEUE_SIZE`). Um consumidor
+lento que enche a fila é desconectado: a fila é esvaziada e recebe o
+marcador de fim, e o cliente reconecta e busca o estado atual. Assim um
+cliente travado nunca segura memória nem atrasa os demais.
+
+`publish` pode ser chamado de qualquer thread (handlers síncronos rodam no
+threadpool); a entrega às filas acontece sempre no event loop.
+
+Cada worker tem o próprio pub/sub. Com o Postgres, a ponte
+(`app.infrastructure.event_bridge`) repassa as publicações aos demais workers,
+que as entregam com `publish_local`; no SQLite os eventos ficam no processo.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Marcador de fim de stream (consumidor descartado ou shutdown)
+CLOSED = None
+
+
+class Subscription:
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        return await self.queue.get()
+
+
+class PubSub:
+    def __init__(self, queue_size: int = None):
+        self.queue_size = queue_size or settings.EVENTS_QUEUE_SIZE
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._listeners: List[Callable[[int, str, Dict[str, Any]], None]] = []
+        # Repasse para os outros workers (ponte LISTEN/NOTIFY), se houver
+        self._forward: Optional[Callable[[int, str, Dict[str, Any]], None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Deve ser chamado no event loop"""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def add_listener(self, listener: Callable[[int, str, Dict[str, Any]], None]):
+        """Listener síncrono chamado em toda publicação (ex.: invalidação de cache)"""
+        self._listeners.append(listener)
+
+    def set_forwarder(self, forward: Optional[Callable[[int, str, Dict[str, Any]], None]]):
+        self._forward = forward
+
+    def publish(self, user_id: int, event: str, data: Optional[Dict[str, Any]] = None):
+        """Entrega neste worker e repassa aos demais"""
+        data = data or {}
+        self.publish_local(user_id, event, data)
+        forward = self._forward
+        if forward is not None:
+            try:
+                forward(user_id, event, data)
+            except Exception:
+                logger.exception("Falha ao repassar evento %s aos outros workers", event)
+
+    def publish_local(self, user_id: int, event: str, data: Dict[str, Any]):
+        """Listeners e assinantes deste worker (eventos locais e vindos da ponte)"""
+        self.published += 1
+        for listener in self._listeners:
+            try:
+                listener(user_id, event, data)
+            except Exception:
+                logger.exception("Listener de eventos falhou (%s)", event)
+
+        with self._lock:
+            if not self._subscribers.get(user_id):
+                return
+        message = {"event": event, "data": data}
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(user_id, message)
+        else:
+            loop.call_soon_threadsafe(self._deliver, user_id, message)
+
+    def _deliver(self, user_id: int, message: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        self.dropped += 1
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(CLOSED)
+        logger.info("Assinante lento descartado (usuário %s)", subscription.user_id)
+
+    def close(self):
+        """Encerra todos os streams (shutdown)"""
+        with self._lock:
+            subscriptions = [s for subscribers in self._subscribers.values() for s in subscribers]
+            self._subscribers.clear()
+        for subscription in subscriptions:
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(CLOSED)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            subscribers = sum(len(s) for s in self._subscribers.values())
+        return {"subscribers": subscribers, "published": self.published, "dropped": self.dropped}
+
+
+# Instância global
+pubsub = PubSub()
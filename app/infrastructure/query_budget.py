@@ -0,0 +1,189 @@
+"""Orçamento de tempo das consultas por rota e cancelamento na desconexão.
+
+O `QueryBudgetMiddleware` escolhe o orçamento pelo prefixo mais longo da
+rota em `QUERY_BUDGETS` e o guarda em um contextvar. O `Database` aplica o
+orçamento em cada transação: `SET LOCAL statement_timeout` no Postgres e um
+progress handler com prazo no SQLite (onde o limite vale para o bloco
+`get_cursor` inteiro).
+
+O middleware também observa a desconexão do cliente: quando ela chega, as
+consultas em andamento da requisição são canceladas (`connection.cancel()`
+no psycopg2, `interrupt()` no SQLite) e novos `get_cursor` falham na hora.
+Isso só é possível quando o handler roda fora do event loop (rotas `def`),
+por isso as rotas caras de leitura são síncronas. Estouros e cancelamentos
+são contados por prefixo e aparecem em `GET /health`.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+import psycopg2
+import psycopg2.errors
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["QueryBudget"]] = ContextVar("query_budget", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """Consulta cancelada por estourar o orçamento da rota ou por desconexão do cliente"""
+
+    def __init__(self, route: str, timeout_ms: int, disconnected: bool = False):
+        self.route = route
+        self.timeout_ms = timeout_ms
+        self.disconnected = disconnected
+        reason = "cliente desconectou" if disconnected else f"limite de {timeout_ms} ms"
+        super().__init__(f"Consulta cancelada em {route} ({reason})")
+
+
+class BudgetStats:
+    """Contadores de estouro e cancelamento por prefixo de rota"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timeouts: Dict[str, int] = defaultdict(int)
+        self.disconnects: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, disconnected: bool):
+        with self._lock:
+            if disconnected:
+                self.disconnects[route] += 1
+            else:
+                self.timeouts[route] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budgets_ms": dict(settings.QUERY_BUDGETS),
+                "timeouts": dict(self.timeouts),
+                "cancelled_on_disconnect": dict(self.disconnects),
+            }
+
+
+budget_stats = BudgetStats()
+
+
+class QueryBudget:
+    def __init__(self, route: str, timeout_ms: int):
+        self.route = route
+        self.timeout_ms = timeout_ms
+        self.disconnected = False
+        self._lock = threading.Lock()
+        # conexão -> função que cancela a consulta em andamento nela
+        self._active: Dict[int, Callable[[], None]] = {}
+
+    def attach(self, conn, cancel: Callable[[], None]):
+        with self._lock:
+            self._active[id(conn)] = cancel
+
+    def detach(self, conn):
+        with self._lock:
+            self._active.pop(id(conn), None)
+
+    def check(self):
+        if self.disconnected:
+            raise QueryBudgetExceeded(self.route, self.timeout_ms, disconnected=True)
+
+    def disconnect(self) -> int:
+        """Cliente foi embora: cancela o que estiver rodando"""
+        with self._lock:
+            self.disconnected = True
+            cancels = list(self._active.values())
+        for cancel in cancels:
+            try:
+                cancel()
+            except Exception as e:
+                logger.warning("Falha ao cancelar consulta de %s: %s", self.route, e)
+        return len(cancels)
+
+    def translate(self, error: Exception) -> Optional[QueryBudgetExceeded]:
+        """Converte o erro de cancelamento do driver em QueryBudgetExceeded (None se for outro erro)"""
+        if isinstance(error, QueryBudgetExceeded):
+            return None
+        cancelled = isinstance(error, psycopg2.errors.QueryCanceled) or (
+            isinstance(error, sqlite3.OperationalError) and "interrupted" in str(error)
+        )
+        if not cancelled:
+            return None
+        budget_stats.record(self.route, self.disconnected)
+        if not self.disconnected:
+            logger.warning("Consulta estourou o orçamento de %d ms em %s", self.timeout_ms, self.route)
+        return QueryBudgetExceeded(self.route, self.timeout_ms, self.disconnected)
+
+    def sqlite_handler(self) -> Callable[[], int]:
+        """Progress handler do SQLite: aborta após o prazo ou na desconexão"""
+        deadline = time.monotonic() + self.timeout_ms / 1000
+
+        def handler() -> int:
+            return 1 if self.disconnected or time.monotonic() > deadline else 0
+        return handler
+
+
+def current_budget() -> Optional[QueryBudget]:
+    return _current.get()
+
+
+def resolve_budget(path: str) -> Optional[QueryBudget]:
+    best = None
+    for prefix in settings.QUERY_BUDGETS:
+        if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    if best is None or settings.QUERY_BUDGETS[best] <= 0:
+        return None
+    return QueryBudget(best, settings.QUERY_BUDGETS[best])
+
+
+class QueryBudgetMiddleware:
+    """Middleware ASGI: define o orçamento da rota e cancela consultas se o cliente desconectar"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        budget = resolve_budget(scope["path"]) if scope["type"] == "http" else None
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Corpo lido antes do handler; depois disso, `receive` só traz a desconexão
+        pending = []
+        while True:
+            message = await receive()
+            pending.append(message)
+            if message["type"] != "http.request" or not message.get("more_body"):
+                break
+        disconnected = asyncio.Event()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+
+        async def watch():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    cancelled = budget.disconnect()
+                    if cancelled:
+                        logger.info("Cliente desconectou; %d consulta(s) cancelada(s) em %s", cancelled, budget.route)
+                    disconnected.set()
+                    return
+
+        async def replay():
+            if pending:
+                return pending.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        token = _current.set(budget)
+        watcher = None if disconnected.is_set() else asyncio.create_task(watch())
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            _current.reset(token)
@@ -0,0 +1,238 @@
+"""Cache de resultados de consultas com invalidação por tag.
+
+Opt-in por consulta: `cursor.execute(sql, params, cache=True)`. A chave é a
+impressão digital do SQL (espaços normalizados) + parâmetros + `user_id` do
+`get_cursor`, e a entrada recebe as tags (tabela, user_id) das tabelas lidas
+no FROM/JOIN. O cursor registra as tabelas escritas (INSERT/UPDATE/DELETE/
+DDL) e, no commit, invalida as entradas dessas tabelas: só as do usuário
+(e as sem usuário) quando a escrita tem `user_id`, todas quando não tem.
+
+Uma versão por tabela evita guardar resultado lido antes de um commit
+concorrente. O cache é por processo: escritas de outros workers só são
+vistas ao expirar o TTL (`QUERY_CACHE_TTL_SECONDS`).
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+_READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w.]*)", re.IGNORECASE)
+_WRITE_TABLES = re.compile(
+    r"\b(?:INSERT\s+INTO|DELETE\s+FROM|(?<!DO\s)(?<!FOR\s)UPDATE|TRUNCATE(?:\s+TABLE)?|"
+    r"ALTER\s+TABLE(?:\s+IF\s+EXISTS)?|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+(?:ONLY\s+)?([A-Za-z_][\w.]*)",
+    re.IGNORECASE,
+)
+_WRITE_HINT = re.compile(r"\b(?:INSERT|UPDATE|DELETE|TRUNCATE|ALTER|DROP)\b", re.IGNORECASE)
+_NOT_TABLES = {"set", "of", "skip", "nowait", "lateral", "select"}
+# Consultas enormes (execute_values) só têm o nome da tabela no começo
+_SCAN_LIMIT = 4096
+
+
+def _table(name: str) -> str:
+    return name.rsplit(".", 1)[-1].lower()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    return " ".join(query.split())
+
+
+@lru_cache(maxsize=2048)
+def read_tables(query: str) -> FrozenSet[str]:
+    return frozenset(_table(name) for name in _READ_TABLES.findall(query) if name.lower() not in _NOT_TABLES)
+
+
+def written_tables(query) -> Set[str]:
+    if isinstance(query, bytes):
+        query = query[:_SCAN_LIMIT].decode("utf-8", "ignore")
+    else:
+        query = query[:_SCAN_LIMIT]
+    if not _WRITE_HINT.search(query):
+        return set()
+    return {_table(name) for name in _WRITE_TABLES.findall(query) if name.lower() not in _NOT_TABLES}
+
+
+class QueryCache:
+    """LRU com TTL; entradas indexadas por (tabela, user_id) para invalidação"""
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None, max_rows: int = None,
+                 enabled: bool = None):
+        self.enabled = settings.QUERY_CACHE_ENABLED if enabled is None else enabled
+        self.max_entries = max_entries or settings.QUERY_CACHE_MAX_ENTRIES
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.QUERY_CACHE_TTL_SECONDS
+        self.max_rows = max_rows or settings.QUERY_CACHE_MAX_ROWS
+        # chave -> (expira_em, linhas, tags)
+        self._entries: "OrderedDict[Tuple, Tuple[float, Tuple[Dict, ...], FrozenSet]]" = OrderedDict()
+        self._by_tag: Dict[Tuple[str, Optional[int]], Set[Tuple]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def versions(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def get(self, key: Tuple) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            rows = entry[1]
+        return [dict(row) for row in rows]
+
+    def put(self, key: Tuple, rows: List[Dict], tables: FrozenSet[str], user_id: Optional[int],
+            versions: Tuple[int, ...]) -> bool:
+        """Guarda o resultado se nenhuma das tabelas foi invalidada desde o início da leitura"""
+        if len(rows) > self.max_rows:
+            return False
+        tags = frozenset((table, user_id) for table in tables)
+        with self._lock:
+            if self.versions(tables) != versions:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tuple(dict(row) for row in rows), tags)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def invalidate(self, tables: Iterable[str], user_id: Optional[int] = None) -> int:
+        """Escrita com user_id derruba as entradas do usuário e as sem dono; sem user_id, a tabela toda"""
+        removed = 0
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                if user_id is None:
+                    tags = [tag for tag in self._by_tag if tag[0] == table]
+                else:
+                    tags = [(table, user_id), (table, None)]
+                for tag in tags:
+                    for key in list(self._by_tag.get(tag, ())):
+                        self._remove(key)
+                        removed += 1
+            self.invalidations += removed
+        return removed
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def prune(self) -> int:
+        """Remove as entradas expiradas (sem esperar o próximo acesso)"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry[0] <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class CachingCursor:
+    """Cursor do `get_cursor`: registra tabelas escritas e atende `execute(..., cache=True)`"""
+
+    def __init__(self, cursor, cache: QueryCache, user_id: Optional[int]):
+        self._cursor = cursor
+        self._cache = cache
+        self._user_id = user_id
+        self._rows: Optional[List[Dict]] = None
+        self.written: Set[str] = set()
+
+    def execute(self, query, params=None, cache: bool = False):
+        self._rows = None
+        if self._cache.enabled:
+            if cache and not self.written and isinstance(query, str):
+                return self._execute_cached(query, params)
+            self.written |= written_tables(query)
+        return self._cursor.execute(query, params)
+
+    def executemany(self, query, params_list):
+        self._rows = None
+        if self._cache.enabled:
+            self.written |= written_tables(query)
+        return self._cursor.executemany(query, params_list)
+
+    def _execute_cached(self, query: str, params):
+        tables = read_tables(query)
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        key = (fingerprint(query), tuple(params) if params is not None else None, self._user_id)
+        rows = self._cache.get(key)
+        if rows is None:
+            versions = self._cache.versions(tables)
+            self._cursor.execute(query, params)
+            rows = self._cursor.fetchall()
+            self._cache.put(key, rows, tables, self._user_id, versions)
+            rows = [dict(row) for row in rows]
+        self._rows = rows
+
+    def fetchone(self):
+        if self._rows is None:
+            return self._cursor.fetchone()
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        if self._rows is None:
+            return self._cursor.fetchall()
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size: int = None):
+        if self._rows is None:
+            return self._cursor.fetchmany(size) if size else self._cursor.fetchmany()
+        size = size or 1
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    @property
+    def rowcount(self) -> int:
+        if self._rows is not None:
+            return len(self._rows)
+        return self._cursor.rowcount
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,142 @@
+"""Conexão e transação únicas por requisição (unit of work).
+
+O `RequestScopeMiddleware` cria um escopo por requisição HTTP; rotas que
+declaram a dependência `unit_of_work` o ativam. Com o escopo ativo, todas as
+chamadas a `db.get_cursor` da requisição (autenticação, handler, serviços e
+chamadas aninhadas) usam a mesma conexão: blocos de escrita viram
+SAVEPOINTs, e o commit acontece uma vez, antes do início da resposta.
+Respostas 5xx e exceções não tratadas fazem rollback de tudo.
+
+Leituras `readonly` feitas antes de qualquer uso da conexão continuam indo
+para as réplicas, quando existem. Depois disso, elas entram na transação
+para enxergar as escritas ainda não confirmadas.
+
+As rotas fazem o I/O de banco de forma síncrona no event loop; o commit
+também é síncrono, para que a transação (e seus locks) nunca fique aberta
+enquanto o loop atende outra requisição que espera por esses locks. Pelo
+mesmo motivo, blocos executados em outras threads (rotas `def`,
+`run_in_threadpool`) não entram no escopo: abrem a própria transação e
+confirmam na thread, sem depender do loop. A exceção é o lote de leituras
+(`POST /api/batch`), que marca o escopo como `shared`: as sub-requisições
+rodam uma de cada vez, então a conexão nunca é usada por duas threads ao
+mesmo tempo.
+
+Numa rota `def`, a autenticação (async, no loop) abre a conexão do escopo e
+o handler roda depois, numa thread. Se o escopo até ali só leu, a thread
+devolve essa conexão ao pool antes de abrir a sua (`handoff_scope`): a
+requisição nunca segura duas conexões ao mesmo tempo.
+"""
+import itertools
+import json
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["RequestScope"]] = ContextVar("request_scope", default=None)
+
+
+class RequestScope:
+    def __init__(self):
+        self.enabled = False
+        self.closed = False
+        self.failed = False
+        self.backend = None
+        self.conn = None
+        self.budget = None
+        # (tabelas escritas, user_id) para invalidar o cache de consultas no commit
+        self.writes: List[Tuple[Set[str], Optional[int]]] = []
+        self.writers: Set[int] = set()
+        self.after_commit: List[Callable[[], None]] = []
+        # Aceita chamadas de outras threads (sub-requisições sequenciais do lote)
+        self.shared = False
+        self._savepoints = itertools.count(1)
+        # Thread do event loop, a única que usa a conexão do escopo
+        self.thread_id = threading.get_ident()
+
+    def next_savepoint(self) -> str:
+        return f"uow_{next(self._savepoints)}"
+
+
+def current_scope() -> Optional[RequestScope]:
+    """Escopo ativo da requisição corrente (None fora de rotas com unit_of_work)"""
+    scope = _current.get()
+    if scope is None or not scope.enabled or scope.closed:
+        return None
+    if scope.thread_id != threading.get_ident() and not scope.shared:
+        return None
+    return scope
+
+
+def handoff_scope() -> Optional[RequestScope]:
+    """Escopo da requisição visto de uma thread do handler (rota `def`), para devolver a conexão"""
+    scope = _current.get()
+    if scope is None or not scope.enabled or scope.closed or scope.shared:
+        return None
+    if scope.thread_id == threading.get_ident():
+        return None
+    return scope
+
+
+async def unit_of_work():
+    """Dependência: compartilha uma conexão e um commit entre as chamadas ao banco da requisição"""
+    scope = _current.get()
+    if scope is not None and not scope.closed:
+        scope.enabled = True
+
+
+class RequestScopeMiddleware:
+    """Middleware ASGI que abre o escopo e confirma a transação antes da resposta sair"""
+
+    def __init__(self, app, database):
+        self.app = app
+        self.database = database
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_scope = RequestScope()
+        token = _current.set(request_scope)
+        started = False
+        replaced = False
+
+        async def send_wrapper(message):
+            nonlocal started, replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start" and not started:
+                started = True
+                try:
+                    self._finish(request_scope, commit=message["status"] < 500)
+                except Exception:
+                    logger.exception("Falha no commit da requisição")
+                    replaced = True
+                    body = json.dumps({"detail": "Erro ao gravar a requisição"}).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [
+                            (b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode()),
+                        ],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not started:
+                self._finish(request_scope, commit=False)
+            _current.reset(token)
+
+    def _finish(self, request_scope: RequestScope, commit: bool):
+        if request_scope.conn is None:
+            request_scope.closed = True
+            return
+        self.database.close_scope(request_scope, commit)
@@ -0,0 +1,315 @@
+"""Agendador de tarefas periódicas em processo (asyncio, sem broker externo).
+
+Cada tarefa tem um gatilho de intervalo (`IntervalTrigger`) ou cron de cinco
+campos (`CronTrigger`), com jitter opcional. Os horários são alinhados ao
+relógio (UTC), então todos os workers calculam o mesmo horário agendado.
+
+Tarefas de cluster (`leader_only=True`) rodam só no líder: o worker que
+segura o advisory lock de sessão `SCHEDULER_LEADER_LOCK_KEY` no Postgres,
+em uma conexão própria fora do pool. Além disso, cada execução reivindica a
+linha (tarefa, horário) em `scheduler_runs`; se outro worker já a registrou
+(troca de líder no meio do caminho, SQLite com vários workers), a execução
+é pulada. Essa tabela guarda também o histórico. Tarefas locais
+(`leader_only=False`) rodam em todos os workers e não gravam histórico.
+
+As tarefas são funções síncronas executadas no threadpool, no máximo
+`SCHEDULER_MAX_CONCURRENCY` ao mesmo tempo; uma tarefa nunca se sobrepõe a
+si mesma.
+"""
+import asyncio
+import logging
+import math
+import os
+import random
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import psycopg2
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.infrastructure.database import Database
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class IntervalTrigger:
+    """A cada `seconds` segundos, alinhado à época Unix"""
+
+    def __init__(self, seconds: float, jitter: float = 0):
+        if seconds <= 0:
+            raise ValueError("Intervalo precisa ser positivo")
+        self.seconds = seconds
+        self.jitter = jitter
+
+    def next_slot(self, after: datetime) -> datetime:
+        elapsed = (after - _EPOCH).total_seconds()
+        return _EPOCH + timedelta(seconds=(math.floor(elapsed / self.seconds) + 1) * self.seconds)
+
+    def __repr__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+def _cron_field(spec: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in spec.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Campo cron inválido: {spec}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronTrigger:
+    """Expressão cron de cinco campos (minuto hora dia mês dia-da-semana), em UTC"""
+
+    def __init__(self, expression: str, jitter: float = 0):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expressão cron precisa de 5 campos: {expression}")
+        self.expression = expression
+        self.jitter = jitter
+        self.minutes = _cron_field(fields[0], 0, 59)
+        self.hours = _cron_field(fields[1], 0, 23)
+        self.days = _cron_field(fields[2], 1, 31)
+        self.months = _cron_field(fields[3], 1, 12)
+        # 0 e 7 são domingo
+        self.weekdays = {day % 7 for day in _cron_field(fields[4], 0, 7)}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, value: datetime) -> bool:
+        day = value.day in self.days
+        weekday = (value.weekday() + 1) % 7 in self.weekdays
+        # Como no cron: com os dois campos restritos, basta um deles
+        if not self._any_day and not self._any_weekday:
+            return day or weekday
+        return day and weekday
+
+    def next_slot(self, after: datetime) -> datetime:
+        value = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = value + timedelta(days=366 * 5)
+        while value < limit:
+            if value.month not in self.months:
+                value = (value.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(value):
+                value = value.replace(hour=0, minute=0) + timedelta(days=1)
+            elif value.hour not in self.hours:
+                value = value.replace(minute=0) + timedelta(hours=1)
+            elif value.minute not in self.minutes:
+                value += timedelta(minutes=1)
+            else:
+                return value
+        raise ValueError(f"Expressão cron sem próxima execução: {self.expression}")
+
+    def __repr__(self) -> str:
+        return f"cron '{self.expression}'"
+
+
+class Job:
+    def __init__(self, name: str, func: Callable[[], Any], trigger, leader_only: bool = True):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.leader_only = leader_only
+        self.running = False
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_duration_ms: Optional[int] = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "trigger": repr(self.trigger),
+            "leader_only": self.leader_only,
+            "running": self.running,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "last_duration_ms": self.last_duration_ms,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+        }
+
+
+class Scheduler:
+    def __init__(self, database: Database, max_concurrency: int = None, lock_key: int = None):
+        self.db = database
+        self.max_concurrency = max_concurrency or settings.SCHEDULER_MAX_CONCURRENCY
+        self.lock_key = settings.SCHEDULER_LEADER_LOCK_KEY if lock_key is None else lock_key
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.jobs: Dict[str, Job] = {}
+        self.is_leader = False
+        self._leader_conn = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._runs: Set[asyncio.Task] = set()
+
+    def add_job(self, name: str, func: Callable[[], Any], trigger, leader_only: bool = True) -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Tarefa já registrada: {name}")
+        job = Job(name, func, trigger, leader_only)
+        self.jobs[name] = job
+        return job
+
+    # Eleição de líder
+
+    def _try_lead(self) -> bool:
+        if self.db.dialect != "postgresql":
+            # Sem advisory lock; a reivindicação em scheduler_runs evita execuções duplicadas
+            return True
+        try:
+            if self._leader_conn is None or self._leader_conn.closed:
+                self._leader_conn = psycopg2.connect(**self.db.backend.connection_params)
+                self._leader_conn.autocommit = True
+            with self._leader_conn.cursor() as cursor:
+                if self.is_leader:
+                    # O lock de sessão vale enquanto a conexão estiver viva
+                    cursor.execute("SELECT 1")
+                    return True
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (self.lock_key,))
+                return bool(cursor.fetchone()[0])
+        except psycopg2.Error as e:
+            logger.warning("Conexão de liderança do agendador perdida: %s", e)
+            self._close_leader_conn()
+            return False
+
+    def _close_leader_conn(self):
+        if self._leader_conn is not None:
+            try:
+                self._leader_conn.close()
+            except psycopg2.Error:
+                pass
+            self._leader_conn = None
+
+    async def _elect(self):
+        while True:
+            leader = await run_in_threadpool(self._try_lead)
+            if leader != self.is_leader:
+                logger.info("Agendador: %s", "assumiu a liderança" if leader else "deixou de ser líder")
+            self.is_leader = leader
+            await asyncio.sleep(settings.SCHEDULER_LEADER_RETRY_SECONDS)
+
+    # Histórico
+
+    def _claim(self, job: Job, slot: datetime) -> Optional[int]:
+        """Registra a execução do horário; None se outro worker já o reivindicou"""
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO scheduler_runs (job_name, slot, worker, status, started_at)
+                VALUES (%s, %s, %s, 'running', %s)
+                ON CONFLICT (job_name, slot) DO NOTHING
+                RETURNING id
+            """, (job.name, slot, self.worker, datetime.utcnow()))
+            row = cursor.fetchone()
+        return row['id'] if row else None
+
+    def _finish(self, run_id: int, status: str, duration_ms: int, result: Any, error: Optional[str]):
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE scheduler_runs
+                SET status = %s, finished_at = %s, duration_ms = %s, result = %s, error = %s
+                WHERE id = %s
+            """, (status, datetime.utcnow(), duration_ms,
+                  None if result is None else str(result)[:1000], error, run_id))
+
+    # Execução
+
+    async def _run(self, job: Job, slot: datetime):
+        if job.running:
+            job.skipped += 1
+            logger.warning("Tarefa %s ainda em execução; horário %s pulado", job.name, slot)
+            return
+        job.running = True
+        try:
+            async with self._semaphore:
+                run_id = None
+                if job.leader_only:
+                    run_id = await run_in_threadpool(self._claim, job, slot)
+                    if run_id is None:
+                        job.skipped += 1
+                        return
+
+                started = time.perf_counter()
+                job.last_run = datetime.utcnow()
+                result, error = None, None
+                try:
+                    result = await run_in_threadpool(job.func)
+                    job.last_status = "succeeded"
+                except Exception as e:
+                    logger.exception("Tarefa %s falhou", job.name)
+                    error = f"{e.__class__.__name__}: {e}"
+                    job.failures += 1
+                    job.last_status = "failed"
+                job.runs += 1
+                job.last_error = error
+                job.last_duration_ms = int((time.perf_counter() - started) * 1000)
+                if result is not None:
+                    logger.info("Tarefa %s concluída em %d ms: %s", job.name, job.last_duration_ms, result)
+                if run_id is not None:
+                    await run_in_threadpool(
+                        self._finish, run_id, job.last_status, job.last_duration_ms, result, error
+                    )
+        except Exception as e:
+            logger.warning("Falha ao registrar execução de %s: %s", job.name, e)
+        finally:
+            job.running = False
+
+    async def _loop(self, job: Job):
+        while True:
+            slot = job.trigger.next_slot(datetime.utcnow())
+            job.next_run = slot
+            delay = (slot - datetime.utcnow()).total_seconds() + random.uniform(0, job.trigger.jitter)
+            await asyncio.sleep(max(0.0, delay))
+            if job.leader_only and not self.is_leader:
+                continue
+            task = asyncio.create_task(self._run(job, slot))
+            self._runs.add(task)
+            task.add_done_callback(self._runs.discard)
+
+    def start(self):
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._tasks.append(loop.create_task(self._elect()))
+        for job in self.jobs.values():
+            self._tasks.append(loop.create_task(self._loop(job)))
+        logger.info("Agendador iniciado com %d tarefa(s)", len(self.jobs))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._runs:
+            # Execuções em andamento terminam na thread; só esperamos o registro
+            await asyncio.wait(list(self._runs), timeout=10)
+        self.is_leader = False
+        # Fechar a conexão libera o advisory lock para outro worker
+        await run_in_threadpool(self._close_leader_conn)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._tasks),
+            "leader": self.is_leader,
+            "worker": self.worker,
+            "jobs": {name: job.snapshot() for name, job in self.jobs.items()},
+        }
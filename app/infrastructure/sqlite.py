@@ -0,0 +1,214 @@
+"""Backend SQLite embutido para execuções locais, testes e benchmarks.
+
+Selecionado quando a DATABASE_URL usa o esquema `sqlite`:
+
+    sqlite:///./cirqulofit_local.db     (caminho relativo)
+    sqlite:////var/data/cirqulofit.db   (caminho absoluto)
+    sqlite:///:memory:                  (memória compartilhada entre threads)
+
+Cada thread mantém sua própria conexão (WAL permite leitores concorrentes com
+um escritor). As consultas escritas para o Postgres passam por um shim de
+dialeto: placeholders `%s`, `NOW()`, `INTERVAL`, `SERIAL`, `GREATEST`/`LEAST`,
+`FOR UPDATE` e `RETURNING` (emulado em versões antigas do SQLite).
+"""
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+NATIVE_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()[:10]))
+sqlite3.register_converter("BOOLEAN", lambda raw: raw not in (b"0", b""))
+sqlite3.register_converter("DECIMAL", lambda raw: float(raw))
+
+_INTERVAL = re.compile(
+    r"(NOW\(\)|CURRENT_TIMESTAMP|\?|[\w.]+)\s*([+-])\s*INTERVAL\s*'(\d+)\s*([a-z]+?)s?'",
+    re.IGNORECASE,
+)
+_RETURNING = re.compile(r"\s+RETURNING\s+(.+?)\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+_INSERT_TABLE = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)", re.IGNORECASE)
+_ADD_COLUMN = re.compile(
+    r"^\s*ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+IF\s+NOT\s+EXISTS\s+(\w+)\s+(.+?)\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_FUNCTION_COLUMN = re.compile(r"^(\w+)\(.*\)$", re.DOTALL)
+
+
+def _interval(match: re.Match) -> str:
+    operand, sign, amount, unit = match.groups()
+    unit = unit.lower()
+    if unit == "week":
+        amount, unit = str(int(amount) * 7), "day"
+    if operand.upper() in ("NOW()", "CURRENT_TIMESTAMP"):
+        operand = "'now'"
+    return f"datetime({operand}, '{sign}{amount} {unit}s')"
+
+
+@lru_cache(maxsize=512)
+def translate(query: str) -> str:
+    """Converte SQL no dialeto do Postgres para o SQLite"""
+    sql = query.replace("%s", "?").replace("%%", "%")
+    sql = re.sub(r"\bBIGSERIAL\s+PRIMARY\s+KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bSERIAL\s+PRIMARY\s+KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT", sql, flags=re.IGNORECASE)
+    sql = _INTERVAL.sub(_interval, sql)
+    sql = re.sub(r"\bNOW\(\)", "CURRENT_TIMESTAMP", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bGREATEST\(", "MAX(", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bLEAST\(", "MIN(", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bILIKE\b", "LIKE", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\s+FOR\s+UPDATE(\s+OF\s+\w+)?(\s+SKIP\s+LOCKED)?", "", sql, flags=re.IGNORECASE)
+    return sql
+
+
+def _column_name(name: str) -> str:
+    # Postgres nomeia colunas de função sem alias pelo nome da função (count, coalesce...)
+    match = _FUNCTION_COLUMN.match(name)
+    return match.group(1).lower() if match else name
+
+
+class SQLiteCursor:
+    """Cursor com a interface usada pelo código (RealDictCursor do psycopg2)"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._cursor = conn.cursor()
+        self._returning: Optional[List[Dict[str, Any]]] = None
+        self.rowcount = -1
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._cursor.lastrowid
+
+    def execute(self, query: str, params: Optional[Sequence[Any]] = None):
+        params = tuple(params or ())
+        self._returning = None
+
+        add_column = _ADD_COLUMN.match(query)
+        if add_column:
+            self._add_column(*add_column.groups())
+            return
+
+        sql = translate(query)
+        returning = None if NATIVE_RETURNING else _RETURNING.search(sql)
+        if returning:
+            sql = sql[:returning.start()]
+
+        self._cursor.execute(sql, params)
+        self.rowcount = self._cursor.rowcount
+
+        if returning:
+            table = _INSERT_TABLE.match(sql)
+            if not table:
+                raise sqlite3.NotSupportedError("RETURNING emulado apenas em INSERT")
+            self._cursor.execute(
+                f"SELECT {returning.group(1)} FROM {table.group(1)} WHERE rowid = ?",
+                (self._cursor.lastrowid,),
+            )
+            self._returning = self._rows(self._cursor.fetchall())
+
+    def executemany(self, query: str, seq_of_params):
+        self._cursor.executemany(translate(query), [tuple(p) for p in seq_of_params])
+        self.rowcount = self._cursor.rowcount
+
+    def _add_column(self, table: str, column: str, definition: str):
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        if column in existing:
+            return
+        # SQLite não aceita DEFAULT não constante em ADD COLUMN
+        definition = re.sub(r"\s+DEFAULT\s+CURRENT_TIMESTAMP", "", definition, flags=re.IGNORECASE)
+        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {translate(definition)}")
+
+    def _rows(self, rows: List[tuple]) -> List[Dict[str, Any]]:
+        if not self._cursor.description:
+            return []
+        names = [_column_name(column[0]) for column in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchone(self) -> Optional[Dict[str, Any]]:
+        if self._returning is not None:
+            return self._returning.pop(0) if self._returning else None
+        row = self._cursor.fetchone()
+        return self._rows([row])[0] if row is not None else None
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        if self._returning is not None:
+            rows, self._returning = self._returning, []
+            return rows
+        return self._rows(self._cursor.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteBackend:
+    """Uma conexão por thread, WAL e chaves estrangeiras ligadas"""
+    dialect = "sqlite"
+
+    def __init__(self, url: str):
+        path = urlparse(url).path
+        if path in ("", "/", "/:memory:"):
+            # Memória compartilhada: todas as threads enxergam o mesmo banco
+            self.database = "file:cirqulofit_memory?mode=memory&cache=shared"
+            self.uri = True
+        else:
+            self.database = path[1:] if path.startswith("/") else path
+            self.uri = False
+        self._local = threading.local()
+        self._anchor = self._open() if self.uri else None
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database,
+            uri=self.uri,
+            timeout=30,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        if not self.uri:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def connect(self, dedicated: bool = False) -> sqlite3.Connection:
+        if dedicated:
+            # Conexão exclusiva de uma requisição, que pode passar por várias threads
+            return self._open()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        return conn
+
+    def cursor(self, conn: sqlite3.Connection) -> SQLiteCursor:
+        return SQLiteCursor(conn)
+
+    def apply_budget(self, conn: sqlite3.Connection, cursor, budget):
+        # Sem statement_timeout: o progress handler aborta o bloco após o prazo
+        conn.set_progress_handler(budget.sqlite_handler(), 1000)
+
+    def clear_budget(self, conn: sqlite3.Connection):
+        conn.set_progress_handler(None, 0)
+
+    def cancel(self, conn: sqlite3.Connection):
+        conn.interrupt()
+
+    def release(self, conn: sqlite3.Connection):
+        # A conexão da thread fica com ela para a próxima requisição
+        if conn is not getattr(self._local, "conn", None) and conn is not self._anchor:
+            conn.close()
+
+    def stats(self):
+        return {"size": 0, "in_use": 0, "waiting": 0}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1 @@
+# Benchmarks e testes de carga
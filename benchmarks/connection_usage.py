@@ -0,0 +1,196 @@
+"""Conexões do pool seguradas ao mesmo tempo por requisição.
+
+Executa a aplicação real em processo (como `benchmarks.load_test`) e
+instrumenta `connect`/`release` dos backends do banco: cada conexão é
+atribuída à requisição que a pegou, inclusive em threads do threadpool.
+Uma requisição que segura duas conexões ao mesmo tempo (ex.: a do unit of
+work aberta pela autenticação e outra do handler `def`) esgota o pool sob
+concorrência; o script sai com código 1 se alguma rota passar de
+`--max-per-request`. Tarefas de fundo (outbox, scheduler) não contam.
+
+Exemplos:
+    DATABASE_URL=sqlite:///./connection_usage.db python -m benchmarks.connection_usage
+    python -m benchmarks.connection_usage --output connection_usage.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_request: ContextVar[Optional[int]] = ContextVar("connection_usage_request", default=None)
+
+
+class Usage:
+    """Conexões em uso e pico por requisição"""
+
+    def __init__(self):
+        self.held: Dict[int, int] = {}
+        self.peak: Dict[int, int] = {}
+        self.last: Optional[int] = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self) -> int:
+        request_id = next(self._ids)
+        with self._lock:
+            self.held[request_id] = self.peak[request_id] = 0
+            self.last = request_id
+        return request_id
+
+    def acquired(self):
+        request_id = _request.get()
+        if request_id is None:
+            return
+        with self._lock:
+            self.held[request_id] += 1
+            self.peak[request_id] = max(self.peak[request_id], self.held[request_id])
+
+    def released(self):
+        request_id = _request.get()
+        if request_id is None:
+            return
+        with self._lock:
+            self.held[request_id] -= 1
+
+    def instrument(self, backend):
+        connect, release = backend.connect, backend.release
+
+        def counted_connect(*args, **kwargs):
+            conn = connect(*args, **kwargs)
+            self.acquired()
+            return conn
+
+        def counted_release(conn):
+            self.released()
+            return release(conn)
+
+        backend.connect, backend.release = counted_connect, counted_release
+
+    def middleware(self, app):
+        async def tagged(scope, receive, send):
+            if scope["type"] != "http":
+                await app(scope, receive, send)
+                return
+            request_id = self.start()
+            token = _request.set(request_id)
+            try:
+                await app(scope, receive, send)
+            finally:
+                _request.reset(token)
+
+        return tagged
+
+
+async def journey(client: httpx.AsyncClient, usage: Usage) -> Dict[str, Dict]:
+    """Pico de conexões de cada rota, em sequência (a resposta de uma alimenta as seguintes)"""
+    results = {}
+
+    async def call(method: str, url: str, endpoint: str = None, **kwargs) -> httpx.Response:
+        response = await client.request(method, url, **kwargs)
+        results[endpoint or f"{method} {url}"] = {
+            "status": response.status_code,
+            "peak_connections": usage.peak[usage.last],
+        }
+        return response
+
+    email = f"connections_{uuid.uuid4().hex[:8]}@example.com"
+    await call("POST", "/api/auth/register", json={
+        "name": "Conexões", "email": email, "gender": "other", "password": "connection-usage"
+    })
+    login = await call("POST", "/api/auth/login-json", json={"email": email, "password": "connection-usage"})
+    login.raise_for_status()
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    workout = await call("POST", "/api/workouts/", headers=headers, json={
+        "name": "Treino", "category": "strength", "level": 1, "duration": 45, "exercises_count": 1, "xp_reward": 50,
+    })
+    workout.raise_for_status()
+    session = await call("POST", "/api/workouts/sessions/", headers=headers,
+                         json={"workout_id": workout.json()["id"]})
+    session.raise_for_status()
+    session_id = session.json()["id"]
+    exercise = await call("POST", f"/api/workouts/sessions/{session_id}/exercises",
+                          "POST /api/workouts/sessions/{id}/exercises", headers=headers, json={
+                              "session_id": session_id, "exercise_name": "Supino Reto", "sets": 3, "reps": 10,
+                              "weight": 40,
+                          })
+    exercise.raise_for_status()
+    await call("PATCH", f"/api/workouts/sessions/exercises/{exercise.json()['id']}/progress",
+               "PATCH /api/workouts/sessions/exercises/{id}/progress", headers=headers, json={"completed_sets": 3})
+    await call("PATCH", f"/api/workouts/sessions/{session_id}/complete",
+               "PATCH /api/workouts/sessions/{id}/complete", headers=headers)
+
+    for url in (
+        "/api/workouts/dashboard/",
+        "/api/workouts/stats/summary",
+        "/api/workouts/progress/weekly",
+        "/api/workouts/",
+        "/api/workouts/analytics/records",
+        "/api/workouts/history/",
+        "/api/sync/",
+    ):
+        await call("GET", url, headers=headers)
+    await call("POST", "/api/batch", headers=headers, json={"requests": [
+        {"id": "dashboard", "path": "/api/workouts/dashboard/"},
+        {"id": "stats", "path": "/api/workouts/stats/summary"},
+        {"id": "weekly", "path": "/api/workouts/progress/weekly"},
+    ]})
+    return results
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict]:
+    from main import app
+    from app.infrastructure.database import db
+
+    usage = Usage()
+    for backend in [db.backend] + db.replicas:
+        usage.instrument(backend)
+
+    transport = httpx.ASGITransport(app=usage.middleware(app))
+    async with app.router.lifespan_context(app):
+        for _ in range(100):
+            if getattr(app.state, "database_ready", False):
+                break
+            await asyncio.sleep(0.1)
+        async with httpx.AsyncClient(transport=transport, base_url="http://connections", timeout=30) as client:
+            return await journey(client, usage)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Conexões do pool por requisição")
+    parser.add_argument("--max-per-request", type=int, default=1)
+    parser.add_argument("--output", help="grava o resultado em JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+
+    failures = 0
+    for endpoint, stats in results.items():
+        over = stats["peak_connections"] > args.max_per_request
+        failures += over
+        print(f"{endpoint:<55} status={stats['status']} conexões={stats['peak_connections']}"
+              f"{'  <-- acima do limite' if over else ''}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if failures:
+        print(f"\n{failures} rota(s) seguram mais de {args.max_per_request} conexão(ões) por requisição")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Database em memória para benchmarks da camada de serviço.
+
+Substitui `app.infrastructure.database.Database` reproduzindo conjuntos de
+linhas pré-definidos: cada regra associa um trecho de SQL às linhas que a
+consulta deve devolver. Nenhuma conexão de rede é aberta.
+"""
+import re
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+Rows = List[Dict[str, Any]]
+RowSource = Union[Rows, Callable[[Sequence[Any]], Rows]]
+
+
+def _normalize(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class FakeCursor:
+    def __init__(self, database: "FakeDatabase"):
+        self.database = database
+        self._rows: Rows = []
+        self.rowcount = 0
+
+    def execute(self, query: str, params: Optional[Sequence[Any]] = None, cache: bool = False):
+        # `cache` é do CachingCursor; aqui toda consulta já sai da memória
+        sql = _normalize(query)
+        self.database.executed.append(sql)
+        source = self.database.match(sql)
+        if source is None:
+            rows = []
+        elif callable(source):
+            rows = source(params or ())
+        else:
+            rows = source
+        self._rows = rows
+        self.rowcount = len(rows) if sql.upper().startswith("SELECT") else max(len(rows), 1)
+
+    def executemany(self, query: str, params_list: Sequence[Sequence[Any]]):
+        rowcount = 0
+        for params in params_list:
+            self.execute(query, params)
+            rowcount += self.rowcount
+        self.rowcount = rowcount
+
+    def fetchone(self) -> Optional[Dict[str, Any]]:
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self) -> Rows:
+        return list(self._rows)
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """Reproduz linhas canônicas por padrão de SQL (primeira regra que casar)"""
+
+    def __init__(self, rules: Optional[List[Tuple[str, RowSource]]] = None):
+        self.rules: List[Tuple[re.Pattern, RowSource]] = []
+        self.executed: List[str] = []
+        for pattern, source in rules or []:
+            self.add_rule(pattern, source)
+
+    def add_rule(self, pattern: str, source: RowSource):
+        self.rules.append((re.compile(pattern, re.IGNORECASE), source))
+
+    def match(self, sql: str) -> Optional[RowSource]:
+        for pattern, source in self.rules:
+            if pattern.search(sql):
+                return source
+        return None
+
+    @contextmanager
+    def get_cursor(self, *args, **kwargs):
+        yield FakeCursor(self)
@@ -0,0 +1,289 @@
+"""Teste de carga HTTP das jornadas principais da API.
+
+Executa a aplicação real (`main:app`) em processo, via ASGI, ou contra um
+servidor já em execução (`--base-url`). O banco usado é o configurado em
+`DATABASE_URL` (Postgres local ou equivalente).
+
+Jornada de cada usuário virtual:
+    registro -> login -> dashboard -> listar treinos -> iniciar sessão ->
+    adicionar exercícios -> PATCH de progresso por série -> completar sessão
+
+Exemplos:
+    python -m benchmarks.load_test --users 50 --iterations 5 --output results.json
+    python -m benchmarks.load_test --baseline baseline.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+EXERCISE_CATALOG = [
+    "Supino Reto", "Agachamento", "Levantamento Terra", "Remada Curvada",
+    "Desenvolvimento", "Rosca Direta", "Tríceps Testa", "Leg Press",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por ordenação (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    """Acumula latências por endpoint (método + rota template)"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.recording = False
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str,
+                      endpoint: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if self.recording:
+            self.latencies[endpoint].append(elapsed_ms)
+            if response.status_code >= 400:
+                self.errors[endpoint] += 1
+        return response
+
+    def summary(self, duration_s: float) -> Dict[str, Dict]:
+        result = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            result[endpoint] = {
+                "count": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "throughput_rps": round(len(values) / duration_s, 2) if duration_s else 0.0,
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(max(values), 2),
+            }
+        return result
+
+
+async def register_and_login(client: httpx.AsyncClient, recorder: Recorder,
+                             email: str, password: str) -> Dict[str, str]:
+    response = await recorder.request(client, "POST", "/api/auth/register", "POST /api/auth/register", json={
+        "name": email.split("@")[0],
+        "email": email,
+        "password": password,
+        "gender": "other",
+    })
+    response.raise_for_status()
+
+    response = await recorder.request(client, "POST", "/api/auth/login-json", "POST /api/auth/login-json", json={
+        "email": email,
+        "password": password,
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_session(client: httpx.AsyncClient, recorder: Recorder, headers: Dict[str, str],
+                      workout_id: int, rng: random.Random, exercises: int):
+    """Uma sessão completa: iniciar, adicionar exercícios, progresso por série e completar"""
+    response = await recorder.request(client, "POST", "/api/workouts/sessions/", "POST /api/workouts/sessions/",
+                                      headers=headers, json={"workout_id": workout_id})
+    response.raise_for_status()
+    session_id = response.json()["id"]
+
+    for name in rng.sample(EXERCISE_CATALOG, exercises):
+        sets = rng.randint(3, 5)
+        response = await recorder.request(
+            client, "POST", f"/api/workouts/sessions/{session_id}/exercises",
+            "POST /api/workouts/sessions/{id}/exercises",
+            headers=headers,
+            json={
+                "session_id": session_id,
+                "exercise_name": name,
+                "sets": sets,
+                "reps": rng.choice([6, 8, 10, 12]),
+                "weight": round(rng.uniform(10, 120), 1),
+            },
+        )
+        response.raise_for_status()
+        exercise_id = response.json()["id"]
+
+        for completed_sets in range(1, sets + 1):
+            response = await recorder.request(
+                client, "PATCH", f"/api/workouts/sessions/exercises/{exercise_id}/progress",
+                "PATCH /api/workouts/sessions/exercises/{id}/progress",
+                headers=headers, json={"completed_sets": completed_sets},
+            )
+            response.raise_for_status()
+
+    response = await recorder.request(client, "PATCH", f"/api/workouts/sessions/{session_id}/complete",
+                                      "PATCH /api/workouts/sessions/{id}/complete", headers=headers)
+    response.raise_for_status()
+
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, user_index: int,
+                       args: argparse.Namespace, run_id: str):
+    rng = random.Random(args.seed * 100_003 + user_index)
+    email = f"loadtest_{run_id}_{user_index}@example.com"
+    headers = await register_and_login(client, recorder, email, "loadtest-password")
+
+    response = await recorder.request(client, "POST", "/api/workouts/", "POST /api/workouts/", headers=headers, json={
+        "name": f"Treino {user_index}",
+        "category": rng.choice(["strength", "hypertrophy", "mixed"]),
+        "level": rng.randint(1, 3),
+        "duration": rng.choice([30, 45, 60]),
+        "exercises_count": args.exercises,
+        "xp_reward": 50,
+    })
+    response.raise_for_status()
+    workout_id = response.json()["id"]
+
+    # Histórico sintético para o dashboard ter dados
+    for _ in range(args.history):
+        await run_session(client, recorder, headers, workout_id, rng, args.exercises)
+
+    for _ in range(args.iterations):
+        await recorder.request(client, "GET", "/api/workouts/dashboard/", "GET /api/workouts/dashboard/",
+                               headers=headers)
+        await recorder.request(client, "GET", "/api/workouts/", "GET /api/workouts/", headers=headers)
+        await run_session(client, recorder, headers, workout_id, rng, args.exercises)
+
+
+def load_app():
+    """Aplicação em processo, sem servidor HTTP"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from main import app
+    return app
+
+
+def build_client(args: argparse.Namespace, app=None) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if app is None:
+        return httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest",
+                             limits=limits, timeout=args.timeout)
+
+
+async def drive(args: argparse.Namespace, client: httpx.AsyncClient, recorder: Recorder, run_id: str) -> float:
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def guarded(index: int):
+        async with semaphore:
+            await virtual_user(client, recorder, index, args, run_id)
+
+    # Registro e histórico também são medidos: fazem parte da jornada de cadastro
+    recorder.recording = True
+    started = time.perf_counter()
+    await asyncio.gather(*(guarded(i) for i in range(args.users)))
+    return time.perf_counter() - started
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict:
+    recorder = Recorder()
+    run_id = args.run_id or uuid.uuid4().hex[:8]
+
+    if args.base_url:
+        async with build_client(args) as client:
+            duration = await drive(args, client, recorder, run_id)
+    else:
+        # ASGITransport não dispara o lifespan; executa manualmente
+        app = load_app()
+        async with app.router.lifespan_context(app):
+            async with build_client(args, app) as client:
+                duration = await drive(args, client, recorder, run_id)
+
+    endpoints = recorder.summary(duration)
+    total = sum(item["count"] for item in endpoints.values())
+    return {
+        "run_id": run_id,
+        "config": {
+            "users": args.users,
+            "iterations": args.iterations,
+            "history": args.history,
+            "exercises": args.exercises,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "target": args.base_url or "in-process",
+        },
+        "duration_s": round(duration, 3),
+        "total_requests": total,
+        "throughput_rps": round(total / duration, 2) if duration else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def compare_with_baseline(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Lista regressões acima do limiar (latência maior ou throughput menor)"""
+    regressions = []
+    for endpoint, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(
+                    f"{endpoint}: {metric} {previous[metric]:.2f} -> {current[metric]:.2f} "
+                    f"(+{(current[metric] / previous[metric] - 1) * 100:.1f}%)"
+                )
+        if previous["throughput_rps"] > 0 and current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{endpoint}: throughput_rps {previous['throughput_rps']:.2f} -> {current['throughput_rps']:.2f}"
+            )
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Teste de carga das jornadas principais da CirquloFit API")
+    parser.add_argument("--base-url", help="URL de um servidor em execução (padrão: app em processo)")
+    parser.add_argument("--users", type=int, default=20, help="usuários virtuais")
+    parser.add_argument("--iterations", type=int, default=3, help="sessões medidas por usuário")
+    parser.add_argument("--history", type=int, default=2, help="sessões de histórico antes da medição")
+    parser.add_argument("--exercises", type=int, default=4, help="exercícios por sessão")
+    parser.add_argument("--concurrency", type=int, default=10, help="usuários simultâneos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--run-id", help="sufixo dos emails sintéticos (padrão: aleatório)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", default="load_test_results.json", help="arquivo JSON de resultados")
+    parser.add_argument("--baseline", help="resultados anteriores para comparação")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regressão tolerada (0.10 = 10%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(run_load_test(args))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        results["regressions"] = compare_with_baseline(results, baseline, args.threshold)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    print(f"{results['total_requests']} requisições em {results['duration_s']}s "
+          f"({results['throughput_rps']} req/s)")
+    for endpoint, stats in results["endpoints"].items():
+        print(f"  {endpoint:<55} n={stats['count']:<6} p50={stats['p50_ms']:>8.2f}ms "
+              f"p95={stats['p95_ms']:>8.2f}ms p99={stats['p99_ms']:>8.2f}ms erros={stats['errors']}")
+
+    regressions = results.get("regressions", [])
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) acima de {args.threshold * 100:.0f}%:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
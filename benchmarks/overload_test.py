@@ -0,0 +1,130 @@
+"""Teste local de sobrecarga do controle de admissão.
+
+Enquanto vários clientes inundam rotas de baixa prioridade (estatísticas e
+GIFs), um cliente executa sessões de treino (rotas críticas). O relatório
+mostra p50/p95/p99 das rotas críticas e quantas requisições de baixa
+prioridade foram recusadas com 503.
+
+Sem `--base-url`, sobe um uvicorn local com um worker (a aplicação em processo
+via ASGI não concorre de verdade, pois os handlers não cedem o event loop).
+
+Compare as duas execuções:
+    ADMISSION_ENABLED=false python -m benchmarks.overload_test --output overload_off.json
+    python -m benchmarks.overload_test --output overload_on.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Optional
+
+import httpx
+
+from benchmarks.load_test import Recorder, build_client, register_and_login, run_session
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@contextmanager
+def local_server():
+    """uvicorn com um worker numa porta livre; herda o ambiente (DATABASE_URL, ADMISSION_*)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health").json().get("database_ready"):
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("servidor local não ficou pronto")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def flood(client, headers, stop_at: float, statuses: Counter):
+    paths = ["/api/workouts/stats/summary", "/api/workouts/progress/weekly", "/api/gifs/trending"]
+    while time.perf_counter() < stop_at:
+        response = await client.get(random.choice(paths), headers=headers)
+        statuses[response.status_code] += 1
+
+
+async def critical_loop(client, recorder: Recorder, headers, workout_id: int, stop_at: float):
+    rng = random.Random(7)
+    while time.perf_counter() < stop_at:
+        await run_session(client, recorder, headers, workout_id, rng, exercises=2)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    recorder = Recorder()
+    statuses: Counter = Counter()
+    run_id = uuid.uuid4().hex[:8]
+
+    async with build_client(args) as client:
+        headers = await register_and_login(client, recorder, f"overload_{run_id}@example.com", "overload-password")
+        response = await client.post("/api/workouts/", headers=headers, json={"name": "Sobrecarga"})
+        response.raise_for_status()
+        workout_id = response.json()["id"]
+
+        recorder.latencies.clear()
+        recorder.recording = True
+        stop_at = time.perf_counter() + args.duration
+        await asyncio.gather(
+            critical_loop(client, recorder, headers, workout_id, stop_at),
+            *(flood(client, headers, stop_at, statuses) for _ in range(args.flooders)),
+        )
+
+    return {
+        "flooders": args.flooders,
+        "duration_s": args.duration,
+        "critical": recorder.summary(args.duration),
+        "low_priority_statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de sobrecarga do controle de admissão")
+    parser.add_argument("--base-url", help="servidor em execução (padrão: sobe um uvicorn local)")
+    parser.add_argument("--flooders", type=int, default=50, help="clientes simultâneos em rotas de baixa prioridade")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos de carga")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", default="overload_results.json")
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        results = asyncio.run(run(args))
+    else:
+        with local_server() as base_url:
+            args.base_url = base_url
+            results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    for endpoint, stats in results["critical"].items():
+        print(f"{endpoint:<55} n={stats['count']:<6} p50={stats['p50_ms']:>8.2f}ms p99={stats['p99_ms']:>8.2f}ms")
+    print(f"baixa prioridade: {results['low_priority_statuses']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
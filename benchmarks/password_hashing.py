@@ -0,0 +1,89 @@
+"""Logins por core por segundo para cada configuração de hash de senhas.
+
+Mede a verificação de uma senha correta (o trabalho de CPU de um login) em
+uma thread, para uma grade de custos do bcrypt e do argon2 e para a
+política configurada em `Settings`. `logins_per_core_s` = 1 / mediana:
+multiplicado pelos cores dedicados ao login dá o teto de logins por segundo
+da instância. Configurações de argon2 são puladas sem o `argon2-cffi`.
+
+Exemplos:
+    python -m benchmarks.password_hashing --output password_hashing_results.json
+    python -m benchmarks.password_hashing --bcrypt-rounds 10 12 14 --argon2-time-costs 2 3
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passlib.exc import MissingBackendError
+
+from app.core.security import build_context, policy
+
+SECRET = "benchmark-senha-de-exemplo"
+
+
+def measure(context, min_time: float, max_repeat: int) -> Dict[str, float]:
+    """Verificações repetidas até `min_time` segundos (ou `max_repeat` vezes)"""
+    hashed = context.hash(SECRET)
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_repeat and (len(timings) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        context.verify(SECRET, hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(timings)
+    return {
+        "repeat": len(timings),
+        "median_ms": round(median, 3),
+        "min_ms": round(min(timings), 3),
+        "logins_per_core_s": round(1000 / median, 2),
+    }
+
+
+def cases(bcrypt_rounds: List[int], argon2_time_costs: List[int]) -> Dict[str, Dict]:
+    current = policy()
+    configured = "bcrypt_rounds" if current["scheme"] == "bcrypt" else "argon2_time_cost"
+    result = {f"atual[{current['scheme']} {configured}={current[configured]}]": {"scheme": current["scheme"]}}
+    for rounds in bcrypt_rounds:
+        result[f"bcrypt[rounds={rounds}]"] = {"scheme": "bcrypt", "bcrypt_rounds": rounds}
+    for time_cost in argon2_time_costs:
+        result[f"argon2[t={time_cost} m={current['argon2_memory_cost']} p={current['argon2_parallelism']}]"] = {
+            "scheme": "argon2", "argon2_time_cost": time_cost,
+        }
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Logins por core por segundo por configuração de hash")
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="*", default=[10, 11, 12, 13])
+    parser.add_argument("--argon2-time-costs", type=int, nargs="*", default=[1, 2, 3, 4])
+    parser.add_argument("--min-time", type=float, default=2.0, help="segundos mínimos por configuração")
+    parser.add_argument("--max-repeat", type=int, default=200)
+    parser.add_argument("--output", default="password_hashing_results.json")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = {}
+    for name, params in cases(args.bcrypt_rounds, args.argon2_time_costs).items():
+        try:
+            results[name] = measure(build_context(**params), args.min_time, args.max_repeat)
+        except MissingBackendError:
+            print(f"{name:<40} pulado: instale argon2-cffi")
+            continue
+        stats = results[name]
+        print(f"{name:<40} median={stats['median_ms']:>9.1f}ms logins/core/s={stats['logins_per_core_s']:>8.2f}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Microbenchmarks da camada de serviço com um Database em memória.
+
+Mede `WorkoutService.get_weekly_progress`, `DashboardService.get_dashboard_data`
+e `WorkoutService.complete_workout_session` para usuários sintéticos com
+10, 1k e 100k sessões, sem rede nem banco. Regressões algorítmicas (por
+exemplo, agrupar sessões por dia com list comprehensions por dia) aparecem
+como números comparáveis entre execuções.
+
+Exemplos:
+    python -m benchmarks.service_benchmarks --output service_results.json
+    python -m benchmarks.service_benchmarks --baseline service_baseline.json --threshold 0.20
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.application.dashboard_service import DashboardService
+from app.application.workout_service import WorkoutService
+from benchmarks.fake_database import FakeDatabase
+
+DEFAULT_SIZES = [10, 1_000, 100_000]
+USER_ID = 1
+
+
+def synthetic_sessions(count: int, seed: int) -> List[Dict]:
+    """Sessões espalhadas pela semana corrente, ~70% completas"""
+    rng = random.Random(seed)
+    today = datetime.utcnow()
+    week_start = (today - timedelta(days=today.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    sessions = []
+    for i in range(count):
+        started_at = week_start + timedelta(seconds=rng.randrange(7 * 24 * 3600))
+        completed = rng.random() < 0.7
+        sessions.append({
+            "id": i + 1,
+            "user_id": USER_ID,
+            "workout_id": 1,
+            "started_at": started_at,
+            "completed_at": started_at + timedelta(minutes=45) if completed else None,
+            "duration": 45 if completed else None,
+            "xp_earned": rng.randint(50, 200) if completed else 0,
+            "is_completed": completed,
+        })
+    return sessions
+
+
+def synthetic_exercises(sessions: List[Dict], seed: int) -> List[Dict]:
+    """Um exercício completo por sessão completa (linhas do JOIN de evolução de carga)"""
+    rng = random.Random(seed + 1)
+    names = ["Supino Reto", "Agachamento", "Levantamento Terra", "Remada Curvada"]
+    rows = [
+        {
+            "id": s["id"],
+            "session_id": s["id"],
+            "exercise_name": rng.choice(names),
+            "sets": 4,
+            "reps": rng.choice([6, 8, 10, 12]),
+            "weight": round(rng.uniform(20, 140), 1),
+            "completed_sets": 4,
+            "is_completed": True,
+            "started_at": s["started_at"],
+        }
+        for s in sessions if s["is_completed"]
+    ]
+    rows.sort(key=lambda row: row["started_at"])
+    return rows
+
+
+def build_database(session_count: int, seed: int) -> FakeDatabase:
+    sessions = synthetic_sessions(session_count, seed)
+    exercises = synthetic_exercises(sessions, seed)
+    progress = [{
+        "id": 1, "user_id": USER_ID, "date": datetime.utcnow(), "total_workouts": session_count,
+        "total_exercises": len(exercises), "total_xp": 10 * session_count, "current_streak": 3,
+        "longest_streak": 7, "level": session_count // 5 + 1,
+    }]
+    open_session = [{
+        "id": session_count + 1, "user_id": USER_ID, "workout_id": 1,
+        "started_at": datetime.utcnow() - timedelta(minutes=50), "is_completed": False,
+    }]
+
+    return FakeDatabase([
+        (r"FROM workout_exercises we JOIN workout_sessions ws", exercises),
+        (r"SELECT \* FROM workout_sessions WHERE id = %s AND user_id = %s", open_session),
+        (r"SELECT \* FROM workout_sessions WHERE user_id = %s AND started_at", sessions),
+        (r"FROM user_progress", progress),
+        (r"SELECT COUNT\(\*\) FROM workout_exercises", [{"count": 4}]),
+        (r"^(UPDATE|INSERT)", []),
+    ])
+
+
+def measure(func: Callable[[], object], min_time: float, max_repeat: int) -> Dict[str, float]:
+    """Repete a chamada até `min_time` segundos (ou `max_repeat` vezes)"""
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_repeat and (len(timings) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "repeat": len(timings),
+        "min_ms": round(min(timings), 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+    }
+
+
+def run_benchmarks(sizes: List[int], seed: int, min_time: float, max_repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for size in sizes:
+        database = build_database(size, seed)
+        workout_service = WorkoutService(database)
+        dashboard_service = DashboardService(database)
+
+        cases = {
+            "get_weekly_progress": lambda: workout_service.get_weekly_progress(USER_ID),
+            "get_dashboard_data": lambda: dashboard_service.get_dashboard_data(USER_ID),
+            "complete_workout_session": lambda: workout_service.complete_workout_session(size + 1, USER_ID),
+        }
+        for name, func in cases.items():
+            results[f"{name}[{size}]"] = measure(func, min_time, max_repeat)
+    return results
+
+
+def compare_with_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous and previous["median_ms"] > 0 and current["median_ms"] > previous["median_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: median {previous['median_ms']:.4f}ms -> {current['median_ms']:.4f}ms "
+                f"(+{(current['median_ms'] / previous['median_ms'] - 1) * 100:.1f}%)"
+            )
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Microbenchmarks da camada de serviço")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="sessões por usuário")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-time", type=float, default=0.5, help="segundos mínimos por caso")
+    parser.add_argument("--max-repeat", type=int, default=1000)
+    parser.add_argument("--output", default="service_benchmark_results.json")
+    parser.add_argument("--baseline", help="resultados anteriores para comparação")
+    parser.add_argument("--threshold", type=float, default=0.20, help="regressão tolerada (0.20 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = run_benchmarks(args.sizes, args.seed, args.min_time, args.max_repeat)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for name, stats in results.items():
+        print(f"{name:<40} median={stats['median_ms']:>12.4f}ms min={stats['min_ms']:>12.4f}ms n={stats['repeat']}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressão(ões) acima de {args.threshold * 100:.0f}%:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Mede o tempo de cold start da aplicação.
+
+Cada rodada sobe um processo Python novo, importa `main` e executa o lifespan
+completo (tabelas, pool, catálogo), reportando import e startup separadamente.
+
+Exemplo:
+    python -m benchmarks.startup_time --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import List, Optional
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(run())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - started) * 1000,
+    "database_ready": main.app.state.database_ready,
+}))
+"""
+
+
+def measure(runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+        samples.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {
+        "runs": runs,
+        "import_ms_median": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "startup_ms_median": round(statistics.median(s["startup_ms"] for s in samples), 1),
+        "startup_ms_max": round(max(s["startup_ms"] for s in samples), 1),
+        "database_ready": all(s["database_ready"] for s in samples),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo de cold start da CirquloFit API")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    print(json.dumps(measure(args.runs), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
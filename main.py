@@ -1,15 +1,96 @@
-from fastapi import FastAPI
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.infrastructure.database import db
+from app.application.gif_service import GifService
+from app.application.progress_buffer import progress_buffer
+from app.application.jobs import scheduler
+from app.application.event_handlers import outbox_relay
+from app.infrastructure.pubsub import pubsub
+from app.infrastructure.event_bridge import event_bridge
+from app.core.admission import AdmissionController, AdmissionMiddleware
+from app.infrastructure.request_scope import RequestScopeMiddleware, unit_of_work
+from app.infrastructure.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, budget_stats
 from app.core.config import settings
-from routers import auth, workouts, users, gifs, sessions, dashboard
+from routers import auth, workouts, users, gifs, sessions, dashboard, events, history, analytics, sync, batch
+
+logger = logging.getLogger(__name__)
+
+admission = AdmissionController(pool_stats=db.pool_stats)
+
+async def init_database(app: FastAPI):
+    """Cria tabelas e aquece o pool, com backoff exponencial se o banco estiver fora"""
+    delay = settings.STARTUP_RETRY_INITIAL_SECONDS
+    while True:
+        try:
+            await run_in_threadpool(db.init_tables)
+            await run_in_threadpool(db.warm_up)
+            app.state.database_ready = True
+            logger.info("Banco de dados pronto")
+            outbox_relay.start()
+            if settings.SCHEDULER_ENABLED:
+                scheduler.start()
+            return
+        except Exception as e:
+            logger.warning("Banco indisponível (%s); nova tentativa em %.1fs", e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.STARTUP_RETRY_MAX_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Todo I/O de inicialização acontece aqui, não na importação do módulo
+    app.state.database_ready = False
+    admission.start()
+    # Eventos SSE publicados em qualquer worker chegam aos assinantes deste
+    event_bridge.start()
+    if settings.PROGRESS_WRITE_BEHIND:
+        progress_buffer.start()
+    app.state.gif_service = GifService()
+    await app.state.gif_service.load_catalog()
+
+    database_task = asyncio.create_task(init_database(app))
+    try:
+        await asyncio.wait_for(asyncio.shield(database_task), timeout=settings.STARTUP_DB_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("Subindo sem banco; inicialização continua em segundo plano")
+
+    app.state.startup_seconds = time.perf_counter() - _import_started
+    logger.info("Startup concluído em %.0f ms", app.state.startup_seconds * 1000)
+    try:
+        yield
+    finally:
+        # Também quando a aplicação é usada em processo (benchmarks) e a execução falha
+        database_task.cancel()
+        await scheduler.stop()
+        await outbox_relay.stop()
+        await event_bridge.stop()
+        pubsub.close()
+        await admission.stop()
+        if settings.PROGRESS_WRITE_BEHIND:
+            # Fallback de durabilidade: grava o progresso pendente antes de fechar o pool
+            try:
+                await progress_buffer.stop()
+            except Exception as e:
+                logger.error("Progresso pendente não gravado no shutdown: %s", e)
+        await run_in_threadpool(db.close)
 
 app = FastAPI(
     title="CirquloFit API",
     description="API para gamificação de treinos de academia",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(RequestScopeMiddleware, database=db)
+app.add_middleware(QueryBudgetMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -17,17 +98,30 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Inicializar tabelas
-db.init_tables()
+app.add_middleware(AdmissionMiddleware, controller=admission)
 
 # Incluir routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
-app.include_router(users.router, prefix="/api/users", tags=["users"])
-app.include_router(workouts.router, prefix="/api/workouts", tags=["workouts"])
-app.include_router(sessions.router, prefix="/api/workouts/sessions", tags=["sessions"])
-app.include_router(dashboard.router, prefix="/api/workouts/dashboard", tags=["dashboard"])
+# Rotas com unit of work: uma conexão e um commit por requisição (auth + handler + serviços)
+scoped = [Depends(unit_of_work)]
+app.include_router(users.router, prefix="/api/users", tags=["users"], dependencies=scoped)
+app.include_router(workouts.router, prefix="/api/workouts", tags=["workouts"], dependencies=scoped)
+app.include_router(sessions.router, prefix="/api/workouts/sessions", tags=["sessions"], dependencies=scoped)
+app.include_router(dashboard.router, prefix="/api/workouts/dashboard", tags=["dashboard"], dependencies=scoped)
+app.include_router(history.router, prefix="/api/workouts/history", tags=["history"])
+app.include_router(analytics.router, prefix="/api/workouts/analytics", tags=["analytics"])
 app.include_router(gifs.router, prefix="/api/gifs", tags=["gifs"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
+app.include_router(sync.router, prefix="/api/sync", tags=["sync"])
+app.include_router(batch.router, prefix="/api/batch", tags=["batch"], dependencies=scoped)
+
+@app.exception_handler(QueryBudgetExceeded)
+async def query_budget_exceeded(request: Request, exc: QueryBudgetExceeded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Consulta excedeu o tempo limite, tente novamente"},
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)}
+    )
 
 @app.get("/")
 async def root():
@@ -35,5 +129,36 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "database_ready": getattr(app.state, "database_ready", False),
+        "startup_ms": round(getattr(app.state, "startup_seconds", 0) * 1000, 1),
+        "query_cache": db.query_cache.stats(),
+        "query_budgets": budget_stats.snapshot(),
+        "scheduler": scheduler.snapshot(),
+        "outbox": outbox_relay.stats(),
+        "events": dict(pubsub.stats(), bridge=event_bridge.stats())
+    }
+
+def _check_database():
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Pronto para receber tráfego: banco respondendo e catálogo carregado"""
+    checks = {}
+    try:
+        await asyncio.wait_for(run_in_threadpool(_check_database), timeout=settings.READINESS_TIMEOUT_SECONDS)
+        checks["database"] = "ok"
+    except Exception as e:
+        checks["database"] = f"erro: {e.__class__.__name__}"
+    gif_service = getattr(app.state, "gif_service", None)
+    checks["catalog"] = "ok" if gif_service is not None and gif_service.catalog_loaded else "não carregado"
 
+    ready = all(value == "ok" for value in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": checks, "load": admission.snapshot()},
+        headers=None if ready else {"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)}
+    )
@@ -0,0 +1,55 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from app.infrastructure.database import db
+from app.domain.entities import User
+from app.application.analytics_service import strength_analytics
+from app.application.records_service import PersonalRecordsService
+from app.application.muscle_volume_service import MuscleVolumeService
+from app.application.achievements_service import AchievementsService
+from app.application.schemas.analytics import Achievement, MuscleHeatmap, PersonalRecord, StrengthAnalytics
+from routers.auth import get_current_user
+
+router = APIRouter(tags=["analytics"])
+
+records_service = PersonalRecordsService(db)
+muscle_volume_service = MuscleVolumeService(db)
+achievements_service = AchievementsService(db)
+
+@router.get("/strength", response_model=StrengthAnalytics)
+def get_strength_analytics(current_user: User = Depends(get_current_user)):
+    """1RM estimado, tonelagem semanal com média de 4 semanas e PRs por exercício"""
+    return strength_analytics.get(current_user.id)
+
+@router.get("/records", response_model=List[PersonalRecord])
+def get_personal_records(
+    exercise_name: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Recordes pessoais por exercício e faixa de repetições (índice incremental)"""
+    return [
+        PersonalRecord(
+            exercise_name=row['exercise_name'],
+            rep_bucket=row['rep_bucket'],
+            best_weight=float(row['best_weight']),
+            best_weight_reps=row['best_weight_reps'],
+            best_weight_at=row['best_weight_at'],
+            best_volume=float(row['best_volume']),
+            best_volume_at=row['best_volume_at']
+        )
+        for row in records_service.get_records(current_user.id, exercise_name)
+    ]
+
+@router.get("/muscles", response_model=MuscleHeatmap)
+def get_muscle_heatmap(
+    weeks: int = Query(12, ge=1, le=104),
+    current_user: User = Depends(get_current_user)
+):
+    """Séries, repetições e tonelagem por grupo muscular e semana ISO (rollups pré-calculados)"""
+    return muscle_volume_service.get_heatmap(current_user.id, weeks)
+
+@router.get("/achievements", response_model=List[Achievement])
+def get_achievements(current_user: User = Depends(get_current_user)):
+    """Conquistas com o progresso do usuário em cada uma"""
+    return achievements_service.get_achievements(current_user.id)
@@ -1,23 +1,28 @@
+from contextvars import ContextVar
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.infrastructure.database import db
 from app.domain.entities import User
 from app.application.schemas.user import UserCreate, UserResponse, Token, UserLogin
 from app.core.config import settings
+from app.core import security
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Usuário já autenticado pelo lote (POST /api/batch): as sub-requisições não decodificam o token de novo
+authenticated_user: ContextVar[Optional[User]] = ContextVar("authenticated_user", default=None)
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return security.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return security.get_password_hash(password)
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -32,6 +37,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 def get_user_by_email(email: str):
     try:
         print(f"DEBUG: Buscando usuário por email: {email}")
+        # Sempre no primário: o login logo após o registro precisa enxergar o usuário
         with db.get_cursor() as cursor:
             print("DEBUG: Cursor obtido para busca de usuário")
             cursor.execute("""
@@ -59,30 +65,44 @@ def get_user_by_email(email: str):
         raise
 
 def authenticate_user(email: str, password: str):
+    """Usuário com a senha conferida; refaz o hash se ele usa parâmetros desatualizados.
+
+    Chamar fora do event loop (run_in_threadpool): o hash custa centenas de ms de CPU.
+    """
     user = get_user_by_email(email)
     if not user:
+        security.dummy_verify()
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = security.verify_and_update(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        with db.get_cursor(user_id=user.id) as cursor:
+            cursor.execute("""
+                UPDATE users SET hashed_password = %s WHERE id = %s AND hashed_password = %s
+            """, (new_hash, user.id, user.hashed_password))
+        user.hashed_password = new_hash
     return user
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def get_user_from_token(token: str):
+    """Usuário do token JWT, ou None se o token for inválido"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    user = get_user_by_email(email)
+        return None
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+    return get_user_by_email(email)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    user = authenticated_user.get() or get_user_from_token(token)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 @router.post("/register", response_model=UserResponse)
@@ -101,7 +121,7 @@ async def register(user: UserCreate):
             )
         
         print("DEBUG: Usuário não existe, criando hash da senha")
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await run_in_threadpool(get_password_hash, user.password)
         
         print("DEBUG: Iniciando transação de banco")
         with db.get_cursor() as cursor:
@@ -167,7 +187,7 @@ async def register(user: UserCreate):
 
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await run_in_threadpool(authenticate_user, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -182,7 +202,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 @router.post("/login-json", response_model=Token)
 async def login_json(login_data: UserLogin):
-    user = authenticate_user(login_data.email, login_data.password)
+    user = await run_in_threadpool(authenticate_user, login_data.email, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
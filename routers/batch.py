@@ -0,0 +1,167 @@
+"""Lote de leituras: várias rotas GET numa requisição só.
+
+Ao abrir, o app faz cinco chamadas em paralelo (perfil, dashboard, treinos,
+estatísticas, progresso semanal). O lote autentica uma vez e executa cada
+sub-requisição nas rotas existentes, pelo router da aplicação (sem os
+middlewares de admissão, CORS e escopo), dentro do unit of work do lote:
+uma conexão e um snapshot para todas as leituras.
+
+As sub-requisições rodam em sequência. As rotas `def` (executadas no
+threadpool) vêm primeiro: escritas preguiçosas das rotas async ficam para o
+fim, e a transação não segura locks delas enquanto espera uma thread. A
+resposta mantém a ordem pedida.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.routing import Match
+
+from app.core.config import settings
+from app.domain.entities import User
+from app.infrastructure.database import db
+from app.infrastructure.request_scope import current_scope
+from app.application.schemas.batch import BatchItemResult, BatchRequest, BatchResponse
+from routers.auth import authenticated_user, get_current_user
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["batch"])
+
+# Streams, autenticação e o próprio lote ficam de fora
+_EXCLUDED_PREFIXES = ("/api/batch", "/api/auth", "/api/events", "/api/workouts/history/export")
+
+
+def _allowed(path: str) -> bool:
+    url = urlsplit(path)
+    return (
+        not url.scheme and not url.netloc
+        and url.path.startswith("/api/") and not url.path.startswith(_EXCLUDED_PREFIXES)
+    )
+
+
+def _sub_scope(request: Request, path: str) -> Dict:
+    url = urlsplit(path)
+    return {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": "",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": [(b"authorization", request.headers.get("authorization", "").encode())],
+        "app": request.app,
+    }
+
+
+def _runs_in_thread(request: Request, scope: Dict) -> bool:
+    """Rota `def`: o FastAPI a executa no threadpool"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return not asyncio.iscoroutinefunction(getattr(route, "endpoint", None))
+    return False
+
+
+async def _call(handler, scope: Dict) -> Dict[str, Any]:
+    response = {"status": 500, "headers": [], "body": b""}
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # O cliente do lote segue conectado enquanto a sub-requisição roda
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await handler(scope, receive, send)
+    return response
+
+
+async def _dispatch(request: Request, handler, path: str) -> Dict[str, Any]:
+    response = await _call(handler, _sub_scope(request, path))
+    location = dict(response["headers"]).get(b"location")
+    if response["status"] in (307, 308) and location:
+        # Barra final: segue o redirecionamento do router uma vez, sem sair do lote
+        redirected = urlsplit(location.decode())
+        path = redirected.path + (f"?{redirected.query}" if redirected.query else "")
+        if _allowed(path):
+            response = await _call(handler, _sub_scope(request, path))
+
+    body = response["body"]
+    content_type = dict(response["headers"]).get(b"content-type", b"")
+    if b"json" in content_type:
+        response["body"] = json.loads(body) if body else None
+    else:
+        response["body"] = body.decode("utf-8", "replace")
+    return response
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Executar várias leituras (GET) com uma autenticação e um snapshot do banco"""
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {settings.BATCH_MAX_REQUESTS} requisições por lote"
+        )
+
+    results: List[BatchItemResult] = [None] * len(batch.requests)
+    pending = []
+    for index, item in enumerate(batch.requests):
+        if not _allowed(item.path):
+            results[index] = BatchItemResult(
+                id=item.id, path=item.path, status=status.HTTP_400_BAD_REQUEST,
+                body={"detail": "Caminho não permitido no lote"}
+            )
+        else:
+            pending.append(index)
+    pending.sort(key=lambda index: not _runs_in_thread(request, _sub_scope(request, batch.requests[index].path)))
+
+    # Mesma pilha interna da aplicação: tratamento de exceções (HTTPException, validação,
+    # orçamento de consultas) e a pilha de saída das dependências do FastAPI
+    handlers = {key: value for key, value in request.app.exception_handlers.items() if key not in (500, Exception)}
+    handler = ExceptionMiddleware(AsyncExitStackMiddleware(request.app.router), handlers=handlers)
+
+    scope = current_scope()
+    if scope is not None:
+        scope.shared = True
+    db.pin_snapshot(current_user.id)
+    token = authenticated_user.set(current_user)
+    try:
+        for index in pending:
+            item = batch.requests[index]
+            try:
+                response = await _dispatch(request, handler, item.path)
+            except Exception:
+                logger.exception("Falha na sub-requisição %s do lote", item.path)
+                response = {"status": 500, "body": {"detail": "Erro interno do servidor"}}
+            results[index] = BatchItemResult(
+                id=item.id, path=item.path, status=response["status"], body=response["body"]
+            )
+    finally:
+        authenticated_user.reset(token)
+
+    return BatchResponse(results=results)
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from typing import List
 
 from app.infrastructure.database import db
+from app.infrastructure.pubsub import pubsub
 from app.domain.entities import User
 from app.application.schemas.dashboard import DashboardData, WeeklyData, CalendarData, LoadEvolutionData
 from routers.auth import get_current_user
@@ -10,11 +11,12 @@ from routers.auth import get_current_user
 router = APIRouter(tags=["dashboard"])
 
 @router.get("/", response_model=DashboardData)
-async def get_dashboard_data(
+def get_dashboard_data(
     current_user: User = Depends(get_current_user)
 ):
     """Obter dados do dashboard"""
-    with db.get_cursor() as cursor:
+    # Rota síncrona (threadpool): a consulta pode ser cancelada se o cliente desconectar
+    with db.get_cursor(readonly=True, user_id=current_user.id) as cursor:
         # Obter dados da última semana
         week_start = datetime.now() - timedelta(days=7)
         week_end = datetime.now()
@@ -30,6 +32,14 @@ async def get_dashboard_data(
         """, (current_user.id, week_start))
         
         sessions_data = cursor.fetchall()
+        sessions_by_day = {}
+        for row in sessions_data:
+            day = row['date']
+            if isinstance(day, str):
+                day = datetime.strptime(day, '%Y-%m-%d')
+            if isinstance(day, datetime):
+                day = day.date()
+            sessions_by_day[day] = (day, row['sessions'], row['completed'] or 0)
         
         # Criar dados semanais
         week_days = ['Dom', 'Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb']
@@ -37,7 +47,7 @@ async def get_dashboard_data(
         
         for i in range(7):
             date = week_start + timedelta(days=i)
-            day_sessions = next((row for row in sessions_data if row[0].date() == date.date()), (date.date(), 0, 0))
+            day_sessions = sessions_by_day.get(date.date(), (date.date(), 0, 0))
             
             weekly_data.append(WeeklyData(
                 day=week_days[date.weekday()],
@@ -50,7 +60,7 @@ async def get_dashboard_data(
         calendar_data = []
         for i in range(30):
             date = datetime.now() - timedelta(days=29-i)
-            day_sessions = next((row for row in sessions_data if row[0].date() == date.date()), (date.date(), 0, 0))
+            day_sessions = sessions_by_day.get(date.date(), (date.date(), 0, 0))
             
             calendar_data.append(CalendarData(
                 day=week_days[date.weekday()],
@@ -73,31 +83,33 @@ async def get_dashboard_data(
             SELECT weekly_goal, total_sessions, completion_rate, streak_days
             FROM dashboard_data 
             WHERE user_id = %s
-        """, (current_user.id,))
+        """, (current_user.id,), cache=True)
         
         dashboard_row = cursor.fetchone()
-        if not dashboard_row:
-            # Criar dados iniciais
-            cursor.execute("""
+
+    if not dashboard_row:
+        # Criar dados iniciais depois da leitura (escrita vai para o primário, em transação própria)
+        with db.get_cursor(user_id=current_user.id) as write_cursor:
+            write_cursor.execute("""
                 INSERT INTO dashboard_data (user_id, weekly_goal, total_sessions, completion_rate, streak_days, created_at, updated_at)
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """, (current_user.id, 5, total_sessions, completion_rate, 0, datetime.utcnow(), datetime.utcnow()))
-            
-            weekly_goal = 5
-            streak_days = 0
-        else:
-            weekly_goal = dashboard_row[0]
-            streak_days = dashboard_row[3]
         
-        return DashboardData(
-            weekly_data=weekly_data,
-            calendar_data=calendar_data,
-            load_evolution_data=load_evolution_data,
-            weekly_goal=weekly_goal,
-            total_sessions=total_sessions,
-            completion_rate=completion_rate,
-            streak_days=streak_days
-        )
+        weekly_goal = 5
+        streak_days = 0
+    else:
+        weekly_goal = dashboard_row['weekly_goal']
+        streak_days = dashboard_row['streak_days']
+    
+    return DashboardData(
+        weekly_data=weekly_data,
+        calendar_data=calendar_data,
+        load_evolution_data=load_evolution_data,
+        weekly_goal=weekly_goal,
+        total_sessions=total_sessions,
+        completion_rate=completion_rate,
+        streak_days=streak_days
+    )
 
 @router.put("/goal")
 async def update_weekly_goal(
@@ -111,7 +123,7 @@ async def update_weekly_goal(
             detail="Meta semanal deve estar entre 1 e 20"
         )
     
-    with db.get_cursor() as cursor:
+    with db.get_cursor(user_id=current_user.id) as cursor:
         cursor.execute("""
             UPDATE dashboard_data 
             SET weekly_goal = %s, updated_at = %s
@@ -124,5 +136,6 @@ async def update_weekly_goal(
                 INSERT INTO dashboard_data (user_id, weekly_goal, created_at, updated_at)
                 VALUES (%s, %s, %s, %s)
             """, (current_user.id, weekly_goal, datetime.utcnow(), datetime.utcnow()))
-        
-        return {"message": "Meta semanal atualizada com sucesso", "weekly_goal": weekly_goal}
+    
+    db.after_commit(lambda: pubsub.publish(current_user.id, "goal_updated", {"weekly_goal": weekly_goal}))
+    return {"message": "Meta semanal atualizada com sucesso", "weekly_goal": weekly_goal}
@@ -0,0 +1,72 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.infrastructure.pubsub import CLOSED, pubsub
+from routers.auth import get_user_from_token
+
+router = APIRouter()
+
+def _format(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/")
+async def stream_events(
+    request: Request,
+    token: Optional[str] = None,
+    authorization: Optional[str] = Header(None)
+):
+    """Stream SSE com as mudanças de dashboard/progresso do usuário.
+
+    EventSource não envia headers, então o token também é aceito em `?token=`.
+    Eventos: `session_completed`, `exercise_progress`, `goal_updated`.
+    """
+    if not token and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    user = await run_in_threadpool(get_user_from_token, token) if token else None
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    subscription = pubsub.subscribe(user.id)
+
+    async def events():
+        event_id = 0
+        try:
+            yield "retry: 3000\n\n"
+            yield _format("ready", {"user_id": user.id})
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Comentário SSE mantém proxies e a conexão vivos
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is CLOSED:
+                    # Consumidor lento ou shutdown: o cliente reconecta e relê o estado
+                    return
+                event_id += 1
+                yield _format(message["event"], message["data"], event_id)
+        finally:
+            pubsub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import List
 from app.application.gif_service import GifService
 from app.core.config import settings
 
 router = APIRouter()
-gif_service = GifService()
+
+def get_gif_service(request: Request) -> GifService:
+    """GifService criado no lifespan da aplicação"""
+    return request.app.state.gif_service
 
 @router.get("/search")
-async def search_exercise_gifs(exercise: str, limit: int = 5):
+async def search_exercise_gifs(exercise: str, limit: int = 5, gif_service: GifService = Depends(get_gif_service)):
     """Busca GIFs relacionados a um exercício específico"""
     try:
         gifs = await gif_service.search_exercise_gifs(exercise, limit)
@@ -16,7 +19,7 @@ async def search_exercise_gifs(exercise: str, limit: int = 5):
         raise HTTPException(status_code=500, detail=f"Erro ao buscar GIFs: {str(e)}")
 
 @router.get("/trending")
-async def get_trending_workout_gifs(limit: int = 10):
+async def get_trending_workout_gifs(limit: int = 10, gif_service: GifService = Depends(get_gif_service)):
     """Busca GIFs em tendência relacionados a treinos"""
     try:
         gifs = await gif_service.get_trending_workout_gifs(limit)
@@ -0,0 +1,54 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.infrastructure.database import db
+from app.domain.entities import User
+from app.application.history_service import HistoryService
+from app.application.schemas.history import HistorySession, LifetimeTotals
+from routers.auth import get_current_user
+
+router = APIRouter(tags=["history"])
+
+history_service = HistoryService(db)
+
+@router.get("/", response_model=List[HistorySession])
+async def get_history(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Histórico de sessões do período (padrão: últimos 90 dias), incluindo o arquivo frio"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=90)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Data inicial deve ser anterior à final"
+        )
+    return history_service.get_history(
+        current_user.id,
+        datetime.combine(start, datetime.min.time()),
+        datetime.combine(end + timedelta(days=1), datetime.min.time())
+    )
+
+@router.get("/export")
+async def export_history(current_user: User = Depends(get_current_user)):
+    """Exportação completa em NDJSON (uma sessão por linha), gerada mês a mês"""
+    def lines():
+        for session in history_service.iter_export(current_user.id):
+            yield HistorySession(**session).model_dump_json() + "\n"
+
+    filename = f"cirqulofit-historico-{current_user.id}.ndjson"
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/lifetime", response_model=LifetimeTotals)
+async def get_lifetime_totals(current_user: User = Depends(get_current_user)):
+    """Totais vitalícios (banco + manifesto do arquivo frio)"""
+    return history_service.lifetime_totals(current_user.id)
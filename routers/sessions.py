@@ -1,112 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from typing import List, Optional
+from datetime import datetime, timezone
 
 from app.infrastructure.database import db
+from app.infrastructure.idempotency import idempotency_store, request_hash
+from app.infrastructure.pubsub import pubsub
+from app.application.progress_buffer import progress_buffer
+from app.application.event_handlers import outbox_relay
+from app.application.records_service import PersonalRecordsService
+from app.application.muscle_volume_service import MuscleVolumeService
+from app.core.config import settings
 from app.domain.entities import User
+from app.domain.events import ExerciseCompleted, SessionCompleted
+from app.domain.muscle_groups import resolve_muscle_group
 from app.application.schemas.session import (
     WorkoutSessionCreate, WorkoutSessionResponse,
     WorkoutExerciseCreate, WorkoutExerciseResponse,
-    ExerciseProgressUpdate
+    ExerciseProgressUpdate, SessionUpload, SessionUploadResult,
+    SessionBatchUpload, SessionBatchResponse, ExerciseUploadResponse
 )
-from routers.auth import get_current_user
+from routers.auth import get_current_user, get_user_from_token
 
 router = APIRouter(tags=["sessions"])
 
-@router.post("/", response_model=WorkoutSessionResponse)
-async def start_workout_session(
-    session_data: WorkoutSessionCreate,
-    current_user: User = Depends(get_current_user)
-):
-    """Iniciar uma nova sessão de treino"""
-    with db.get_cursor() as cursor:
-        # Verificar se o treino existe e pertence ao usuário
-        cursor.execute("""
-            SELECT id FROM workouts WHERE id = %s AND user_id = %s
-        """, (session_data.workout_id, current_user.id))
-        
-        if not cursor.fetchone():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Treino não encontrado"
-            )
-        
-        # Criar sessão
-        started_at = session_data.started_at or datetime.utcnow()
-        cursor.execute("""
-            INSERT INTO workout_sessions (user_id, workout_id, started_at, created_at, updated_at)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            current_user.id,
-            session_data.workout_id,
-            started_at,
-            datetime.utcnow(),
-            datetime.utcnow()
-        ))
-        
-        # Buscar a sessão criada
-        cursor.execute("""
-            SELECT id, user_id, workout_id, started_at, completed_at, duration, xp_earned, is_completed, created_at, updated_at
-            FROM workout_sessions 
-            WHERE user_id = %s AND workout_id = %s
-            ORDER BY created_at DESC
-            LIMIT 1
-        """, (current_user.id, session_data.workout_id))
-        
-        session_result = cursor.fetchone()
-        if not session_result:
-            raise HTTPException(
-                status_code=500,
-                detail="Erro ao criar sessão"
-            )
-        
-        return WorkoutSessionResponse(
-            id=session_result['id'],
-            user_id=session_result['user_id'],
-            workout_id=session_result['workout_id'],
-            started_at=session_result['started_at'],
-            completed_at=session_result['completed_at'],
-            duration=session_result['duration'],
-            xp_earned=session_result['xp_earned'],
-            is_completed=session_result['is_completed'],
-            created_at=session_result['created_at'],
-            updated_at=session_result['updated_at']
-        )
+records_service = PersonalRecordsService(db)
+muscle_volume_service = MuscleVolumeService(db)
 
-@router.patch("/{session_id}/complete", response_model=WorkoutSessionResponse)
-async def complete_workout_session(
-    session_id: int,
-    current_user: User = Depends(get_current_user)
-):
-    """Completar uma sessão de treino"""
-    with db.get_cursor() as cursor:
+def _session_response(session_data) -> WorkoutSessionResponse:
+    return WorkoutSessionResponse(
+        id=session_data['id'],
+        user_id=session_data['user_id'],
+        workout_id=session_data['workout_id'],
+        started_at=session_data['started_at'],
+        completed_at=session_data['completed_at'],
+        duration=session_data['duration'],
+        xp_earned=session_data['xp_earned'],
+        is_completed=session_data['is_completed'],
+        created_at=session_data['created_at'],
+        updated_at=session_data['updated_at']
+    )
+
+def _exercise_response(exercise_data, new_pr: bool = False) -> WorkoutExerciseResponse:
+    return WorkoutExerciseResponse(
+        id=exercise_data['id'],
+        session_id=exercise_data['session_id'],
+        exercise_name=exercise_data['exercise_name'],
+        sets=exercise_data['sets'],
+        reps=exercise_data['reps'],
+        weight=exercise_data['weight'],
+        muscle_group=exercise_data['muscle_group'],
+        completed_sets=exercise_data['completed_sets'],
+        is_completed=exercise_data['is_completed'],
+        created_at=exercise_data['created_at'],
+        updated_at=exercise_data['updated_at'],
+        new_pr=new_pr
+    )
+
+def _session_xp(duration: int, exercise_count: int) -> int:
+    return duration * 2 + exercise_count * 10
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Datas do cliente podem vir com fuso; o banco guarda UTC sem fuso
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+# Lógica das sessões, compartilhada entre as rotas HTTP e o canal WebSocket
+
+def complete_session(session_id: int, user_id: int) -> WorkoutSessionResponse:
+    if settings.PROGRESS_WRITE_BEHIND:
+        # Progresso pendente da sessão precisa estar no banco antes de fechá-la
+        progress_buffer.flush(session_id=session_id)
+
+    with db.get_cursor(user_id=user_id) as cursor:
         # Verificar se a sessão existe e pertence ao usuário
         cursor.execute("""
             SELECT * FROM workout_sessions WHERE id = %s AND user_id = %s
-        """, (session_id, current_user.id))
-        
+        """, (session_id, user_id))
+
         session = cursor.fetchone()
         if not session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Sessão não encontrada"
             )
-        
+
         # Calcular duração e XP
         started_at = session['started_at']
         completed_at = datetime.utcnow()
         duration = int((completed_at - started_at).total_seconds() / 60)  # em minutos
-        
+
         # Calcular XP baseado na duração e exercícios
         cursor.execute("""
-            SELECT COUNT(*) FROM workout_exercises WHERE session_id = %s
-        """, (session_id,))
+            SELECT COUNT(*) FROM workout_exercises WHERE session_id = %s AND session_started_at = %s
+        """, (session_id, started_at))
         exercise_count = cursor.fetchone()['count']
-        xp_earned = duration * 2 + exercise_count * 10
-        
+        xp_earned = _session_xp(duration, exercise_count)
+
         # Atualizar sessão
         cursor.execute("""
-            UPDATE workout_sessions 
+            UPDATE workout_sessions
             SET completed_at = %s, duration = %s, xp_earned = %s, is_completed = true, updated_at = %s
             WHERE id = %s
         """, (
@@ -116,124 +111,135 @@ async def complete_workout_session(
             datetime.utcnow(),
             session_id
         ))
-        
+
+        # Efeitos colaterais (progresso, conquistas) saem pelo outbox, na mesma transação;
+        # concluir de novo uma sessão já concluída não gera outro evento
+        if not session['is_completed']:
+            outbox_relay.publish(cursor, SessionCompleted(
+                user_id, session_id, session['workout_id'], started_at, completed_at,
+                duration, xp_earned, exercise_count
+            ))
+
         # Buscar a sessão atualizada
         cursor.execute("""
             SELECT id, user_id, workout_id, started_at, completed_at, duration, xp_earned, is_completed, created_at, updated_at
-            FROM workout_sessions 
+            FROM workout_sessions
             WHERE id = %s
         """, (session_id,))
-        
+
         session_data = cursor.fetchone()
         if not session_data:
             raise HTTPException(
                 status_code=500,
                 detail="Erro ao atualizar sessão"
             )
-        
-        return WorkoutSessionResponse(
-            id=session_data['id'],
-            user_id=session_data['user_id'],
-            workout_id=session_data['workout_id'],
-            started_at=session_data['started_at'],
-            completed_at=session_data['completed_at'],
-            duration=session_data['duration'],
-            xp_earned=session_data['xp_earned'],
-            is_completed=session_data['is_completed'],
-            created_at=session_data['created_at'],
-            updated_at=session_data['updated_at']
-        )
 
-@router.post("/{session_id}/exercises", response_model=WorkoutExerciseResponse)
-async def add_exercise_to_session(
-    session_id: int,
-    exercise_data: WorkoutExerciseCreate,
-    current_user: User = Depends(get_current_user)
-):
-    """Adicionar exercício a uma sessão"""
-    with db.get_cursor() as cursor:
+        completed = _session_response(session_data)
+
+    if settings.PROGRESS_WRITE_BEHIND:
+        progress_buffer.forget_session(session_id)
+
+    # Publicado após o commit: quem reagir ao evento já enxerga a sessão completa
+    db.after_commit(lambda: pubsub.publish(user_id, "session_completed", {
+        "session_id": session_id,
+        "workout_id": completed.workout_id,
+        "duration": completed.duration,
+        "xp_earned": completed.xp_earned,
+    }))
+    return completed
+
+def add_exercise(session_id: int, exercise_data: WorkoutExerciseCreate, user_id: int) -> WorkoutExerciseResponse:
+    with db.get_cursor(user_id=user_id) as cursor:
         # Verificar se a sessão existe e pertence ao usuário
         cursor.execute("""
-            SELECT id FROM workout_sessions WHERE id = %s AND user_id = %s
-        """, (session_id, current_user.id))
-        
-        if not cursor.fetchone():
+            SELECT id, started_at FROM workout_sessions WHERE id = %s AND user_id = %s
+        """, (session_id, user_id))
+
+        session = cursor.fetchone()
+        if not session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Sessão não encontrada"
             )
-        
+
         # Adicionar exercício
         cursor.execute("""
-            INSERT INTO workout_exercises (session_id, exercise_name, sets, reps, weight, created_at, updated_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            INSERT INTO workout_exercises (session_id, session_started_at, exercise_name, muscle_group, sets, reps, weight, created_at, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """, (
             session_id,
+            session['started_at'],
             exercise_data.exercise_name,
+            resolve_muscle_group(exercise_data.exercise_name, exercise_data.muscle_group),
             exercise_data.sets,
             exercise_data.reps,
             exercise_data.weight,
             datetime.utcnow(),
             datetime.utcnow()
         ))
-        
+
         # Buscar o exercício criado
         cursor.execute("""
-            SELECT id, session_id, exercise_name, sets, reps, weight, completed_sets, is_completed, created_at, updated_at
-            FROM workout_exercises 
-            WHERE session_id = %s AND exercise_name = %s
+            SELECT id, session_id, session_started_at, exercise_name, muscle_group, sets, reps, weight, completed_sets, is_completed, created_at, updated_at
+            FROM workout_exercises
+            WHERE session_id = %s AND session_started_at = %s AND exercise_name = %s
             ORDER BY created_at DESC
             LIMIT 1
-        """, (session_id, exercise_data.exercise_name))
-        
+        """, (session_id, session['started_at'], exercise_data.exercise_name))
+
         exercise_result = cursor.fetchone()
         if not exercise_result:
             raise HTTPException(
                 status_code=500,
                 detail="Erro ao criar exercício"
             )
-        
-        return WorkoutExerciseResponse(
-            id=exercise_result['id'],
-            session_id=exercise_result['session_id'],
-            exercise_name=exercise_result['exercise_name'],
-            sets=exercise_result['sets'],
-            reps=exercise_result['reps'],
-            weight=exercise_result['weight'],
-            completed_sets=exercise_result['completed_sets'],
-            is_completed=exercise_result['is_completed'],
-            created_at=exercise_result['created_at'],
-            updated_at=exercise_result['updated_at']
-        )
 
-@router.patch("/exercises/{exercise_id}/progress", response_model=WorkoutExerciseResponse)
-async def update_exercise_progress(
-    exercise_id: int,
-    progress_data: ExerciseProgressUpdate,
-    current_user: User = Depends(get_current_user)
-):
-    """Atualizar progresso de um exercício"""
-    with db.get_cursor() as cursor:
-        # Verificar se o exercício existe e pertence ao usuário
+        return _exercise_response(exercise_result)
+
+def update_progress(exercise_id: int, completed_sets: int, user_id: int) -> WorkoutExerciseResponse:
+    if settings.PROGRESS_WRITE_BEHIND:
+        # Ack imediato; gravação em lote pelo buffer
+        exercise_data = progress_buffer.apply(exercise_id, user_id, completed_sets)
+        if not exercise_data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Exercício não encontrado"
+            )
+        new_pr = False
+        if exercise_data['is_completed'] or exercise_data['was_completed']:
+            with db.get_cursor(user_id=user_id) as cursor:
+                muscle_volume_service.apply_change(
+                    cursor, user_id, exercise_data, exercise_data['previous_sets'], exercise_data['was_completed']
+                )
+                if exercise_data['just_completed']:
+                    new_pr = records_service.record(cursor, user_id, exercise_data, exercise_data['updated_at'])
+                    _publish_completed(cursor, user_id, exercise_data)
+        exercise = _exercise_response(exercise_data, new_pr)
+        _publish_progress(user_id, exercise)
+        return exercise
+
+    with db.get_cursor(user_id=user_id) as cursor:
+        # Verificar se o exercício existe e pertence ao usuário; a trava serializa
+        # PATCHes concorrentes, que calculam recorde e rollup sobre o estado anterior
         cursor.execute("""
             SELECT we.* FROM workout_exercises we
             JOIN workout_sessions ws ON we.session_id = ws.id
             WHERE we.id = %s AND ws.user_id = %s
-        """, (exercise_id, current_user.id))
-        
+            FOR UPDATE OF we
+        """, (exercise_id, user_id))
+
         exercise = cursor.fetchone()
         if not exercise:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Exercício não encontrado"
             )
-        
+
         # Atualizar progresso
-        completed_sets = progress_data.completed_sets
         is_completed = completed_sets >= exercise['sets']  # exercise['sets'] é o número de sets
-        
+
         cursor.execute("""
-            UPDATE workout_exercises 
+            UPDATE workout_exercises
             SET completed_sets = %s, is_completed = %s, updated_at = %s
             WHERE id = %s
         """, (
@@ -242,33 +248,277 @@ async def update_exercise_progress(
             datetime.utcnow(),
             exercise_id
         ))
-        
+
         # Buscar o exercício atualizado
         cursor.execute("""
-            SELECT id, session_id, exercise_name, sets, reps, weight, completed_sets, is_completed, created_at, updated_at
-            FROM workout_exercises 
+            SELECT id, session_id, session_started_at, exercise_name, muscle_group, sets, reps, weight, completed_sets, is_completed, created_at, updated_at
+            FROM workout_exercises
             WHERE id = %s
         """, (exercise_id,))
-        
+
         exercise_data = cursor.fetchone()
         if not exercise_data:
             raise HTTPException(
                 status_code=500,
                 detail="Erro ao atualizar exercício"
             )
-        
-        return WorkoutExerciseResponse(
-            id=exercise_data['id'],
-            session_id=exercise_data['session_id'],
-            exercise_name=exercise_data['exercise_name'],
-            sets=exercise_data['sets'],
-            reps=exercise_data['reps'],
-            weight=exercise_data['weight'],
-            completed_sets=exercise_data['completed_sets'],
-            is_completed=exercise_data['is_completed'],
-            created_at=exercise_data['created_at'],
-            updated_at=exercise_data['updated_at']
+
+        # Recorde atualizado na mesma transação, só na transição para concluído
+        new_pr = False
+        if is_completed and not exercise['is_completed']:
+            new_pr = records_service.record(cursor, user_id, exercise_data, exercise_data['updated_at'])
+            _publish_completed(cursor, user_id, exercise_data)
+        # Rollup semanal por grupo muscular, pela diferença em relação ao estado anterior
+        muscle_volume_service.apply_change(
+            cursor, user_id, exercise_data, exercise['completed_sets'], exercise['is_completed']
+        )
+
+        exercise = _exercise_response(exercise_data, new_pr)
+
+    _publish_progress(user_id, exercise)
+    return exercise
+
+def ingest_session(upload: SessionUpload, user_id: int) -> SessionUploadResult:
+    """Grava uma sessão feita offline (início, exercícios, séries e conclusão) de uma vez.
+
+    Tudo entra num único savepoint: ou a sessão inteira é gravada, com
+    recordes, rollups e eventos, ou nada é. O `client_id` da sessão é a
+    chave de idempotência; reenviar o mesmo documento devolve a resposta
+    gravada em vez de criar outra sessão.
+    """
+    if not 0 < len(upload.client_id) <= 100:
+        raise HTTPException(status_code=422, detail="client_id inválido")
+    if len(upload.exercises) > settings.SESSION_UPLOAD_MAX_EXERCISES:
+        raise HTTPException(status_code=422, detail="Exercícios demais na sessão")
+    if len({ex.client_id for ex in upload.exercises}) != len(upload.exercises):
+        raise HTTPException(status_code=422, detail="client_id de exercício repetido")
+    started_at = _naive_utc(upload.started_at)
+    completed_at = _naive_utc(upload.completed_at)
+    if completed_at is not None and completed_at < started_at:
+        raise HTTPException(status_code=422, detail="completed_at anterior a started_at")
+
+    key = f"session:{upload.client_id}"
+    body_hash = request_hash(upload.model_dump_json())
+    with db.get_cursor(user_id=user_id) as cursor:
+        stored = idempotency_store.claim(cursor, user_id, key, body_hash)
+        if stored is not None:
+            if stored['request_hash'] != body_hash or stored['response'] is None:
+                return SessionUploadResult(
+                    client_id=upload.client_id, status="conflict",
+                    error="client_id já usado com outro conteúdo"
+                )
+            result = SessionUploadResult.model_validate_json(stored['response'])
+            result.status = "duplicate"
+            return result
+
+        cursor.execute("""
+            SELECT id FROM workouts WHERE id = %s AND user_id = %s
+        """, (upload.workout_id, user_id))
+        if not cursor.fetchone():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Treino não encontrado"
+            )
+
+        duration, xp_earned = None, 0
+        if completed_at is not None:
+            duration = int((completed_at - started_at).total_seconds() / 60)
+            xp_earned = _session_xp(duration, len(upload.exercises))
+        now = datetime.utcnow()
+        cursor.execute("""
+            INSERT INTO workout_sessions (user_id, workout_id, started_at, completed_at, duration, xp_earned, is_completed, created_at, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+        """, (
+            user_id, upload.workout_id, started_at, completed_at, duration, xp_earned,
+            completed_at is not None, now, completed_at or now
+        ))
+        session_id = cursor.fetchone()['id']
+
+        exercises = []
+        for ex in upload.exercises:
+            is_completed = ex.completed_sets >= ex.sets
+            cursor.execute("""
+                INSERT INTO workout_exercises (session_id, session_started_at, exercise_name, muscle_group, sets, reps, weight, completed_sets, is_completed, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (
+                session_id,
+                started_at,
+                ex.exercise_name,
+                resolve_muscle_group(ex.exercise_name, ex.muscle_group),
+                ex.sets,
+                ex.reps,
+                ex.weight,
+                ex.completed_sets,
+                is_completed,
+                datetime.utcnow(),
+                _naive_utc(ex.completed_at) or completed_at or now
+            ))
+            cursor.execute("""
+                SELECT id, session_id, session_started_at, exercise_name, muscle_group, sets, reps, weight, completed_sets, is_completed, created_at, updated_at
+                FROM workout_exercises
+                WHERE id = %s
+            """, (cursor.fetchone()['id'],))
+            exercise_data = cursor.fetchone()
+
+            # Mesmos efeitos do PATCH de progresso, a partir de um exercício vazio
+            new_pr = False
+            if is_completed:
+                new_pr = records_service.record(cursor, user_id, exercise_data, exercise_data['updated_at'])
+                _publish_completed(cursor, user_id, exercise_data)
+            muscle_volume_service.apply_change(cursor, user_id, exercise_data, 0, False)
+            exercises.append(ExerciseUploadResponse(
+                client_id=ex.client_id, **_exercise_response(exercise_data, new_pr).model_dump()
+            ))
+
+        if completed_at is not None:
+            outbox_relay.publish(cursor, SessionCompleted(
+                user_id, session_id, upload.workout_id, started_at, completed_at,
+                duration, xp_earned, len(upload.exercises)
+            ))
+
+        cursor.execute("""
+            SELECT id, user_id, workout_id, started_at, completed_at, duration, xp_earned, is_completed, created_at, updated_at
+            FROM workout_sessions
+            WHERE id = %s
+        """, (session_id,))
+        result = SessionUploadResult(
+            client_id=upload.client_id, status="created",
+            session=_session_response(cursor.fetchone()), exercises=exercises
         )
+        idempotency_store.store(cursor, user_id, key, status.HTTP_200_OK, result.model_dump_json())
+
+    if completed_at is not None:
+        db.after_commit(lambda: pubsub.publish(user_id, "session_completed", {
+            "session_id": session_id,
+            "workout_id": upload.workout_id,
+            "duration": duration,
+            "xp_earned": xp_earned,
+        }))
+    return result
+
+def _publish_completed(cursor, user_id: int, exercise_data):
+    """Evento de domínio da conclusão do exercício (conquistas), na transação do progresso"""
+    outbox_relay.publish(cursor, ExerciseCompleted(
+        user_id, exercise_data['id'], exercise_data['session_id'], exercise_data['exercise_name'],
+        resolve_muscle_group(exercise_data['exercise_name'], exercise_data['muscle_group']),
+        exercise_data['completed_sets'], exercise_data['reps'], exercise_data['weight'], exercise_data['updated_at']
+    ))
+
+def _publish_progress(user_id: int, exercise: WorkoutExerciseResponse):
+    db.after_commit(lambda: pubsub.publish(user_id, "exercise_progress", {
+        "exercise_id": exercise.id,
+        "session_id": exercise.session_id,
+        "completed_sets": exercise.completed_sets,
+        "is_completed": exercise.is_completed,
+        "new_pr": exercise.new_pr,
+    }))
+
+def total_xp(user_id: int) -> int:
+    with db.get_cursor(user_id=user_id) as cursor:
+        # Sessões antigas saem do banco para o arquivo frio; o manifesto guarda o XP delas
+        cursor.execute("""
+            SELECT COALESCE(SUM(xp_earned), 0)
+                   + COALESCE((SELECT SUM(xp_total) FROM cold_archive_manifest WHERE user_id = %s), 0) AS total_xp
+            FROM workout_sessions WHERE user_id = %s AND is_completed = true
+        """, (user_id, user_id))
+        return cursor.fetchone()['total_xp']
+
+@router.post("/", response_model=WorkoutSessionResponse)
+async def start_workout_session(
+    session_data: WorkoutSessionCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Iniciar uma nova sessão de treino"""
+    with db.get_cursor(user_id=current_user.id) as cursor:
+        # Verificar se o treino existe e pertence ao usuário
+        cursor.execute("""
+            SELECT id FROM workouts WHERE id = %s AND user_id = %s
+        """, (session_data.workout_id, current_user.id))
+
+        if not cursor.fetchone():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Treino não encontrado"
+            )
+
+        # Criar sessão
+        started_at = session_data.started_at or datetime.utcnow()
+        cursor.execute("""
+            INSERT INTO workout_sessions (user_id, workout_id, started_at, created_at, updated_at)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (
+            current_user.id,
+            session_data.workout_id,
+            started_at,
+            datetime.utcnow(),
+            datetime.utcnow()
+        ))
+
+        # Buscar a sessão criada
+        cursor.execute("""
+            SELECT id, user_id, workout_id, started_at, completed_at, duration, xp_earned, is_completed, created_at, updated_at
+            FROM workout_sessions
+            WHERE user_id = %s AND workout_id = %s
+            ORDER BY created_at DESC
+            LIMIT 1
+        """, (current_user.id, session_data.workout_id))
+
+        session_result = cursor.fetchone()
+        if not session_result:
+            raise HTTPException(
+                status_code=500,
+                detail="Erro ao criar sessão"
+            )
+
+        return _session_response(session_result)
+
+@router.post("/batch", response_model=SessionBatchResponse)
+async def upload_sessions(
+    batch: SessionBatchUpload,
+    current_user: User = Depends(get_current_user)
+):
+    """Enviar sessões gravadas offline; cada sessão é gravada (ou recusada) por inteiro"""
+    if len(batch.sessions) > settings.SESSION_UPLOAD_MAX_SESSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {settings.SESSION_UPLOAD_MAX_SESSIONS} sessões por envio"
+        )
+    results = []
+    for upload in batch.sessions:
+        try:
+            results.append(ingest_session(upload, current_user.id))
+        except HTTPException as e:
+            # Uma sessão recusada não derruba as demais do lote
+            results.append(SessionUploadResult(client_id=upload.client_id, status="error", error=e.detail))
+    return SessionBatchResponse(results=results)
+
+@router.patch("/{session_id}/complete", response_model=WorkoutSessionResponse)
+async def complete_workout_session(
+    session_id: int,
+    current_user: User = Depends(get_current_user)
+):
+    """Completar uma sessão de treino"""
+    return complete_session(session_id, current_user.id)
+
+@router.post("/{session_id}/exercises", response_model=WorkoutExerciseResponse)
+async def add_exercise_to_session(
+    session_id: int,
+    exercise_data: WorkoutExerciseCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Adicionar exercício a uma sessão"""
+    return add_exercise(session_id, exercise_data, current_user.id)
+
+@router.patch("/exercises/{exercise_id}/progress", response_model=WorkoutExerciseResponse)
+async def update_exercise_progress(
+    exercise_id: int,
+    progress_data: ExerciseProgressUpdate,
+    current_user: User = Depends(get_current_user)
+):
+    """Atualizar progresso de um exercício"""
+    return update_progress(exercise_id, progress_data.completed_sets, current_user.id)
 
 @router.get("/{session_id}/exercises", response_model=List[WorkoutExerciseResponse])
 async def get_session_exercises(
@@ -276,39 +526,123 @@ async def get_session_exercises(
     current_user: User = Depends(get_current_user)
 ):
     """Obter exercícios de uma sessão"""
-    with db.get_cursor() as cursor:
+    with db.get_cursor(readonly=True, user_id=current_user.id) as cursor:
         # Verificar se a sessão existe e pertence ao usuário
         cursor.execute("""
-            SELECT id FROM workout_sessions WHERE id = %s AND user_id = %s
+            SELECT id, started_at FROM workout_sessions WHERE id = %s AND user_id = %s
         """, (session_id, current_user.id))
-        
-        if not cursor.fetchone():
+
+        session = cursor.fetchone()
+        if not session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Sessão não encontrada"
             )
-        
+
         # Buscar exercícios
         cursor.execute("""
-            SELECT id, session_id, exercise_name, sets, reps, weight, completed_sets, is_completed, created_at, updated_at
-            FROM workout_exercises 
-            WHERE session_id = %s
+            SELECT id, session_id, session_started_at, exercise_name, muscle_group, sets, reps, weight, completed_sets, is_completed, created_at, updated_at
+            FROM workout_exercises
+            WHERE session_id = %s AND session_started_at = %s
             ORDER BY created_at
-        """, (session_id,))
-        
+        """, (session_id, session['started_at']))
+
         exercises = cursor.fetchall()
-        return [
-            WorkoutExerciseResponse(
-                id=ex['id'],
-                session_id=ex['session_id'],
-                exercise_name=ex['exercise_name'],
-                sets=ex['sets'],
-                reps=ex['reps'],
-                weight=ex['weight'],
-                completed_sets=ex['completed_sets'],
-                is_completed=ex['is_completed'],
-                created_at=ex['created_at'],
-                updated_at=ex['updated_at']
-            )
-            for ex in exercises
-        ]
+        if settings.PROGRESS_WRITE_BEHIND:
+            exercises = progress_buffer.overlay(exercises)
+        return [_exercise_response(ex) for ex in exercises]
+
+def _open_session(session_id: int, user_id: int):
+    with db.get_cursor(readonly=True, user_id=user_id) as cursor:
+        cursor.execute("""
+            SELECT id, is_completed FROM workout_sessions WHERE id = %s AND user_id = %s
+        """, (session_id, user_id))
+        return cursor.fetchone()
+
+def _exercise_in_session(exercise_id: int, session_id: int, user_id: int) -> bool:
+    with db.get_cursor(readonly=True, user_id=user_id) as cursor:
+        cursor.execute("""
+            SELECT id FROM workout_exercises WHERE id = %s AND session_id = %s
+        """, (exercise_id, session_id))
+        return cursor.fetchone() is not None
+
+@router.websocket("/{session_id}/live")
+async def live_session(websocket: WebSocket, session_id: int):
+    """Canal da sessão ativa: autenticação uma vez no connect, um frame por série.
+
+    Token em `?token=` ou no header `Authorization: Bearer`. Mensagens:
+        {"type": "set_progress", "exercise_id": 1, "completed_sets": 2}
+        {"type": "add_exercise", "exercise_name": "...", "sets": 4, "reps": 10, "weight": 40}
+        {"type": "complete"}
+    Respostas: {"type": "exercise" | "session" | "error", ...}; o campo `ref`
+    da mensagem, se enviado, é devolvido na resposta.
+    """
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    user = await run_in_threadpool(get_user_from_token, token) if token else None
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+        return
+
+    session = await run_in_threadpool(_open_session, session_id, user.id)
+    if not session or session['is_completed']:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Sessão não encontrada ou encerrada")
+        return
+
+    await websocket.accept()
+    # Exercícios já validados nesta conexão dispensam a checagem de sessão
+    known_exercises = set()
+    try:
+        while True:
+            message = await websocket.receive_json()
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "status": 422, "detail": "Mensagem deve ser um objeto"})
+                continue
+            ref = message.get("ref")
+            kind = message.get("type")
+            try:
+                if kind == "set_progress":
+                    progress = ExerciseProgressUpdate(completed_sets=message.get("completed_sets"))
+                    exercise_id = int(message.get("exercise_id"))
+                    if exercise_id not in known_exercises:
+                        if not await run_in_threadpool(_exercise_in_session, exercise_id, session_id, user.id):
+                            raise HTTPException(status_code=404, detail="Exercício não encontrado")
+                        known_exercises.add(exercise_id)
+                    exercise = await run_in_threadpool(
+                        update_progress, exercise_id, progress.completed_sets, user.id
+                    )
+                    await websocket.send_json({"type": "exercise", "ref": ref, "data": exercise.model_dump(mode="json")})
+
+                elif kind == "add_exercise":
+                    exercise_data = WorkoutExerciseCreate(
+                        session_id=session_id,
+                        **{k: v for k, v in message.items() if k in ("exercise_name", "muscle_group", "sets", "reps", "weight")}
+                    )
+                    exercise = await run_in_threadpool(add_exercise, session_id, exercise_data, user.id)
+                    known_exercises.add(exercise.id)
+                    await websocket.send_json({"type": "exercise", "ref": ref, "data": exercise.model_dump(mode="json")})
+
+                elif kind == "complete":
+                    completed = await run_in_threadpool(complete_session, session_id, user.id)
+                    xp = await run_in_threadpool(total_xp, user.id)
+                    await websocket.send_json({
+                        "type": "session",
+                        "ref": ref,
+                        "data": completed.model_dump(mode="json"),
+                        "total_xp": xp,
+                    })
+                    await websocket.close()
+                    return
+
+                else:
+                    await websocket.send_json({"type": "error", "ref": ref, "status": 400,
+                                               "detail": f"Tipo de mensagem inválido: {kind}"})
+
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "ref": ref, "status": e.status_code, "detail": e.detail})
+            except (ValidationError, TypeError, ValueError) as e:
+                await websocket.send_json({"type": "error", "ref": ref, "status": 422, "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
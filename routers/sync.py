@@ -0,0 +1,28 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.infrastructure.database import db
+from app.domain.entities import User
+from app.application.sync_service import SyncService
+from app.application.schemas.sync import SyncChanges
+from routers.auth import get_current_user
+
+router = APIRouter(tags=["sync"])
+
+sync_service = SyncService(db)
+
+@router.get("/", response_model=SyncChanges)
+async def get_changes(
+    cursor: Optional[str] = None,
+    limit: int = Query(None, ge=1, le=1000),
+    current_user: User = Depends(get_current_user)
+):
+    """Treinos, sessões, exercícios e dashboard alterados desde o cursor (sem cursor: snapshot completo)"""
+    try:
+        return sync_service.get_changes(current_user.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -19,7 +19,7 @@ async def update_profile(
     from datetime import datetime
     
     if name or gender:
-        with db.get_cursor() as cursor:
+        with db.get_cursor(user_id=current_user.id) as cursor:
             update_fields = []
             values = []
             
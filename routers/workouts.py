@@ -4,6 +4,7 @@ from datetime import datetime
 
 from app.infrastructure.database import db
 from app.domain.entities import User
+from app.application.achievements_service import AchievementsService
 from app.application.schemas.workout import (
     WorkoutCreate, WorkoutResponse, WeeklyProgressResponse,
     WorkoutStatsResponse
@@ -12,13 +13,15 @@ from routers.auth import get_current_user
 
 router = APIRouter(tags=["workouts"])
 
+achievements_service = AchievementsService(db)
+
 @router.get("/", response_model=List[WorkoutResponse])
 async def get_workouts(
     level: Optional[int] = None,
     current_user: User = Depends(get_current_user)
 ):
     """Buscar treinos do usuário"""
-    with db.get_cursor() as cursor:
+    with db.get_cursor(readonly=True, user_id=current_user.id) as cursor:
         query = "SELECT * FROM workouts WHERE user_id = %s"
         params = [current_user.id]
         
@@ -28,7 +31,7 @@ async def get_workouts(
             
         query += " ORDER BY created_at DESC"
         
-        cursor.execute(query, params)
+        cursor.execute(query, params, cache=True)
         workouts = cursor.fetchall()
         
         return [
@@ -55,7 +58,7 @@ async def create_workout(
     current_user: User = Depends(get_current_user)
 ):
     """Criar novo treino"""
-    with db.get_cursor() as cursor:
+    with db.get_cursor(user_id=current_user.id) as cursor:
         # Inserir treino
         cursor.execute("""
             INSERT INTO workouts (name, description, category, level, duration, exercises_count, xp_reward, user_id, is_active, created_at, updated_at)
@@ -111,7 +114,7 @@ async def get_workout(
     current_user: User = Depends(get_current_user)
 ):
     """Buscar treino específico"""
-    with db.get_cursor() as cursor:
+    with db.get_cursor(readonly=True, user_id=current_user.id) as cursor:
         cursor.execute("""
             SELECT id, name, description, category, level, duration, exercises_count, xp_reward, user_id, is_active, created_at, updated_at
             FROM workouts WHERE id = %s AND user_id = %s
@@ -146,7 +149,7 @@ async def update_workout(
     current_user: User = Depends(get_current_user)
 ):
     """Atualizar treino"""
-    with db.get_cursor() as cursor:
+    with db.get_cursor(user_id=current_user.id) as cursor:
         # Verificar se o treino existe e pertence ao usuário
         cursor.execute("""
             SELECT id FROM workouts WHERE id = %s AND user_id = %s
@@ -212,7 +215,7 @@ async def delete_workout(
     current_user: User = Depends(get_current_user)
 ):
     """Deletar treino"""
-    with db.get_cursor() as cursor:
+    with db.get_cursor(user_id=current_user.id) as cursor:
         cursor.execute("""
             DELETE FROM workouts WHERE id = %s AND user_id = %s
         """, (workout_id, current_user.id))
@@ -226,11 +229,11 @@ async def delete_workout(
         return {"message": "Treino deletado com sucesso"}
 
 @router.get("/stats/summary", response_model=WorkoutStatsResponse)
-async def get_workout_stats(
+def get_workout_stats(
     current_user: User = Depends(get_current_user)
 ):
     """Obter estatísticas de treinos"""
-    with db.get_cursor() as cursor:
+    with db.get_cursor(readonly=True, user_id=current_user.id) as cursor:
         # Total de treinos
         cursor.execute("""
             SELECT COUNT(*) FROM workouts WHERE user_id = %s
@@ -248,6 +251,8 @@ async def get_workout_stats(
             SELECT COALESCE(SUM(xp_reward), 0) FROM workouts WHERE user_id = %s
         """, (current_user.id,))
         total_xp = cursor.fetchone()['coalesce']
+
+        achievements_unlocked = achievements_service.count_unlocked(cursor, current_user.id)
         
         return WorkoutStatsResponse(
             total_workouts=total_workouts,
@@ -257,15 +262,15 @@ async def get_workout_stats(
             longest_streak=0,  # Implementar se necessário
             level=1,  # Implementar se necessário
             level_progress=0.0,  # Implementar se necessário
-            achievements_unlocked=0  # Implementar se necessário
+            achievements_unlocked=achievements_unlocked
         )
 
 @router.get("/progress/weekly", response_model=WeeklyProgressResponse)
-async def get_weekly_progress(
+def get_weekly_progress(
     current_user: User = Depends(get_current_user)
 ):
     """Obter progresso semanal"""
-    with db.get_cursor() as cursor:
+    with db.get_cursor(readonly=True, user_id=current_user.id) as cursor:
         # Buscar treinos da última semana
         cursor.execute("""
             SELECT DATE(created_at) as date, COUNT(*) as count, SUM(xp_reward) as xp
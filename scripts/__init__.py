@@ -0,0 +1 @@
+# Scripts operacionais (geração de dados, manutenção)
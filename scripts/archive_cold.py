@@ -0,0 +1,56 @@
+"""Move sessões antigas do banco para o arquivo frio (arquivos colunares).
+
+Cada (usuário, mês) inteiramente anterior ao corte vira um arquivo em
+`COLD_STORAGE_DIR` e uma linha em `cold_archive_manifest`; as linhas saem
+de `workout_sessions`/`workout_exercises`.
+
+Exemplos:
+    python -m scripts.archive_cold --dry-run
+    python -m scripts.archive_cold --older-than-days 365 --limit 1000
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Arquivamento frio do histórico de sessões")
+    parser.add_argument("--older-than-days", type=int, help="idade mínima (padrão: COLD_ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--limit", type=int, help="máximo de (usuário, mês) nesta execução")
+    parser.add_argument("--dry-run", action="store_true", help="apenas lista o que seria arquivado")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    from app.application.history_service import HistoryService
+    from app.infrastructure.database import Database
+
+    database = Database()
+    database.init_tables()
+    service = HistoryService(database)
+    started = time.perf_counter()
+
+    months = service.archivable_months(args.older_than_days, args.limit)
+    print(f"{len(months)} mês(es) de usuário elegíveis")
+    if args.dry_run:
+        return 0
+
+    moved = 0
+    for index, (user_id, month) in enumerate(months, 1):
+        moved += service.archive_month(user_id, month)
+        print(f"  {index}/{len(months)} meses, {moved} sessões", end="\r")
+    print(f"\n{moved} sessões arquivadas em {time.perf_counter() - started:.1f}s")
+    database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
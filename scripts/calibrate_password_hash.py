@@ -0,0 +1,101 @@
+"""Calibra o custo do hash de senhas para uma latência alvo neste hardware.
+
+Mede o hash (mesmo custo de uma verificação no login) com custos crescentes
+e escolhe o maior que fica dentro do alvo: `rounds` no bcrypt, `time_cost`
+no argon2 (memória e paralelismo fixos). Imprime as variáveis de ambiente a
+configurar; logins com hashes antigos os refazem com a política nova.
+
+Rodar na máquina (ou tipo de instância) de produção, sem outra carga.
+
+Exemplos:
+    python -m scripts.calibrate_password_hash
+    python -m scripts.calibrate_password_hash --target-ms 250 --samples 5
+    python -m scripts.calibrate_password_hash --scheme argon2 --memory-kib 65536 --parallelism 1
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passlib.exc import MissingBackendError
+
+from app.core.security import SCHEMES, build_context
+
+SECRET = "calibracao-senha-de-exemplo"
+BCRYPT_ROUNDS = range(10, 20)  # 10 é o piso recomendado
+ARGON2_TIME_COSTS = range(1, 21)
+
+
+def hash_ms(context, samples: int) -> float:
+    context.hash(SECRET)  # aquecimento (carrega o backend)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash(SECRET)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(scheme: str, target_ms: float, samples: int, memory_kib: int = None,
+              parallelism: int = None) -> Tuple[Optional[int], List[Tuple[int, float]]]:
+    """(maior custo dentro do alvo ou None, [(custo, ms)] medidos)"""
+    if scheme == "bcrypt":
+        costs, param = BCRYPT_ROUNDS, "bcrypt_rounds"
+    else:
+        costs, param = ARGON2_TIME_COSTS, "argon2_time_cost"
+    chosen, measured = None, []
+    for cost in costs:
+        context = build_context(
+            scheme, **{param: cost}, argon2_memory_cost=memory_kib, argon2_parallelism=parallelism
+        )
+        elapsed = hash_ms(context, samples)
+        measured.append((cost, elapsed))
+        print(f"{scheme} {param}={cost:<3} {elapsed:>9.1f}ms")
+        if elapsed > target_ms:
+            break
+        chosen = cost
+    return chosen, measured
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Calibra o custo do hash de senhas")
+    parser.add_argument("--scheme", choices=SCHEMES, default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="latência alvo de um hash")
+    parser.add_argument("--samples", type=int, default=3, help="medições por custo (mediana)")
+    parser.add_argument("--memory-kib", type=int, help="argon2: memória por hash (padrão: Settings)")
+    parser.add_argument("--parallelism", type=int, help="argon2: threads por hash (padrão: Settings)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        chosen, measured = calibrate(args.scheme, args.target_ms, args.samples, args.memory_kib, args.parallelism)
+    except MissingBackendError:
+        print(f"{args.scheme}: backend não instalado (pip install argon2-cffi)")
+        return 1
+    if chosen is None:
+        print(f"\nNem o custo mínimo ({measured[0][0]}: {measured[0][1]:.1f}ms) cabe em {args.target_ms:.0f}ms; "
+              f"aumente o alvo ou use uma máquina mais rápida")
+        return 1
+
+    elapsed = dict(measured)[chosen]
+    print(f"\n# {elapsed:.1f}ms por hash, ~{1000 / elapsed:.1f} logins/s por core")
+    print(f"PASSWORD_HASH_SCHEME={args.scheme}")
+    if args.scheme == "bcrypt":
+        print(f"PASSWORD_BCRYPT_ROUNDS={chosen}")
+    else:
+        context = build_context("argon2", argon2_memory_cost=args.memory_kib, argon2_parallelism=args.parallelism)
+        handler = context.handler("argon2")
+        print(f"PASSWORD_ARGON2_TIME_COST={chosen}")
+        print(f"PASSWORD_ARGON2_MEMORY_KIB={handler.memory_cost}")
+        print(f"PASSWORD_ARGON2_PARALLELISM={handler.parallelism}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
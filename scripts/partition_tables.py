@@ -0,0 +1,70 @@
+"""Manutenção do particionamento mensal de sessões e exercícios (Postgres).
+
+Comandos:
+    migrate   converte as tabelas comuns em particionadas (copia os dados;
+              exige janela de manutenção: as tabelas ficam bloqueadas)
+    ensure    cria as partições do mês corrente e dos próximos meses
+    archive   desanexa meses antigos para o schema de arquivo
+    list      lista as partições anexadas
+
+Exemplos:
+    python -m scripts.partition_tables migrate
+    python -m scripts.partition_tables ensure --months-ahead 6
+    python -m scripts.partition_tables archive --older-than-months 24
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Particionamento mensal de workout_sessions/workout_exercises")
+    parser.add_argument("command", choices=("migrate", "ensure", "archive", "list"))
+    parser.add_argument("--months-ahead", type=int, help="meses futuros pré-criados (padrão: PARTITION_PREMAKE_MONTHS)")
+    parser.add_argument("--older-than-months", type=int,
+                        help="idade mínima para arquivar (padrão: PARTITION_ARCHIVE_AFTER_MONTHS)")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    from app.infrastructure import partitioning
+    from app.infrastructure.database import Database
+
+    database = Database()
+    if database.dialect != "postgresql":
+        print("Particionamento disponível apenas no Postgres")
+        return 1
+
+    with database.get_cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('cirqulofit.init_tables'))")
+        if args.command == "migrate":
+            if partitioning.migrate_to_partitioned(cursor, args.months_ahead):
+                print("Tabelas convertidas para particionadas")
+            else:
+                print("Tabelas já são particionadas")
+        elif not partitioning.is_partitioned(cursor, "workout_sessions"):
+            print("Tabelas não particionadas; rode o comando migrate primeiro")
+            return 1
+        elif args.command == "ensure":
+            partitioning.ensure_partitions(cursor, args.months_ahead)
+        elif args.command == "archive":
+            for name in partitioning.archive_partitions(cursor, args.older_than_months):
+                print(f"arquivada: {name}")
+
+        if args.command != "migrate" or partitioning.is_partitioned(cursor, "workout_sessions"):
+            for table, _ in partitioning.TABLES:
+                names = [name for name, _ in partitioning.list_partitions(cursor, table)]
+                print(f"{table}: {len(names)} partições mensais" + (f" ({names[0]} .. {names[-1]})" if names else ""))
+    database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
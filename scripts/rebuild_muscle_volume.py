@@ -0,0 +1,47 @@
+"""Recalcula os rollups semanais por grupo muscular (`muscle_volume_weekly`).
+
+Só as semanas com exercícios ainda no banco são recalculadas; semanas já
+movidas para o arquivo frio mantêm os rollups existentes.
+
+Exemplos:
+    python -m scripts.rebuild_muscle_volume
+    python -m scripts.rebuild_muscle_volume --user-id 42
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reconstrói o volume semanal por grupo muscular")
+    parser.add_argument("--user-id", type=int, help="apenas este usuário (padrão: todos)")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    from app.application.muscle_volume_service import MuscleVolumeService
+    from app.infrastructure.database import Database
+
+    database = Database()
+    database.init_tables()
+    service = MuscleVolumeService(database)
+    started = time.perf_counter()
+    if args.user_id:
+        count = service.rebuild(args.user_id)
+    else:
+        count = service.rebuild_all()
+    print(f"{count} semanas x grupo gravadas em {time.perf_counter() - started:.1f}s")
+    database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Recalcula o índice `personal_records` a partir do histórico completo.
+
+Lê banco e arquivo frio; útil depois de importações, correções manuais ou
+para popular o índice em bancos anteriores a ele.
+
+Exemplos:
+    python -m scripts.rebuild_personal_records
+    python -m scripts.rebuild_personal_records --user-id 42
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reconstrói o índice de recordes pessoais")
+    parser.add_argument("--user-id", type=int, help="apenas este usuário (padrão: todos)")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    from app.application.records_service import PersonalRecordsService
+    from app.infrastructure.database import Database
+
+    database = Database()
+    database.init_tables()
+    service = PersonalRecordsService(database)
+    started = time.perf_counter()
+    if args.user_id:
+        count = service.rebuild(args.user_id)
+    else:
+        count = service.rebuild_all()
+    print(f"{count} recordes gravados em {time.perf_counter() - started:.1f}s")
+    database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Launcher de produção.
+
+Sobe o uvicorn com um worker por CPU (ou WEB_CONCURRENCY), uvloop e httptools
+quando instalados (`uvicorn[standard]`) e keep-alive ajustado para ficar acima
+do timeout ocioso do balanceador. Como o I/O de inicialização roda no lifespan
+de cada worker, importar `main` é barato e os workers sobem em paralelo.
+
+As CPUs contadas são as do contêiner (afinidade e cota do cgroup, não as do
+host), limitadas a WEB_CONCURRENCY_MAX. No Postgres cada worker abre até
+DATABASE_POOL_MAX_SIZE conexões no primário, mais a do líder do agendador e a
+da ponte de eventos (e o pool de cada réplica, no servidor dela); sem
+WEB_CONCURRENCY, os workers são reduzidos para caber em
+DATABASE_MAX_CONNECTIONS - DATABASE_RESERVED_CONNECTIONS, e com ele o
+serve.py recusa subir se não couber.
+
+`PROGRESS_WRITE_BEHIND=true` exige um único worker: o buffer de progresso é
+por processo, e completar uma sessão só grava o que está no próprio worker.
+
+Uso:
+    python serve.py
+"""
+import importlib.util
+import math
+import os
+from urllib.parse import urlparse
+
+import uvicorn
+
+from app.core.config import settings
+
+def available_cpus() -> int:
+    """CPUs utilizáveis pelo processo: afinidade e cota do cgroup v2 (`cpu.max`)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def connections_per_worker() -> int:
+    """Conexões que um worker pode abrir no primário"""
+    dedicated = 1  # LISTEN da ponte de eventos
+    if settings.SCHEDULER_ENABLED:
+        dedicated += 1  # advisory lock do líder (todo worker tenta)
+    return settings.DATABASE_POOL_MAX_SIZE + dedicated
+
+def connection_budget() -> int:
+    return settings.DATABASE_MAX_CONNECTIONS - settings.DATABASE_RESERVED_CONNECTIONS
+
+def uses_postgres() -> bool:
+    return urlparse(settings.DATABASE_URL).scheme.startswith("postgres")
+
+def worker_count() -> int:
+    if settings.WEB_CONCURRENCY:
+        return settings.WEB_CONCURRENCY
+    workers = min(available_cpus(), settings.WEB_CONCURRENCY_MAX)
+    if uses_postgres():
+        workers = min(workers, connection_budget() // connections_per_worker())
+    return max(workers, 1)
+
+def has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+def main():
+    workers = worker_count()
+    if settings.PROGRESS_WRITE_BEHIND and workers > 1:
+        raise SystemExit(
+            f"PROGRESS_WRITE_BEHIND=true exige WEB_CONCURRENCY=1 ({workers} workers configurados): "
+            "o progresso pendente em outro worker não seria gravado ao completar a sessão"
+        )
+    if uses_postgres() and workers * connections_per_worker() > connection_budget():
+        raise SystemExit(
+            f"{workers} workers x {connections_per_worker()} conexões excedem o orçamento do Postgres "
+            f"({settings.DATABASE_MAX_CONNECTIONS} - {settings.DATABASE_RESERVED_CONNECTIONS} reservadas): "
+            "reduza WEB_CONCURRENCY ou DATABASE_POOL_MAX_SIZE, ou aumente max_connections "
+            "(DATABASE_MAX_CONNECTIONS), de preferência com um pooler como o PgBouncer"
+        )
+    uvicorn.run(
+        "main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        loop="uvloop" if has_module("uvloop") else "asyncio",
+        http="httptools" if has_module("httptools") else "h11",
+        timeout_keep_alive=settings.KEEP_ALIVE_SECONDS,
+        backlog=2048,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        access_log=settings.ENVIRONMENT != "production",
+    )
+
+if __name__ == "__main__":
+    main()